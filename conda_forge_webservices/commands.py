@@ -15,6 +15,7 @@ import logging
 from typing import Literal
 
 # from .utils import tmp_directory
+from .rate_limits import attribute_rate_limit_usage, record_response
 from .linting import (
     compute_lint_message,
     comment_on_pr,
@@ -190,6 +191,7 @@ def _attempt_git_clone(repo_url, feedstock_dir, pr_branch=None):
     return repo
 
 
+@attribute_rate_limit_usage("commands")
 def pr_comment(org_name, repo_name, issue_num, comment, comment_id=None, actor=None):
     """Process a pull request comment"""
 
@@ -247,6 +249,7 @@ def reply_no_command(
         issue.create_comment(no_command_message)
 
 
+@attribute_rate_limit_usage("commands")
 def pr_detailed_comment(
     org_name,
     repo_name,
@@ -468,6 +471,7 @@ def pr_detailed_comment(
             shutil.rmtree(tmp_dir)
 
 
+@attribute_rate_limit_usage("commands")
 def issue_comment(
     org_name, repo_name, issue_num, title, comment, comment_id=None, actor=None
 ):
@@ -530,7 +534,7 @@ def issue_comment(
             # this token has to be that of an actual bot since we use this
             # to make a fork
             # the bot used does not need admin permissions
-            gh = github.Github(auth=github.Auth.Token(os.environ["GH_TOKEN"]))
+            gh = get_gh_client("bot")
             repo = gh.get_repo(f"{org_name}/{repo_name}")
             default_branch = repo.default_branch
             break
@@ -845,6 +849,7 @@ def _sync_default_branch(
             "Content-Type": "application/json",
             "Accept": "application/vnd.github.v3+json",
         },
+        hooks={"response": record_response},
     )
     # ignore no such branch errors?
     if r.status_code != 404:
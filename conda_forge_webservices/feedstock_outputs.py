@@ -3,14 +3,20 @@ This module registers and validates feedstock outputs.
 """
 
 import os
+import atexit
 import json
 import hmac
 import urllib.parse
 import functools
 import logging
 import base64
+import collections
+import random
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
+import cachetools
 import requests
 import requests.exceptions
 import scrypt
@@ -20,11 +26,11 @@ import binstar_client.errors
 from binstar_client.utils import get_server_api
 from binstar_client import BinstarError
 from conda_forge_metadata.feedstock_outputs import (
-    package_to_feedstock,
-    feedstock_outputs_config,
+    fetch_allowed_autoreg_feedstock_globs,
+    package_to_feedstock as _package_to_feedstock,
+    sharded_path as _get_sharded_path,
 )
-from conda_forge_metadata.feedstock_outputs import sharded_path as _get_sharded_path
-
+from .rate_limits import attribute_rate_limit_usage, record_response
 from .utils import parse_conda_pkg, _test_and_raise_besides_file_not_exists
 from conda_forge_webservices.tokens import (
     get_app_token_for_webservices_only,
@@ -38,13 +44,34 @@ POST_STAGING = "cf-post-staging"
 PROD = "conda-forge"
 STAGING_LABEL = "cf-staging-do-not-use"
 
+# dists copied to prod that are waiting for a background hash audit
+# entries are (feedstock_repo_name, dist, label, hash_type, hash_value, attempts)
+COPY_AUDIT_QUEUE: collections.deque = collections.deque(maxlen=10_000)
+# dists whose lookup on anaconda.org fails are audited again in later batches
+# until they have been tried this many times
+COPY_AUDIT_MAX_ATTEMPTS = 5
+# bad copies that were found but could not be reported on core-notes yet
+COPY_AUDIT_UNREPORTED: collections.deque = collections.deque(maxlen=10_000)
+COPY_AUDIT_SAMPLE_RATE = float(
+    os.environ.get("CF_WEBSERVICES_COPY_AUDIT_SAMPLE_RATE", "1.0")
+)
+
+FEEDSTOCK_OUTPUTS_RAW_URL = (
+    "https://raw.githubusercontent.com/conda-forge/feedstock-outputs"
+)
+FEEDSTOCK_OUTPUTS_CONFIG_TTL = 10 * 60  # ten minutes
+FEEDSTOCK_OUTPUTS_TIMEOUT = 10  # seconds
+UNREGISTERED_OUTPUTS_TTL = 30  # thirty seconds
 
+
+@attribute_rate_limit_usage("outputs")
 def is_valid_feedstock_token(user, project, feedstock_token, provider=None):
     gh_token = get_app_token_for_webservices_only()
     r = requests.get(
         f"https://api.github.com/repos/{user}/"
         f"feedstock-tokens/contents/tokens/{project}.json",
         headers={"Authorization": f"Bearer {gh_token}"},
+        hooks={"response": record_response},
     )
     if r.status_code == 200:
         data = r.json()
@@ -389,6 +416,145 @@ def _is_valid_output_hash(outputs, hash_type, channel, label):
     return valid
 
 
+class _FeedstockOutputsConfigCache:
+    """A thread-safe, TTL-based cache of the conda-forge/feedstock-outputs
+    config.
+
+    The config is fetched without holding the lock so that readers are not
+    blocked on the network. If a refresh fails, the last good data is used
+    until the next refresh.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._config = None
+        self._updated_at = None
+        self._refreshing = False
+
+    def refresh(self, ref="main"):
+        r = requests.get(
+            f"{FEEDSTOCK_OUTPUTS_RAW_URL}/{ref}/config.json",
+            timeout=FEEDSTOCK_OUTPUTS_TIMEOUT,
+        )
+        r.raise_for_status()
+        config = r.json()
+
+        with self._lock:
+            self._config = config
+            self._updated_at = time.monotonic()
+
+        LOGGER.info("    refreshed feedstock-outputs config at ref %s", ref)
+
+    def config(self):
+        with self._lock:
+            config = self._config
+            # only one thread refreshes stale data while the others use it
+            refresh = (
+                self._updated_at is None
+                or time.monotonic() - self._updated_at > self.ttl
+            ) and (config is None or not self._refreshing)
+            if refresh:
+                self._refreshing = True
+
+        if not refresh:
+            return config
+
+        try:
+            self.refresh()
+        except Exception as e:
+            if config is None:
+                raise e
+            LOGGER.warning(
+                "    could not refresh feedstock-outputs config, using stale data",
+                exc_info=e,
+            )
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+        with self._lock:
+            return self._config
+
+
+FEEDSTOCK_OUTPUTS_CONFIG = _FeedstockOutputsConfigCache(FEEDSTOCK_OUTPUTS_CONFIG_TTL)
+# conda-forge-metadata caches the feedstocks of registered outputs but not
+# the outputs that are not registered, so we cache those briefly so that
+# newly registered outputs show up quickly
+_UNREGISTERED_OUTPUTS_CACHE: cachetools.TTLCache[str, bool] = cachetools.TTLCache(
+    maxsize=4096, ttl=UNREGISTERED_OUTPUTS_TTL
+)
+_UNREGISTERED_OUTPUTS_CACHE_LOCK = threading.Lock()
+
+OUTPUT_VALIDATION_POOL = None
+OUTPUT_VALIDATION_POOL_MAX_WORKERS = 8
+
+
+def _output_validation_pool():
+    global OUTPUT_VALIDATION_POOL
+    if OUTPUT_VALIDATION_POOL is None:
+        OUTPUT_VALIDATION_POOL = ThreadPoolExecutor(
+            max_workers=OUTPUT_VALIDATION_POOL_MAX_WORKERS,
+        )
+    return OUTPUT_VALIDATION_POOL
+
+
+def _shutdown_output_validation_pool():
+    if OUTPUT_VALIDATION_POOL is not None:
+        OUTPUT_VALIDATION_POOL.shutdown(wait=False)
+
+
+atexit.register(_shutdown_output_validation_pool)
+
+
+def feedstock_outputs_config():
+    """Get the (cached) config from conda-forge/feedstock-outputs."""
+    return FEEDSTOCK_OUTPUTS_CONFIG.config()
+
+
+def refresh_feedstock_outputs_config(ref="main"):
+    """Refresh the cached conda-forge/feedstock-outputs data.
+
+    Parameters
+    ----------
+    ref : str, optional
+        The git ref to read the config from. Use the commit SHA from a push
+        event to avoid reading stale data from the raw GitHub CDN.
+        Default is "main".
+    """
+    FEEDSTOCK_OUTPUTS_CONFIG.refresh(ref=ref)
+    fetch_allowed_autoreg_feedstock_globs.cache_clear()
+    with _UNREGISTERED_OUTPUTS_CACHE_LOCK:
+        _UNREGISTERED_OUTPUTS_CACHE.clear()
+
+
+def _forget_registered_feedstocks(name):
+    with _UNREGISTERED_OUTPUTS_CACHE_LOCK:
+        _UNREGISTERED_OUTPUTS_CACHE.pop(name, None)
+
+
+def package_to_feedstock(name):
+    """Map a package name to the feedstock name(s) (without -feedstock) that
+    are allowed to upload it.
+
+    Raises a `requests.exceptions.HTTPError` if the package is not registered
+    and does not match any auto-registration glob.
+    """
+    with _UNREGISTERED_OUTPUTS_CACHE_LOCK:
+        if name in _UNREGISTERED_OUTPUTS_CACHE:
+            raise requests.exceptions.HTTPError(f"output {name} is not registered")
+
+    try:
+        feedstocks = _package_to_feedstock(name, timeout=FEEDSTOCK_OUTPUTS_TIMEOUT)
+    except requests.exceptions.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            with _UNREGISTERED_OUTPUTS_CACHE_LOCK:
+                _UNREGISTERED_OUTPUTS_CACHE[name] = True
+        raise e
+
+    return sorted(feedstocks)
+
+
 def _add_feedstock_output(
     feedstock: str,
     pkg_name: str,
@@ -399,44 +565,49 @@ def _add_feedstock_output(
     """
     gh = get_gh_client()
     repo = gh.get_repo("conda-forge/feedstock-outputs")
+    _forget_registered_feedstocks(pkg_name)
     try:
-        contents = repo.get_contents(_get_sharded_path(pkg_name))
-    except github.GithubException as e:
-        _test_and_raise_besides_file_not_exists(e)
-        contents = None
-
-    if contents is None:
-        data = {"feedstocks": [feedstock]}
-        repo.create_file(
-            _get_sharded_path(pkg_name),
-            f"[cf admin skip] ***NO_CI*** add output {pkg_name} for "
-            f"conda-forge/{feedstock}-feedstock",
-            json.dumps(data),
-        )
-        LOGGER.info(
-            f"    output {pkg_name} added for feedstock "
-            f"conda-forge/{feedstock}-feedstock"
-        )
-    else:
-        data = json.loads(contents.decoded_content.decode("utf-8"))
-        if feedstock not in data["feedstocks"]:
-            data["feedstocks"].append(feedstock)
-            repo.update_file(
-                contents.path,
-                f"[cf admin skip] ***NO_CI*** add output {pkg_name} "
-                f"for conda-forge/{feedstock}-feedstock",
+        try:
+            contents = repo.get_contents(_get_sharded_path(pkg_name))
+        except github.GithubException as e:
+            _test_and_raise_besides_file_not_exists(e)
+            contents = None
+
+        if contents is None:
+            data = {"feedstocks": [feedstock]}
+            repo.create_file(
+                _get_sharded_path(pkg_name),
+                f"[cf admin skip] ***NO_CI*** add output {pkg_name} for "
+                f"conda-forge/{feedstock}-feedstock",
                 json.dumps(data),
-                contents.sha,
             )
             LOGGER.info(
                 f"    output {pkg_name} added for feedstock "
                 f"conda-forge/{feedstock}-feedstock"
             )
         else:
-            LOGGER.info(
-                f"    output {pkg_name} already exists for feedstock "
-                f"conda-forge/{feedstock}-feedstock"
-            )
+            data = json.loads(contents.decoded_content.decode("utf-8"))
+            if feedstock not in data["feedstocks"]:
+                data["feedstocks"].append(feedstock)
+                repo.update_file(
+                    contents.path,
+                    f"[cf admin skip] ***NO_CI*** add output {pkg_name} "
+                    f"for conda-forge/{feedstock}-feedstock",
+                    json.dumps(data),
+                    contents.sha,
+                )
+                LOGGER.info(
+                    f"    output {pkg_name} added for feedstock "
+                    f"conda-forge/{feedstock}-feedstock"
+                )
+            else:
+                LOGGER.info(
+                    f"    output {pkg_name} already exists for feedstock "
+                    f"conda-forge/{feedstock}-feedstock"
+                )
+    finally:
+        # lookups made while we were writing can have cached the old data
+        _forget_registered_feedstocks(pkg_name)
 
 
 def _run_with_backoff(func, *args, n_try=10):
@@ -449,10 +620,44 @@ def _run_with_backoff(func, *args, n_try=10):
             time.sleep(1.5**i)
 
 
+@attribute_rate_limit_usage("outputs")
+def _check_unique_output_name(un, *, feedstock, register, check_exists, gh_token):
+    """Returns if the output name is valid for the feedstock and if it exists
+    in the feedstock-outputs repo (always True if `check_exists` is False)."""
+    try:
+        # this returns the feedstock without -feedstock
+        registered_feedstocks = package_to_feedstock(un)
+    except requests.exceptions.HTTPError:
+        registered_feedstocks = []
+
+    if registered_feedstocks:
+        # if we find any, we check
+        un_valid = feedstock in registered_feedstocks
+        LOGGER.info(f"    checked|valid: {un}|{un_valid}")
+    else:
+        # otherwise it is only valid if we are registering on the fly
+        un_valid = register
+        LOGGER.info(f"    does not exist|valid: {un}|{un_valid}")
+
+    un_exists = True
+    if un_valid and check_exists:
+        un_sharded_path = _get_sharded_path(un)
+        r = requests.get(
+            "https://api.github.com/repos/conda-forge/"
+            f"feedstock-outputs/contents/{un_sharded_path}",
+            headers={"Authorization": f"Bearer {gh_token}"},
+            hooks={"response": record_response},
+        )
+        un_exists = r.status_code != 404
+
+    return un_valid, un_exists
+
+
 def _is_valid_feedstock_output(
     feedstock_repo_name,
     outputs,
     register=False,
+    dry_run=False,
 ):
     """Test if feedstock outputs are valid (i.e., the outputs are allowed for that
     feedstock). Optionally register them if they do not exist.
@@ -469,6 +674,10 @@ def _is_valid_feedstock_output(
         If True, attempt to register any outputs that do not exist by pushing
         the proper json blob to `output_repo`. Default is False.
         ** DO NOT TURN TO TRUE UNLESS YOU KNOW WHAT YOU ARE DOING. **
+    dry_run : bool, optional
+        If True, never register any outputs. Outputs that do not exist are
+        reported as valid if `register` is True (i.e., they would be registered
+        on the fly). Default is False.
 
     Returns
     -------
@@ -495,37 +704,32 @@ def _is_valid_feedstock_output(
             continue
         unique_names.add(o)
 
-    unique_names_valid = dict.fromkeys(unique_names, False)
-    for un in unique_names:
-        try:
-            # this returns the feedstock without -feedstock
-            registered_feedstocks = package_to_feedstock(un)
-        except requests.exceptions.HTTPError:
-            registered_feedstocks = []
-
-        if registered_feedstocks:
-            # if we find any, we check
-            unique_names_valid[un] = feedstock in registered_feedstocks
-            LOGGER.info(f"    checked|valid: {un}|{unique_names_valid[un]}")
-        else:
-            # otherwise it is only valid if we are registering on the fly
-            unique_names_valid[un] = register
-            LOGGER.info(f"    does not exist|valid: {un}|{unique_names_valid[un]}")
-
-        # make the output if we need to
-        if unique_names_valid[un]:
-            un_sharded_path = _get_sharded_path(un)
-            r = requests.get(
-                "https://api.github.com/repos/conda-forge/"
-                f"feedstock-outputs/contents/{un_sharded_path}",
-                headers={"Authorization": f"Bearer {gh_token}"},
+    # the lookups are independent so we do them concurrently
+    unique_names = sorted(unique_names)
+    lookups = list(
+        _output_validation_pool().map(
+            functools.partial(
+                _check_unique_output_name,
+                feedstock=feedstock,
+                register=register,
+                check_exists=not dry_run,
+                gh_token=gh_token,
+            ),
+            unique_names,
+        )
+    )
+    unique_names_valid = {
+        un: un_valid for un, (un_valid, _) in zip(unique_names, lookups)
+    }
+
+    # registration pushes commits to the same repo so we do it serially
+    for un, (un_valid, un_exists) in zip(unique_names, lookups):
+        if un_valid and not dry_run and not un_exists:
+            _run_with_backoff(
+                _add_feedstock_output,
+                feedstock,
+                un,
             )
-            if r.status_code == 404:
-                _run_with_backoff(
-                    _add_feedstock_output,
-                    feedstock,
-                    un,
-                )
 
     for dist in outputs:
         try:
@@ -543,6 +747,7 @@ def _is_valid_feedstock_output(
     return valid
 
 
+@attribute_rate_limit_usage("outputs")
 def validate_feedstock_outputs(
     feedstock_repo_name,
     outputs,
@@ -638,6 +843,65 @@ def validate_feedstock_outputs(
     return valid, errors
 
 
+def check_feedstock_outputs(feedstock_repo_name, outputs):
+    """Check if feedstock outputs are allowed for a feedstock before they are
+    uploaded.
+
+    This function does not look at the staging channel or register any outputs.
+    Outputs that do not exist yet are reported as valid only if they would be
+    registered automatically when copied.
+
+    Parameters
+    ----------
+    feedstock_repo_name : str
+        The name of the feedstock repo (i.e., ngmix-feedstock).
+    outputs : list of str
+        A list of outputs to check. The list entries should be the full names
+        with the platform directory, version/build info, and file extension
+        (e.g., `noarch/blah-fa31b0-2020.04.13.15.54.07-py_0.conda`).
+
+    Returns
+    -------
+    valid : dict
+        A dict keyed on the entries in `outputs` with values True if the output
+        is allowed and False otherwise.
+    errors : list of str
+        A list of any errors encountered.
+    """
+    valid = dict.fromkeys(outputs, False)
+
+    errors = []
+
+    outputs_to_test = []
+    for o in outputs:
+        try:
+            parse_conda_pkg(o)
+            outputs_to_test.append(o)
+        except RuntimeError:
+            errors.append(
+                f"output '{o}' is not correctly formatted (it must be the fully "
+                "qualified name w/ extension, `noarch/blah-fa31b0-2020.04.13.15"
+                ".54.07-py_0.conda`)"
+            )
+
+    valid_outputs = _is_valid_feedstock_output(
+        feedstock_repo_name,
+        outputs_to_test,
+        register=feedstock_outputs_config().get("auto_register_all", False),
+        dry_run=True,
+    )
+    for o in outputs_to_test:
+        if valid_outputs[o]:
+            valid[o] = True
+        else:
+            errors.append(
+                f"output {o} not allowed for conda-forge/{feedstock_repo_name}"
+            )
+
+    return valid, errors
+
+
+@attribute_rate_limit_usage("outputs")
 def stage_dist_to_post_staging_and_possibly_copy_to_prod(
     dist, dest_label, hash_type, hash_value
 ):
@@ -723,6 +987,7 @@ def stage_dist_to_post_staging_and_possibly_copy_to_prod(
     return pre_copied and copied, errors
 
 
+@attribute_rate_limit_usage("outputs")
 def comment_on_outputs_copy(feedstock_repo_name, git_sha, errors, valid, copied):
     """Make an issue or comment if the feedstock output copy failed.
 
@@ -828,3 +1093,214 @@ community [channel](https://conda-forge.zulipchat.com/#narrow/channel/457337-gen
         if issue.state == "closed":
             issue.edit(state="open")
         issue.create_comment(message)
+
+
+def queue_copied_dist_for_audit(
+    feedstock_repo_name, dist, label, hash_type, hash_value, sample_rate=None
+):
+    """Queue a dist that was copied to prod for the background hash audit.
+
+    Parameters
+    ----------
+    feedstock_repo_name : str
+        The name of the feedstock repo (i.e., ngmix-feedstock).
+    dist : str
+        The full name of the dist (e.g.,
+        `noarch/blah-fa31b0-2020.04.13.15.54.07-py_0.conda`).
+    label : str
+        The label the dist was copied to on `conda-forge`.
+    hash_type : str
+        The hash key to look for. One of "sha256" or "md5".
+    hash_value : str
+        The hash value the dist should have.
+    sample_rate : float, optional
+        The fraction of dists to audit. Defaults to the value of the
+        `CF_WEBSERVICES_COPY_AUDIT_SAMPLE_RATE` environment variable
+        or 1 (i.e., audit everything).
+
+    Returns
+    -------
+    queued : bool
+        True if the dist was queued and False otherwise.
+    """
+    if sample_rate is None:
+        sample_rate = COPY_AUDIT_SAMPLE_RATE
+
+    if sample_rate < 1 and random.random() >= sample_rate:
+        return False
+
+    COPY_AUDIT_QUEUE.append(
+        (feedstock_repo_name, dist, label, hash_type, hash_value, 0)
+    )
+    return True
+
+
+def _comment_on_core_notes_for_bad_copies(bad_copies):
+    gh = get_gh_client()
+    repo = gh.get_repo("conda-forge/core-notes")
+
+    comment = (
+        f"The background copy audit found {len(bad_copies)} package(s) on {PROD} "
+        "that do not match what was validated on the staging channel. "
+        "Please investigate!\n\n"
+    )
+    for feedstock_repo_name, dist, label, hash_type, hash_value, reason in bad_copies:
+        channel_str = "conda-forge" if label == "main" else f"conda-forge/label/{label}"
+        comment += (
+            f" - `{dist}` on {channel_str} from conda-forge/{feedstock_repo_name} "
+            f"(expected `{hash_type}:{hash_value}`): {reason}\n"
+        )
+
+    title_prefix = "important/security: bad copy operation(s) found by copy audit"
+    for issue in repo.get_issues(state="open"):
+        if issue.title.startswith(title_prefix):
+            issue.create_comment(comment)
+            return issue
+
+    return repo.create_issue(
+        title=f"{title_prefix} ({len(bad_copies)} package(s))",
+        body=comment,
+    )
+
+
+def _report_bad_copies():
+    bad_copies = []
+    while COPY_AUDIT_UNREPORTED:
+        try:
+            bad_copies.append(COPY_AUDIT_UNREPORTED.popleft())
+        except IndexError:
+            break
+
+    if not bad_copies:
+        return
+
+    try:
+        _comment_on_core_notes_for_bad_copies(bad_copies)
+    except Exception:
+        # keep them around so that the next audit tries again
+        COPY_AUDIT_UNREPORTED.extendleft(reversed(bad_copies))
+        LOGGER.exception(
+            "    could not report %d bad copies on %s to core-notes: %s",
+            len(bad_copies),
+            PROD,
+            ", ".join(bc[1] for bc in bad_copies),
+        )
+
+
+@attribute_rate_limit_usage("outputs")
+def audit_copied_dists(max_dists=200, report=True):
+    """Check the hashes of recently copied dists on prod and report any
+    bad copies in a single issue on conda-forge/core-notes.
+
+    Dists that cannot be looked up on anaconda.org are queued again for up to
+    `COPY_AUDIT_MAX_ATTEMPTS` tries. Bad copies that cannot be reported, or
+    are not reported since `report` is False, are reported with the next batch.
+
+    Parameters
+    ----------
+    max_dists : int, optional
+        The maximum number of dists to check in this batch. Any remaining dists
+        stay in the queue for the next batch. Default is 200.
+    report : bool, optional
+        If False, the hashes are checked but bad copies are not reported on
+        GitHub yet (e.g., since the rate limit budget is low). Default is True.
+
+    Returns
+    -------
+    bad_copies : list of tuple
+        A list of `(feedstock_repo_name, dist, label, hash_type, hash_value, reason)`
+        entries for each bad copy found.
+    """
+    batch = []
+    while COPY_AUDIT_QUEUE and len(batch) < max_dists:
+        try:
+            batch.append(COPY_AUDIT_QUEUE.popleft())
+        except IndexError:
+            break
+
+    if not batch:
+        if report:
+            _report_bad_copies()
+        return []
+
+    ac = _get_ac_api_prod()
+    bad_copies = []
+    num_checked = 0
+    for feedstock_repo_name, dist, label, hash_type, hash_value, attempts in batch:
+        try:
+            _, name, version, _ = parse_conda_pkg(dist)
+            data = ac.distribution(
+                PROD,
+                name,
+                version,
+                basename=urllib.parse.quote(dist, safe=""),
+            )
+        except binstar_client.errors.NotFound:
+            data = None
+        except (BinstarError, requests.exceptions.RequestException, RuntimeError) as e:
+            if attempts + 1 < COPY_AUDIT_MAX_ATTEMPTS:
+                LOGGER.info(
+                    "    could not audit copy on %s due to anaconda.org error "
+                    "(will retry): %s",
+                    PROD,
+                    dist,
+                    exc_info=e,
+                )
+                COPY_AUDIT_QUEUE.append(
+                    (
+                        feedstock_repo_name,
+                        dist,
+                        label,
+                        hash_type,
+                        hash_value,
+                        attempts + 1,
+                    )
+                )
+            else:
+                LOGGER.warning(
+                    "    could not audit copy on %s due to anaconda.org error "
+                    "after %d attempts: %s",
+                    PROD,
+                    attempts + 1,
+                    dist,
+                    exc_info=e,
+                )
+            continue
+
+        num_checked += 1
+        if data is None:
+            # the package may have been removed since it was copied
+            LOGGER.info(
+                "    could not audit copy on %s since it is missing: %s", PROD, dist
+            )
+        elif not hmac.compare_digest(data.get(hash_type) or "", hash_value):
+            bad_copies.append(
+                (
+                    feedstock_repo_name,
+                    dist,
+                    label,
+                    hash_type,
+                    hash_value,
+                    f"package has hash `{hash_type}:{data.get(hash_type)}`",
+                )
+            )
+
+    LOGGER.info(
+        "    audited %d of %d copied dists on %s: %d bad",
+        num_checked,
+        len(batch),
+        PROD,
+        len(bad_copies),
+    )
+
+    COPY_AUDIT_UNREPORTED.extend(bad_copies)
+    if report:
+        _report_bad_copies()
+    elif COPY_AUDIT_UNREPORTED:
+        LOGGER.info(
+            "    deferring the report of %d bad copies on %s",
+            len(COPY_AUDIT_UNREPORTED),
+            PROD,
+        )
+
+    return bad_copies
@@ -0,0 +1,272 @@
+"""
+This module keeps local bare mirrors of the repositories we clone often.
+
+Jobs clone from GitHub with `--reference <mirror>` so that only the objects
+that are not in the mirror yet are transferred. The mirrors are fetched
+incrementally when they are used and evicted, least recently used first, once
+they take up more than `GIT_MIRROR_MAX_BYTES` on disk.
+
+The mirrors are shared between processes with a lock file per mirror. Jobs
+hold a shared lock for as long as their clone borrows objects from the mirror.
+Creating, fetching and evicting a mirror take the lock exclusively, so a
+mirror never changes under a clone that references it. Jobs that find the
+mirror up to date only take the shared lock, so they can clone at the same
+time, and jobs that find a stale mirror in use by other jobs clone with it as
+it is instead of waiting for them to finish.
+"""
+
+import contextlib
+import fcntl
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.parse
+
+LOGGER = logging.getLogger("conda_forge_webservices.git_mirrors")
+
+GIT_MIRROR_DIR = os.environ.get(
+    "CF_WEBSERVICES_GIT_MIRROR_DIR",
+    os.path.join(tempfile.gettempdir(), f"cf-webservices-git-mirrors-{os.getuid()}"),
+)
+GIT_MIRROR_MAX_BYTES = int(
+    os.environ.get("CF_WEBSERVICES_GIT_MIRROR_MAX_BYTES", str(10 * 1024**3))
+)
+# mirrors are not fetched again if they were fetched less than this many
+# seconds ago; jobs fetch what they need on top of the mirror anyway
+GIT_MIRROR_FETCH_INTERVAL = 60
+GIT_MIRROR_REPOS = tuple(
+    slug.strip()
+    for slug in os.environ.get(
+        "CF_WEBSERVICES_GIT_MIRROR_REPOS",
+        "conda-forge/staged-recipes,conda-forge/feedstocks",
+    ).split(",")
+    if slug.strip()
+)
+
+
+def _repo_slug(url):
+    path = urllib.parse.urlsplit(url).path.strip("/")
+    if path.endswith(".git"):
+        path = path[: -len(".git")]
+    return "/".join(path.split("/")[-2:])
+
+
+def _last_fetch(path):
+    try:
+        return os.path.getmtime(os.path.join(path, "FETCH_HEAD"))
+    except FileNotFoundError:
+        return 0.0
+
+
+def _dir_size(path):
+    size = 0
+    for root, _, fnames in os.walk(path):
+        for fname in fnames:
+            try:
+                size += os.lstat(os.path.join(root, fname)).st_size
+            except FileNotFoundError:
+                pass
+    return size
+
+
+def _run_git(*args, cwd=None):
+    try:
+        return subprocess.run(
+            ["git", *args],
+            cwd=cwd,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+    except subprocess.CalledProcessError as e:
+        # the full command can have a token in it so we do not log it
+        raise RuntimeError(f"git {args[0]} failed: {e.stderr}") from None
+
+
+class GitMirrorCache:
+    """A directory of bare mirrors of git repositories.
+
+    Parameters
+    ----------
+    cache_dir : str
+        The directory holding the mirrors.
+    max_bytes : int
+        The disk budget for all of the mirrors.
+    repos : sequence of str
+        The repositories (as `owner/name`) to mirror.
+    """
+
+    def __init__(self, cache_dir, max_bytes, repos):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.repos = set(repos)
+        self._lock = threading.Lock()
+        self._stats = {"created": 0, "fetched": 0, "reused": 0, "evicted": 0}
+
+    def _mirror_path(self, slug):
+        return os.path.join(self.cache_dir, slug.replace("/", "__") + ".git")
+
+    def is_mirrored(self, url):
+        """Return True if clones of `url` should use a mirror."""
+        return _repo_slug(url) in self.repos
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _update(self, path, url):
+        # called with the mirror's lock held exclusively
+        if not os.path.exists(path):
+            # build the mirror next to its final location so that a failed
+            # clone never leaves a broken mirror behind
+            tmp_path = tempfile.mkdtemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                _run_git("init", "--bare", "--quiet", tmp_path)
+                # a detached gc would keep running after we release the lock
+                _run_git("config", "gc.autoDetach", "false", cwd=tmp_path)
+                self._fetch(tmp_path, url)
+                os.replace(tmp_path, path)
+            finally:
+                shutil.rmtree(tmp_path, ignore_errors=True)
+            self._count("created")
+        elif time.time() - _last_fetch(path) > GIT_MIRROR_FETCH_INTERVAL:
+            self._fetch(path, url)
+            self._count("fetched")
+        else:
+            self._count("reused")
+
+    def _fetch(self, path, url):
+        # the url can have a token in it so we pass it every time instead of
+        # storing it in the mirror's config
+        _run_git(
+            "fetch",
+            "--quiet",
+            "--prune",
+            url,
+            "+refs/heads/*:refs/heads/*",
+            cwd=path,
+        )
+
+    def _evict(self, keep):
+        """Remove the least recently used mirrors until the cache fits in the
+        disk budget. Mirrors that are in use are skipped."""
+        mirrors = []
+        for fname in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, fname)
+            if not fname.endswith(".git") or path == keep:
+                continue
+            try:
+                last_used = os.path.getmtime(path + ".lock")
+            except FileNotFoundError:
+                last_used = 0.0
+            mirrors.append((last_used, path, _dir_size(path)))
+
+        total = _dir_size(keep) + sum(size for _, _, size in mirrors)
+        for _, path, size in sorted(mirrors):
+            if total <= self.max_bytes:
+                break
+            fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                self._count("evicted")
+                LOGGER.info("    evicted git mirror %s", os.path.basename(path))
+            finally:
+                os.close(fd)
+
+    def _is_fresh(self, path):
+        return (
+            os.path.exists(path)
+            and time.time() - _last_fetch(path) <= GIT_MIRROR_FETCH_INTERVAL
+        )
+
+    def _lock_shared(self, fd, path):
+        # flock does not convert locks atomically, so the mirror can be
+        # evicted while we wait for the shared lock
+        fcntl.flock(fd, fcntl.LOCK_SH)
+        if not os.path.exists(path):
+            raise RuntimeError("the mirror was evicted")
+
+    @contextlib.contextmanager
+    def mirror(self, url):
+        """Get an up-to-date mirror of `url` to use as a `--reference`.
+
+        The mirror stays locked against fetches and eviction until the context
+        exits, so the clone that references it must be removed by then.
+
+        Yields the path to the mirror or None if `url` is not mirrored or the
+        mirror could not be updated. Callers should then clone as usual.
+        """
+        if not self.is_mirrored(url):
+            yield None
+            return
+
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+        path = self._mirror_path(_repo_slug(url))
+        fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            t0 = time.time()
+            fcntl.flock(fd, fcntl.LOCK_SH)
+            try:
+                if self._is_fresh(path):
+                    self._count("reused")
+                    os.utime(path + ".lock")
+                else:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        if not os.path.exists(path):
+                            # there is nothing to fall back to so we wait
+                            fcntl.flock(fd, fcntl.LOCK_EX)
+                            self._update(path, url)
+                            os.utime(path + ".lock")
+                            self._evict(keep=path)
+                        else:
+                            self._count("reused")
+                    else:
+                        self._update(path, url)
+                        os.utime(path + ".lock")
+                        self._evict(keep=path)
+                    self._lock_shared(fd, path)
+            except Exception as e:
+                LOGGER.warning(
+                    "    could not update git mirror for %s: %r", _repo_slug(url), e
+                )
+                path = None
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                LOGGER.info(
+                    "    git mirror for %s ready: %s",
+                    _repo_slug(url),
+                    time.time() - t0,
+                )
+            yield path
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def stats(self):
+        """Return the cache metrics of this process."""
+        with self._lock:
+            return dict(self._stats)
+
+
+GIT_MIRRORS = GitMirrorCache(GIT_MIRROR_DIR, GIT_MIRROR_MAX_BYTES, GIT_MIRROR_REPOS)
+
+
+def git_mirror(url):
+    """Get a local mirror of `url` to use as a `--reference` for clones.
+
+    This is a context manager that yields the path to the mirror or None if
+    `url` is not mirrored.
+    """
+    return GIT_MIRRORS.mirror(url)
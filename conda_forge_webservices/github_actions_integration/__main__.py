@@ -8,6 +8,7 @@ import tempfile
 import traceback
 
 import click
+import conda_smithy
 from conda_forge_feedstock_ops import setup_logging
 from conda_forge_feedstock_ops.lint import lint as lint_feedstock
 from git import Repo
@@ -30,6 +31,10 @@ from .linting import (
     get_recipes_for_linting,
 )
 from .version_updating import update_version, update_pr_title
+from conda_forge_webservices.lint_cache import (
+    cache_feedstock_lint,
+    get_cached_feedstock_lint,
+)
 from conda_forge_webservices.commands import (
     set_rerender_pr_status,
     set_version_update_pr_status,
@@ -155,23 +160,36 @@ def main_run_task(
             task_data["task_results"]["commit_message"] = None
 
     elif task == "lint":
-        _pull_docker_image()
-        try:
-            res = lint_feedstock(feedstock_dir, use_container=True)
-            if len(res) == 2:
-                lints, hints = res
-                all_keys = set(lints.keys()) | set(hints.keys())
-                errors = {key: False for key in all_keys}
-            else:
-                lints, hints, errors = res
+        # the workflow runs at the ref the container was built from, so the
+        # container lints with the conda-smithy installed here
+        linter_version = f"conda-smithy {conda_smithy.__version__}"
+        cached = get_cached_feedstock_lint(feedstock_dir, linter_version)
+        if cached is not None:
+            LOGGER.info("using cached lint results")
+            lints, hints, errors = cached
             lint_error = False
-        except Exception as err:
-            LOGGER.warning("LINTING ERROR: %r", err)
-            LOGGER.warning("LINTING ERROR TRACEBACK: %s", traceback.format_exc())
-            lint_error = True
-            lints = None
-            hints = None
-            errors = None
+        else:
+            _pull_docker_image()
+            try:
+                res = lint_feedstock(feedstock_dir, use_container=True)
+                if len(res) == 2:
+                    lints, hints = res
+                    all_keys = set(lints.keys()) | set(hints.keys())
+                    errors = {key: False for key in all_keys}
+                else:
+                    lints, hints, errors = res
+                lint_error = False
+            except Exception as err:
+                LOGGER.warning("LINTING ERROR: %r", err)
+                LOGGER.warning("LINTING ERROR TRACEBACK: %s", traceback.format_exc())
+                lint_error = True
+                lints = None
+                hints = None
+                errors = None
+            else:
+                cache_feedstock_lint(
+                    feedstock_dir, linter_version, lints, hints, errors
+                )
 
         task_data["task_results"]["lint_error"] = lint_error
         task_data["task_results"]["lints"] = lints
@@ -5,6 +5,12 @@ import github
 import requests
 import urllib3.util.retry
 
+from conda_forge_webservices.http_cache import cache_session
+from conda_forge_webservices.rate_limits import (
+    make_tracked_github_client,
+    track_session,
+)
+
 
 def create_api_sessions():
     """Create API sessions for GitHub.
@@ -59,9 +65,11 @@ def _create_api_sessions(github_token):
             raise e
 
     sess.hooks["response"].append(raise_for_status)
+    cache_session(sess)
+    track_session(sess)
 
     # build a github object too
-    gh = github.Github(
+    gh = make_tracked_github_client(
         auth=github.Auth.Token(github_token),
         retry=urllib3.util.retry.Retry(total=10, backoff_factor=0.1),
     )
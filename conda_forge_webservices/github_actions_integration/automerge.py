@@ -13,6 +13,8 @@ from typing import TYPE_CHECKING
 from github import GithubException
 from ruamel.yaml import YAML
 
+from conda_forge_webservices.rate_limits import attribute_rate_limit_usage
+
 if TYPE_CHECKING:
     from github.PullRequest import PullRequest
     from github.Repository import Repository
@@ -546,6 +548,7 @@ def _automerge_pr(
         return True, "all is well :)"
 
 
+@attribute_rate_limit_usage("automerge")
 def automerge_pr(
     repo: Repository, pr: PullRequest, pr_for_admin: PullRequest
 ) -> tuple[bool, str | None]:
@@ -0,0 +1,316 @@
+"""
+This module implements a conditional request cache for the GitHub REST API.
+
+GitHub does not count requests answered with a `304 Not Modified` against our
+rate limits. The `ConditionalRequestAdapter` remembers the `ETag` and
+`Last-Modified` validators of GET responses, sends them back as
+`If-None-Match` / `If-Modified-Since` and, when GitHub answers with a 304,
+hands the cached response to the caller instead. The adapter is mounted on the
+shared `requests` sessions and the session inside of PyGithub's requester, so
+neither PyGithub nor our own code needs to know about it.
+
+Entries are kept in an LRU cache in memory that is bounded by the total size
+of the response bodies and, if `CF_WEBSERVICES_HTTP_CACHE_DIR` is set, on disk
+as JSON so that they are shared between processes and survive restarts.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import cachetools
+import requests
+import requests.adapters
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from conda_forge_webservices.utils import credential_id
+
+LOGGER = logging.getLogger("conda_forge_webservices.http_cache")
+
+HTTP_CACHE_MAX_BYTES = int(
+    os.environ.get("CF_WEBSERVICES_HTTP_CACHE_MAX_BYTES", str(64 * 1024**2))
+)
+# large bodies (e.g., release artifacts) are not worth keeping in memory
+HTTP_CACHE_MAX_ENTRY_SIZE = 1024 * 1024
+HTTP_CACHE_DIR = os.environ.get("CF_WEBSERVICES_HTTP_CACHE_DIR", None)
+# this header is added to responses that were served from the cache
+HTTP_CACHE_HIT_HEADER = "X-Conditional-Cache"
+# request headers that change the response besides the credentials
+_VARY_HEADERS = ("Accept", "Accept-Encoding", "X-GitHub-Api-Version")
+
+
+def _entry_size(entry):
+    return len(entry["content"])
+
+
+class _LRUCacheWithEviction(cachetools.LRUCache):
+    def __init__(self, maxsize, on_evict):
+        super().__init__(maxsize, getsizeof=_entry_size)
+        self._on_evict = on_evict
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._on_evict(key)
+        return key, value
+
+
+class ConditionalRequestCache:
+    """LRU cache of GET responses with their validators.
+
+    Parameters
+    ----------
+    max_bytes : int
+        The maximum total size of the response bodies to keep in memory. When
+        the cache is made, the entry files on disk are pruned to this size too.
+    cache_dir : str, optional
+        If given, entries are also stored in this directory.
+    """
+
+    def __init__(self, max_bytes, cache_dir=None):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._entries = _LRUCacheWithEviction(max_bytes, self._evict)
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "revalidated": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            self._prune_disk(max_bytes)
+
+    @staticmethod
+    def make_key(request):
+        """Make the cache key for a `requests.PreparedRequest`.
+
+        Responses differ per credential so the key includes them. Tokens that
+        are labeled with a role share their entries, which keeps the cache warm
+        across app token refreshes.
+        """
+        parts = [
+            request.method,
+            request.url,
+            credential_id(request.headers.get("Authorization")),
+        ] + [request.headers.get(h, "") for h in _VARY_HEADERS]
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def _prune_disk(self, max_bytes):
+        paths = [
+            os.path.join(self.cache_dir, fname)
+            for fname in os.listdir(self.cache_dir)
+            if fname.endswith(".json")
+        ]
+        paths.sort(key=os.path.getmtime, reverse=True)
+        total = 0
+        for path in paths:
+            try:
+                total += os.path.getsize(path)
+                if total > max_bytes:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _read_from_disk(self, key):
+        # the entries are plain data so that a shared or pre-existing cache
+        # directory can never make us run code
+        with open(self._path(key)) as fp:
+            data = json.load(fp)
+        return {
+            "etag": data["etag"],
+            "last_modified": data["last_modified"],
+            "headers": dict(data["headers"]),
+            "content": base64.b64decode(data["content"]),
+            "stored_at": float(data["stored_at"]),
+        }
+
+    def _write_to_disk(self, key, entry):
+        path = self._path(key)
+        tmp_path = path + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as fp:
+            json.dump(
+                {**entry, "content": base64.b64encode(entry["content"]).decode()},
+                fp,
+            )
+        os.replace(tmp_path, path)
+
+    def _evict(self, key):
+        # called with the lock held
+        self._stats["evictions"] += 1
+        self._remove_from_disk(key)
+
+    def _remove_from_disk(self, key):
+        if self.cache_dir is not None:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def get(self, key):
+        """Get the cached entry for `key` or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None and self.cache_dir is not None:
+            try:
+                entry = self._read_from_disk(key)
+            except Exception:
+                entry = None
+            else:
+                if _entry_size(entry) <= self._entries.maxsize:
+                    with self._lock:
+                        self._entries[key] = entry
+        return entry
+
+    def put(self, key, entry):
+        """Store `entry` under `key`."""
+        if _entry_size(entry) > self._entries.maxsize:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._stats["stores"] += 1
+        if self.cache_dir is not None:
+            try:
+                self._write_to_disk(key, entry)
+            except Exception as e:
+                LOGGER.warning(f"could not write http cache entry to disk: {e!r}")
+
+    def count(self, stat):
+        """Increment the metric `stat`."""
+        with self._lock:
+            self._stats[stat] += 1
+
+    def clear(self):
+        """Remove all of the entries."""
+        with self._lock:
+            for key in list(self._entries.keys()):
+                self._remove_from_disk(key)
+            self._entries.clear()
+
+    def stats(self):
+        """Return a JSON-serializable snapshot of the cache metrics."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+            stats["bytes"] = self._entries.currsize
+            stats["max_bytes"] = self._entries.maxsize
+        lookups = stats["hits"] + stats["misses"] + stats["revalidated"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+HTTP_CACHE = ConditionalRequestCache(HTTP_CACHE_MAX_BYTES, cache_dir=HTTP_CACHE_DIR)
+
+
+class ConditionalRequestAdapter(requests.adapters.HTTPAdapter):
+    """A transport adapter that makes GET requests conditional on the cached
+    response's validators.
+
+    Parameters
+    ----------
+    cache : ConditionalRequestCache
+        The cache to use.
+    **kwargs
+        Passed on to `requests.adapters.HTTPAdapter`.
+    """
+
+    def __init__(self, cache, **kwargs):
+        self.cache = cache
+        super().__init__(**kwargs)
+
+    def send(self, request, stream=False, **kwargs):
+        if (
+            request.method != "GET"
+            or stream
+            or "If-None-Match" in request.headers
+            or "If-Modified-Since" in request.headers
+        ):
+            return super().send(request, stream=stream, **kwargs)
+
+        key = self.cache.make_key(request)
+        entry = self.cache.get(key)
+        if entry is not None:
+            if entry["etag"] is not None:
+                request.headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"] is not None:
+                request.headers["If-Modified-Since"] = entry["last_modified"]
+
+        resp = super().send(request, stream=stream, **kwargs)
+
+        if entry is not None and resp.status_code == 304:
+            self.cache.count("hits")
+            return self._build_cached_response(request, resp, entry)
+
+        self.cache.count("misses" if entry is None else "revalidated")
+        if resp.status_code == 200:
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+            if (etag is not None or last_modified is not None) and len(
+                resp.content
+            ) <= HTTP_CACHE_MAX_ENTRY_SIZE:
+                self.cache.put(
+                    key,
+                    {
+                        "etag": etag,
+                        "last_modified": last_modified,
+                        "headers": dict(resp.headers),
+                        "content": resp.content,
+                        "stored_at": time.time(),
+                    },
+                )
+        return resp
+
+    def _build_cached_response(self, request, not_modified, entry):
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.reason = "OK"
+        resp.headers = CaseInsensitiveDict(entry["headers"])
+        # the 304 has the current rate limits, date, etc.
+        resp.headers.update(not_modified.headers)
+        resp.headers[HTTP_CACHE_HIT_HEADER] = "hit"
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp._content = entry["content"]
+        resp.url = not_modified.url
+        resp.request = request
+        resp.connection = self
+        resp.elapsed = not_modified.elapsed
+        not_modified.close()
+        return resp
+
+
+def cache_session(sess, cache=None):
+    """Mount a `ConditionalRequestAdapter` for `https://` on `sess`.
+
+    The adapter keeps the retry and pool settings of the adapter it replaces.
+    """
+    cache = cache or HTTP_CACHE
+    old = sess.get_adapter("https://")
+    if isinstance(old, ConditionalRequestAdapter):
+        return sess
+
+    sess.mount(
+        "https://",
+        ConditionalRequestAdapter(
+            cache,
+            max_retries=old.max_retries,
+            pool_connections=old._pool_connections,
+            pool_maxsize=old._pool_maxsize,
+            pool_block=old._pool_block,
+        ),
+    )
+    old.close()
+    return sess
+
+
+def get_http_cache_stats():
+    """Get the hit/miss metrics of the conditional request cache."""
+    return HTTP_CACHE.stats()
@@ -0,0 +1,245 @@
+"""
+This module caches lint results by the content of the recipes.
+
+A recipe is only linted again if the files in its directory, the version of
+the linter or the context it is linted in (the feedstock's `conda-forge.yml`
+and the staged-recipes PR) change. Pushes that touch one recipe of a PR and
+merge queue runs after a PR was linted are then answered from the cache.
+
+Some lints look things up on GitHub or anaconda.org, so entries expire after
+`LINT_CACHE_TTL` seconds. Entries are JSON files in `LINT_CACHE_DIR` so that
+they are shared between processes. The GitHub Actions lint task restores and
+saves `LINT_CACHE_DIR` between runs with `actions/cache`, keyed on the version
+of conda-smithy.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import stat
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+LOGGER = logging.getLogger("conda_forge_webservices.lint_cache")
+
+LINT_CACHE_DIR = os.environ.get(
+    "CF_WEBSERVICES_LINT_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), f"cf-webservices-lint-cache-{os.getuid()}"),
+)
+LINT_CACHE_MAXSIZE = int(os.environ.get("CF_WEBSERVICES_LINT_CACHE_MAXSIZE", "4096"))
+LINT_CACHE_TTL = int(os.environ.get("CF_WEBSERVICES_LINT_CACHE_TTL", str(24 * 60 * 60)))
+# the disk is pruned down to LINT_CACHE_MAXSIZE entries after this many stores
+LINT_CACHE_PRUNE_INTERVAL = 64
+RECIPE_FILENAMES = ("meta.yaml", "recipe.yaml")
+
+
+def hash_recipe_dir(recipe_dir):
+    """Hash the names, modes and contents of all of the files in a directory."""
+    recipe_dir = str(recipe_dir)
+    hsh = hashlib.sha256()
+    for root, dirs, fnames in os.walk(recipe_dir):
+        dirs.sort()
+        for fname in sorted(fnames):
+            path = os.path.join(root, fname)
+            rel_path = os.path.relpath(path, recipe_dir).replace(os.sep, "/")
+            st = os.lstat(path)
+            if stat.S_ISLNK(st.st_mode):
+                kind, data = "link", os.readlink(path).encode()
+            else:
+                kind = "exec" if st.st_mode & stat.S_IXUSR else "file"
+                with open(path, "rb") as fp:
+                    data = fp.read()
+            hsh.update(f"{kind} {rel_path} {len(data)}\n".encode())
+            hsh.update(data)
+    return hsh.hexdigest()
+
+
+def lint_context(root_dir):
+    """Get what besides the recipe itself changes the lint results for the
+    recipes in `root_dir`."""
+    cf_yml = os.path.join(str(root_dir), "conda-forge.yml")
+    if os.path.exists(cf_yml):
+        with open(cf_yml, "rb") as fp:
+            cf_yml_hash = hashlib.sha256(fp.read()).hexdigest()
+    else:
+        cf_yml_hash = None
+    return {
+        "conda-forge.yml": cf_yml_hash,
+        "STAGED_RECIPES_PR_NUMBER": os.environ.get("STAGED_RECIPES_PR_NUMBER"),
+    }
+
+
+def find_recipe_files(root_dir):
+    """Find the recipes in `root_dir` as paths relative to it."""
+    root_dir = Path(root_dir)
+    return sorted(
+        str(path.relative_to(root_dir))
+        for fname in RECIPE_FILENAMES
+        for path in root_dir.rglob(fname)
+        if ".git" not in path.relative_to(root_dir).parts
+    )
+
+
+class LintResultCache:
+    """A content-addressed cache of the lints and hints of recipes.
+
+    Parameters
+    ----------
+    cache_dir : str
+        The directory holding the entries.
+    maxsize : int
+        The maximum number of entries to keep.
+    ttl : float
+        The number of seconds entries are valid for.
+    """
+
+    def __init__(self, cache_dir, maxsize, ttl):
+        self.cache_dir = cache_dir
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0}
+
+    @staticmethod
+    def make_key(root_dir, recipe, linter_version, context=None):
+        """Make the cache key for a recipe.
+
+        Parameters
+        ----------
+        root_dir : str or Path
+            The directory holding the recipes (e.g., the feedstock).
+        recipe : str or Path
+            The recipe file, relative to `root_dir`.
+        linter_version : str
+            The version of the linter.
+        context : dict, optional
+            The output of `lint_context` for `root_dir`.
+        """
+        recipe = str(recipe)
+        parts = {
+            "recipe": recipe.replace(os.sep, "/"),
+            "tree": hash_recipe_dir(
+                os.path.dirname(os.path.join(str(root_dir), recipe))
+            ),
+            "linter_version": linter_version,
+            "context": context if context is not None else lint_context(root_dir),
+        }
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def get(self, key):
+        """Get the result stored under `key` or None."""
+        try:
+            with open(self._path(key)) as fp:
+                entry = json.load(fp)
+        except Exception:
+            entry = None
+        if entry is None or time.time() - entry["stored_at"] > self.ttl:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return entry["result"]
+
+    def put(self, key, result):
+        """Store `result`, which must be JSON-serializable, under `key`."""
+        path = self._path(key)
+        tmp_path = path + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as fp:
+                json.dump({"stored_at": time.time(), "result": result}, fp)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            LOGGER.warning(f"could not write lint cache entry: {e!r}")
+            return
+
+        with self._lock:
+            self._stats["stores"] += 1
+            prune = self._stats["stores"] % LINT_CACHE_PRUNE_INTERVAL == 0
+        if prune:
+            self.prune()
+
+    def prune(self):
+        """Remove expired entries and the oldest ones beyond `maxsize`."""
+        try:
+            paths = [
+                os.path.join(self.cache_dir, fname)
+                for fname in os.listdir(self.cache_dir)
+                if fname.endswith(".json")
+            ]
+        except FileNotFoundError:
+            return
+        mtimes = {}
+        for path in paths:
+            try:
+                mtimes[path] = os.path.getmtime(path)
+            except FileNotFoundError:
+                pass
+        now = time.time()
+        paths = sorted(mtimes, key=mtimes.get, reverse=True)
+        for i, path in enumerate(paths):
+            if i >= self.maxsize or now - mtimes[path] > self.ttl:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def stats(self):
+        """Return the cache metrics of this process."""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+LINT_CACHE = LintResultCache(LINT_CACHE_DIR, LINT_CACHE_MAXSIZE, LINT_CACHE_TTL)
+
+
+def get_cached_feedstock_lint(feedstock_dir, linter_version):
+    """Get the lint results for all of the recipes in a feedstock from the
+    cache.
+
+    Returns the lints, hints and errors keyed by recipe like
+    `conda_forge_feedstock_ops.lint.lint` or None unless every recipe is
+    in the cache.
+    """
+    recipes = find_recipe_files(feedstock_dir)
+    if not recipes:
+        return None
+
+    context = lint_context(feedstock_dir)
+    lints, hints, errors = {}, {}, {}
+    for recipe in recipes:
+        result = LINT_CACHE.get(
+            LINT_CACHE.make_key(feedstock_dir, recipe, linter_version, context)
+        )
+        if result is None:
+            return None
+        lints[recipe] = result["lints"]
+        hints[recipe] = result["hints"]
+        errors[recipe] = False
+    return lints, hints, errors
+
+
+def cache_feedstock_lint(feedstock_dir, linter_version, lints, hints, errors):
+    """Store the lint results of the recipes in a feedstock that were linted
+    without errors."""
+    context = lint_context(feedstock_dir)
+    for recipe in find_recipe_files(feedstock_dir):
+        if recipe not in lints or errors.get(recipe, True):
+            continue
+        LINT_CACHE.put(
+            LINT_CACHE.make_key(feedstock_dir, recipe, linter_version, context),
+            {"lints": lints[recipe], "hints": hints.get(recipe, [])},
+        )
@@ -1,14 +1,25 @@
+import concurrent.futures
+import contextlib
+import multiprocessing
 import os
+import signal
 import textwrap
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
 from tempfile import TemporaryDirectory
 import logging
 from pathlib import Path
-from typing import TypedDict
+from typing import Any, TypedDict
 import uuid
 
-from git import GitCommandError, Repo
+from git import GitCommandError, Reference, Repo
 import conda_smithy.lint_recipe
 
+from conda_forge_webservices.git_mirrors import git_mirror
+from conda_forge_webservices.lint_cache import LINT_CACHE, lint_context
+from conda_forge_webservices.rate_limits import attribute_rate_limit_usage
 from conda_forge_webservices.tokens import get_gh_client
 from conda_forge_webservices.utils import (
     get_pr_is_mergeable,
@@ -25,6 +36,30 @@ SKIP_MSGS = [
     "[skip lint]",
 ]
 LINT_VIA_GHA = True
+# clone PRs without blobs and only check out the recipes that are linted
+LINT_PARTIAL_CLONE = (
+    os.environ.get("CF_WEBSERVICES_LINT_PARTIAL_CLONE", "true").lower() == "true"
+)
+RECIPE_FILENAMES = ("meta.yaml", "recipe.yaml")
+# the recipes of a PR are linted in parallel and each one gets this many
+# seconds before we give up on it
+LINT_MAX_WORKERS = int(os.environ.get("CF_WEBSERVICES_LINT_MAX_WORKERS", "4"))
+LINT_RECIPE_TIMEOUT = int(os.environ.get("CF_WEBSERVICES_LINT_RECIPE_TIMEOUT", "300"))
+LINT_FAILURE_MESSAGE = (
+    "Failed to even lint the recipe, probably because "
+    "of a conda-smithy bug :cry:. "
+    "This likely indicates a problem in your `meta.yaml`, though. "
+    "To get a traceback to help figure out what's going on, "
+    "install conda-smithy "
+    "and run `conda smithy recipe-lint .` from the recipe directory. "
+)
+# the lint workers are started from a fork server since forking the
+# webservices processes, which run threads, is not safe; it is set up on
+# first use so that importing this module does not configure multiprocessing
+_LINT_MP_CONTEXT: Any = None
+_LINT_MP_CONTEXT_LOCK = threading.Lock()
+# the environment variables the linter reads that are set up for each PR
+LINT_WORKER_ENV_VARS = ("STAGED_RECIPES_PR_NUMBER",)
 
 
 class LintInfo(TypedDict):
@@ -33,6 +68,7 @@ class LintInfo(TypedDict):
     sha: str
 
 
+@attribute_rate_limit_usage("linting")
 def lint_via_github_actions(
     full_name: str, pr_num: int, sha: str | None = None
 ) -> bool:
@@ -101,6 +137,283 @@ def find_recipes(path: Path) -> list[Path]:
     return [x for x in (list(meta_yamls) + list(recipe_yamls))]
 
 
+def clone_pr_for_linting(
+    clone_url: str,
+    path: str,
+    pr_id: int,
+    partial_clone: bool | None = None,
+    reference: str | None = None,
+) -> tuple[Repo, Reference, Reference | None]:
+    """
+    Clone a repo and fetch the `head` and `merge` refs of one of its PRs.
+
+    With a partial clone only commits and trees are fetched. File contents
+    are fetched on checkout for the paths that are checked out. If
+    `reference` is given, the clone borrows the objects of that local mirror
+    instead and only fetches the ones the mirror does not have.
+
+    Returns the repo and the `head` and `merge` refs. The `merge` ref is None
+    if it does not exist (e.g., the PR has a merge conflict).
+    """
+    if partial_clone is None:
+        partial_clone = LINT_PARTIAL_CLONE
+
+    if reference is not None:
+        repo = Repo.clone_from(clone_url, path, reference=reference, no_checkout=True)
+        fetch_kwargs: dict[str, Any] = {}
+    elif partial_clone:
+        repo = Repo.clone_from(
+            clone_url, path, depth=1, filter="blob:none", no_checkout=True
+        )
+        # we need the parents of the merge commit to find the base
+        fetch_kwargs = {"depth": 2}
+    else:
+        repo = Repo.clone_from(clone_url, path, depth=1)
+        fetch_kwargs = {}
+
+    # Retrieve the PR refs.
+    try:
+        repo.remotes.origin.fetch(
+            [
+                f"pull/{pr_id}/head:pull/{pr_id}/head",
+                f"pull/{pr_id}/merge:pull/{pr_id}/merge",
+            ],
+            **fetch_kwargs,
+        )
+        ref_merge = repo.refs[f"pull/{pr_id}/merge"]
+    except GitCommandError:
+        # Either `merge` doesn't exist because the PR was opened
+        # in conflict or it is closed and it can't be the latter.
+        repo.remotes.origin.fetch(
+            [f"pull/{pr_id}/head:pull/{pr_id}/head"], **fetch_kwargs
+        )
+        ref_merge = None
+    ref_head = repo.refs[f"pull/{pr_id}/head"]
+
+    return repo, ref_head, ref_merge
+
+
+def _list_recipe_paths(repo: Repo, rev: str) -> set[str]:
+    # only needs the trees so no file contents are fetched
+    return {
+        fname
+        for fname in repo.git.ls_tree("-r", "--name-only", rev).splitlines()
+        if os.path.basename(fname) in RECIPE_FILENAMES
+    }
+
+
+def _is_partial_or_mirrored(repo: Repo) -> bool:
+    return repo.config_reader().has_option(
+        'remote "origin"', "promisor"
+    ) or os.path.exists(os.path.join(repo.git_dir, "objects", "info", "alternates"))
+
+
+def checkout_pr_for_linting(
+    repo: Repo,
+    ref_head: Reference,
+    ref_merge: Reference | None,
+    pr_id: int,
+    ignore_base: bool = False,
+) -> list[Path]:
+    """
+    Check out the merged PR from a clone made with `clone_pr_for_linting`.
+
+    If `ignore_base` is True, the recipes in the base branch are returned so
+    that they are not linted. If the repo is a partial clone or borrows its
+    objects from a mirror, only the directories of the other recipes are
+    checked out.
+    """
+    assert ref_merge is not None, f"PR {pr_id} has no merge ref"
+    repo_dir = Path(repo.working_dir)
+
+    base_recipes = []
+    if ignore_base:
+        num_parents = len(ref_merge.commit.parents)
+        assert num_parents == 2, textwrap.dedent(
+            f"""
+               Expected merging our PR with the base branch would have two parents.
+               Instead there were {num_parents} parents found. :/
+               """
+        )
+        base_commit = (set(ref_merge.commit.parents) - {ref_head.commit}).pop()
+        if _is_partial_or_mirrored(repo):
+            base_paths = _list_recipe_paths(repo, base_commit.hexsha)
+            pr_paths = _list_recipe_paths(repo, ref_merge.commit.hexsha) - base_paths
+            recipe_dirs = sorted({os.path.dirname(fname) for fname in pr_paths} - {""})
+            # top-level files (e.g., conda-forge.yml) are always checked out
+            repo.git.sparse_checkout("set", "--cone", *recipe_dirs)
+            base_recipes = [repo_dir / fname for fname in sorted(base_paths)]
+        else:
+            ref_base = repo.create_head(f"pull/{pr_id}/base", base_commit)
+            ref_base.checkout(force=True)
+            base_recipes = find_recipes(repo_dir)
+
+    # Get the list of recipes and prep for linting.
+    ref_merge.checkout(force=True)
+
+    return base_recipes
+
+
+class _LintTimeoutError(Exception):
+    pass
+
+
+def _raise_lint_timeout(signum, frame):
+    raise _LintTimeoutError()
+
+
+def _init_lint_worker(env: dict[str, str | None], pids: Any) -> None:
+    for name, value in env.items():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
+    pids.put(os.getpid())
+
+
+def _lint_mp_context() -> Any:
+    global _LINT_MP_CONTEXT
+    with _LINT_MP_CONTEXT_LOCK:
+        if _LINT_MP_CONTEXT is None:
+            ctx = multiprocessing.get_context("forkserver")
+            ctx.set_forkserver_preload(["conda_forge_webservices.linting"])
+            _LINT_MP_CONTEXT = ctx
+        return _LINT_MP_CONTEXT
+
+
+def _make_lint_pool(max_workers: int) -> tuple[ProcessPoolExecutor, Any]:
+    """
+    Make a pool of lint workers with the linter environment of this process.
+
+    The workers do not inherit the environment from this process so it is
+    passed to them explicitly. Each worker puts its pid on the returned queue
+    when it starts.
+    """
+    mp_context = _lint_mp_context()
+    pids = mp_context.SimpleQueue()
+    pool = ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=mp_context,
+        initializer=_init_lint_worker,
+        initargs=({name: os.environ.get(name) for name in LINT_WORKER_ENV_VARS}, pids),
+    )
+    return pool, pids
+
+
+def _lint_recipe(recipe_dir: str, timeout: int) -> tuple[list, list, str | None, float]:
+    """
+    Lint a single recipe in a worker process.
+
+    Returns the lints, the hints, the traceback if linting failed and the
+    time it took.
+    """
+    t0 = time.time()
+    # tasks run in the main thread of the worker so we can use an alarm
+    signal.signal(signal.SIGALRM, _raise_lint_timeout)
+    signal.alarm(timeout)
+    try:
+        lints, hints = conda_smithy.lint_recipe.main(
+            recipe_dir, conda_forge=True, return_hints=True
+        )
+        error = None
+    except _LintTimeoutError:
+        lints, hints = [_lint_timeout_message(timeout)], []
+        error = None
+    except Exception:
+        lints, hints = [LINT_FAILURE_MESSAGE], []
+        error = traceback.format_exc()
+    finally:
+        signal.alarm(0)
+
+    return lints, hints, error, time.time() - t0
+
+
+def _lint_timeout_message(timeout: int) -> str:
+    return (
+        f"Linting the recipe did not finish within {timeout} seconds. "
+        "Please ping the 'conda-forge/core' team (using the `@` notation in "
+        "a comment) if you believe this is a bug."
+    )
+
+
+def _lint_recipes(all_recipe_dir: Path, recipes: list[Path]) -> list[tuple[list, list]]:
+    """
+    Lint the recipes concurrently and return their lints and hints in the
+    same order as `recipes`.
+
+    Recipes whose results are in the lint cache are not linted again.
+    """
+    linter_version = f"conda-smithy {conda_smithy.__version__}"
+    context = lint_context(all_recipe_dir)
+    keys = [
+        LINT_CACHE.make_key(
+            all_recipe_dir, recipe.relative_to(all_recipe_dir), linter_version, context
+        )
+        for recipe in recipes
+    ]
+    results: dict[int, tuple[list, list]] = {}
+    for i, (recipe, key) in enumerate(zip(recipes, keys)):
+        cached = LINT_CACHE.get(key)
+        if cached is not None:
+            LOGGER.info("    lint %s: cached", recipe)
+            results[i] = (cached["lints"], cached["hints"])
+
+    to_lint = [i for i in range(len(recipes)) if i not in results]
+    if not to_lint:
+        return [results[i] for i in range(len(recipes))]
+
+    # the pool is made for each PR so that the workers see the environment
+    # (e.g., STAGED_RECIPES_PR_NUMBER) set up for it
+    max_workers = min(LINT_MAX_WORKERS, len(to_lint))
+    pool, pids = _make_lint_pool(max_workers)
+    futures = {}
+    try:
+        futures = {
+            i: pool.submit(_lint_recipe, str(recipes[i].parent), LINT_RECIPE_TIMEOUT)
+            for i in to_lint
+        }
+        # the workers time out on their own, this only catches workers that
+        # are stuck where the alarm cannot interrupt them
+        num_rounds = -(-len(to_lint) // max_workers)
+        concurrent.futures.wait(
+            futures.values(), timeout=num_rounds * LINT_RECIPE_TIMEOUT + 60
+        )
+
+        for i, fut in futures.items():
+            if not fut.done():
+                LOGGER.warning("    lint %s: timed out", recipes[i])
+                results[i] = ([_lint_timeout_message(LINT_RECIPE_TIMEOUT)], [])
+                continue
+
+            try:
+                lints, hints, error, elapsed = fut.result()
+            except Exception as err:
+                lints, hints, error, elapsed = (
+                    [LINT_FAILURE_MESSAGE],
+                    [],
+                    repr(err),
+                    float("nan"),
+                )
+            if error is not None:
+                LOGGER.warning("LINTING ERROR TRACEBACK: %s", error)
+            elif elapsed < LINT_RECIPE_TIMEOUT:
+                # failures and timeouts are not cached
+                LINT_CACHE.put(keys[i], {"lints": lints, "hints": hints})
+            LOGGER.info("    lint %s: %s", recipes[i], elapsed)
+            results[i] = (lints, hints)
+    finally:
+        if not all(fut.done() for fut in futures.values()):
+            # there is no API to stop a running task so we stop the workers
+            # with the pids they reported when they started
+            while not pids.empty():
+                with contextlib.suppress(ProcessLookupError):
+                    os.kill(pids.get(), signal.SIGTERM)
+        pool.shutdown(wait=False, cancel_futures=True)
+        pids.close()
+
+    return [results[i] for i in range(len(recipes))]
+
+
 def lint_all_recipes(all_recipe_dir: Path, base_recipes: list[Path]) -> tuple[str, str]:
     """
     Lint all recipes in the given directory.
@@ -108,7 +421,6 @@ def lint_all_recipes(all_recipe_dir: Path, base_recipes: list[Path]) -> tuple[st
     recipes = find_recipes(all_recipe_dir)
     all_pass = True
     messages = []
-    hints = []
     hints_found = False
 
     # Exclude some things from our list of recipes.
@@ -116,29 +428,12 @@ def lint_all_recipes(all_recipe_dir: Path, base_recipes: list[Path]) -> tuple[st
     pr_recipes = sorted(set(recipes) - set(base_recipes))
 
     rel_pr_recipes = []
-    for recipe in pr_recipes:
-        recipe_dir = recipe.parent
+    for recipe, (lints, hints) in zip(
+        pr_recipes, _lint_recipes(all_recipe_dir, pr_recipes)
+    ):
         rel_path = recipe.relative_to(all_recipe_dir)
         rel_pr_recipes.append(rel_path)
 
-        try:
-            lints, hints = conda_smithy.lint_recipe.main(
-                str(recipe_dir), conda_forge=True, return_hints=True
-            )
-
-        except Exception as err:
-            import traceback
-
-            LOGGER.warning("LINTING ERROR: %r", err)
-            LOGGER.warning("LINTING ERROR TRACEBACK: %s", traceback.format_exc())
-            lints = [
-                "Failed to even lint the recipe, probably because "
-                "of a conda-smithy bug :cry:. "
-                "This likely indicates a problem in your `meta.yaml`, though. "
-                "To get a traceback to help figure out what's going on, "
-                "install conda-smithy "
-                "and run `conda smithy recipe-lint .` from the recipe directory. "
-            ]
         if lints:
             all_pass = False
             messages.append(
@@ -226,6 +521,7 @@ def _set_pr_status(
     )
 
 
+@attribute_rate_limit_usage("linting")
 def compute_lint_message(
     repo_owner: str,
     repo_name: str,
@@ -238,6 +534,7 @@ def compute_lint_message(
     owner = gh.get_user(repo_owner)
     remote_repo = owner.get_repo(repo_name)
     mergeable = get_pr_is_mergeable(remote_repo, pr_id)
+    mirrors = contextlib.ExitStack()
     tmp_dir = TemporaryDirectory(suffix="_recipe")
 
     try:
@@ -245,23 +542,10 @@ def compute_lint_message(
         if pr_id is not None and repo_name == "staged-recipes":
             os.environ["STAGED_RECIPES_PR_NUMBER"] = str(pr_id)
 
-        repo = Repo.clone_from(remote_repo.clone_url, tmp_dir.name, depth=1)
-
-        # Retrieve the PR refs.
-        try:
-            repo.remotes.origin.fetch(
-                [
-                    f"pull/{pr_id}/head:pull/{pr_id}/head",
-                    f"pull/{pr_id}/merge:pull/{pr_id}/merge",
-                ]
-            )
-            ref_head = repo.refs[f"pull/{pr_id}/head"]
-            ref_merge = repo.refs[f"pull/{pr_id}/merge"]
-        except GitCommandError:
-            # Either `merge` doesn't exist because the PR was opened
-            # in conflict or it is closed and it can't be the latter.
-            repo.remotes.origin.fetch([f"pull/{pr_id}/head:pull/{pr_id}/head"])
-            ref_head = repo.refs[f"pull/{pr_id}/head"]
+        mirror_dir = mirrors.enter_context(git_mirror(remote_repo.clone_url))
+        repo, ref_head, ref_merge = clone_pr_for_linting(
+            remote_repo.clone_url, tmp_dir.name, pr_id, reference=mirror_dir
+        )
         sha = str(ref_head.commit.hexsha)
 
         # Check if the linter is skipped via the commit message.
@@ -287,30 +571,20 @@ def compute_lint_message(
 
             return {"message": message, "status": status, "sha": sha}
 
-        # Collect recipes from base that should be ignored.
-        base_recipes = []
-        if ignore_base:
-            num_parents = len(ref_merge.commit.parents)
-            assert num_parents == 2, textwrap.dedent(
-                f"""
-                   Expected merging our PR with the base branch would have two parents.
-                   Instead there were {num_parents} parents found. :/
-                   """
-            )
-            base_commit = (set(ref_merge.commit.parents) - {ref_head.commit}).pop()
-            ref_base = repo.create_head(f"pull/{pr_id}/base", base_commit)
-            ref_base.checkout(force=True)
-            base_recipes = find_recipes(Path(tmp_dir.name))
-
-        # Get the list of recipes and prep for linting.
-        ref_merge.checkout(force=True)
+        # Collect recipes from base that should be ignored
+        # and check out the merged PR.
+        base_recipes = checkout_pr_for_linting(
+            repo, ref_head, ref_merge, pr_id, ignore_base=ignore_base
+        )
 
-        message, status = lint_all_recipes(Path(tmp_dir.name), base_recipes)
+        message, status = lint_all_recipes(Path(repo.working_dir), base_recipes)
     finally:
         # Remove the environment variable if it was set in this function
         os.environ.pop("STAGED_RECIPES_PR_NUMBER", None)
 
         tmp_dir.cleanup()
+        # the mirror has to outlive the clone that borrows its objects
+        mirrors.close()
 
     pull_request = remote_repo.get_pull(pr_id)
     if pull_request.state == "open":
@@ -322,6 +596,7 @@ def compute_lint_message(
         return None
 
 
+@attribute_rate_limit_usage("linting")
 def comment_on_pr(
     owner: str,
     repo_name: str,
@@ -366,6 +641,7 @@ def comment_on_pr(
     return my_last_comment
 
 
+@attribute_rate_limit_usage("linting")
 def set_pr_status(
     owner: str, repo_name: str, lint_info: LintInfo, target_url: str | None = None
 ):
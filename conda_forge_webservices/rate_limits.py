@@ -0,0 +1,369 @@
+"""
+This module tracks our GitHub API rate limit budgets passively.
+
+Every response from the GitHub API carries `X-RateLimit-*` headers. We record
+them from a `requests` response hook that is installed on the sessions we use
+to talk to GitHub (including the sessions of PyGithub's connections, which we
+swap in with `Requester.injectConnectionClasses`) so that we never have to
+spend requests asking GitHub how many requests we have left.
+
+Requests are attributed to the subsystem that made them (linting, commands,
+outputs, teams, automerge) via `attribute_rate_limit_usage`. Some subsystems
+run in the command worker processes, so each process accumulates its counts
+in memory and periodically merges them into a JSON file shared by all of the
+processes.
+"""
+
+import contextlib
+import contextvars
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from github import Github
+from github.Requester import (
+    HTTPRequestsConnectionClass,
+    HTTPSRequestsConnectionClass,
+    Requester,
+)
+
+from conda_forge_webservices.http_cache import HTTP_CACHE_HIT_HEADER, cache_session
+from conda_forge_webservices.utils import credential_id
+
+LOGGER = logging.getLogger("conda_forge_webservices.rate_limits")
+
+SUBSYSTEMS = ("linting", "commands", "outputs", "teams", "automerge")
+DEFAULT_SUBSYSTEM = "other"
+
+# non-urgent work is deferred once the credential doing it has less than
+# this fraction of its budget left
+RATE_LIMIT_LOW_BUDGET_FRACTION = float(
+    os.environ.get("CF_WEBSERVICES_RATE_LIMIT_LOW_BUDGET_FRACTION", "0.1")
+)
+# the most time between merges of the per-process counts into the shared file
+RATE_LIMIT_FLUSH_INTERVAL = 5
+RATE_LIMIT_STATS_PATH = os.environ.get(
+    "CF_WEBSERVICES_RATE_LIMIT_STATS_PATH",
+    os.path.join(
+        tempfile.gettempdir(), f"cf-webservices-rate-limits-{os.getuid()}.json"
+    ),
+)
+
+_SUBSYSTEM: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "rate_limit_subsystem", default=DEFAULT_SUBSYSTEM
+)
+
+
+def _parse_int_header(headers, name):
+    try:
+        # ints expected but sometimes floats are returned
+        return int(float(headers[name]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class RateLimitTracker:
+    """Record GitHub API rate limit budgets and usage per subsystem.
+
+    Parameters
+    ----------
+    stats_path : str
+        The path to the file used to share the stats between processes.
+    """
+
+    def __init__(self, stats_path):
+        self.stats_path = stats_path
+        self._lock = threading.Lock()
+        # (credential, resource) -> budget dict
+        self._budgets = {}
+        # subsystem -> resource -> {"requests": n, "counted": n}, not yet
+        # merged into the shared file
+        self._pending = {}
+        self._last_flush = 0.0
+
+    def record(self, headers, auth_header=None, status=200, subsystem=None):
+        """Record the rate limit headers of a single response.
+
+        Parameters
+        ----------
+        headers : Mapping
+            The response headers. Lookups must be case-insensitive or use
+            lowercase keys.
+        auth_header : str, optional
+            The `Authorization` header of the request, used to tell the
+            credentials apart.
+        status : int, optional
+            The HTTP status code. Conditional requests answered with a 304 do
+            not count against the budget.
+        subsystem : str, optional
+            The subsystem to attribute the request to. Defaults to the one set
+            by `attribute_rate_limit_usage`.
+        """
+        limit = _parse_int_header(headers, "x-ratelimit-limit")
+        remaining = _parse_int_header(headers, "x-ratelimit-remaining")
+        if limit is None or remaining is None:
+            return
+
+        resource = headers.get("x-ratelimit-resource") or "core"
+        subsystem = subsystem or _SUBSYSTEM.get()
+        budget = {
+            "credential": credential_id(auth_header),
+            "resource": resource,
+            "limit": limit,
+            "remaining": remaining,
+            "used": _parse_int_header(headers, "x-ratelimit-used"),
+            "reset": _parse_int_header(headers, "x-ratelimit-reset") or 0,
+            "observed_at": time.time(),
+        }
+
+        with self._lock:
+            key = (budget["credential"], resource)
+            old = self._budgets.get(key)
+            # responses can arrive out of order so keep the lowest remaining
+            # count for a given reset window
+            if (
+                old is None
+                or old["reset"] != budget["reset"]
+                or old["remaining"] >= remaining
+            ):
+                self._budgets[key] = budget
+
+            counts = self._pending.setdefault(subsystem, {}).setdefault(
+                resource, {"requests": 0, "counted": 0}
+            )
+            counts["requests"] += 1
+            if status != 304:
+                counts["counted"] += 1
+
+    def _read_shared_stats(self):
+        try:
+            with open(self.stats_path) as fp:
+                return json.load(fp)
+        except Exception:
+            return {"budgets": [], "subsystems": {}, "since": time.time()}
+
+    def _write_shared_stats(self, data):
+        tmp_path = self.stats_path + f".{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as fp:
+            json.dump(data, fp)
+        os.replace(tmp_path, self.stats_path)
+
+    def flush(self):
+        """Merge the counts of this process into the shared file and pick up
+        the budgets seen by the other processes."""
+        with self._lock:
+            fd = os.open(self.stats_path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                data = self._read_shared_stats()
+
+                for subsystem, resources in self._pending.items():
+                    shared = data["subsystems"].setdefault(subsystem, {})
+                    for resource, counts in resources.items():
+                        shared_counts = shared.setdefault(
+                            resource, {"requests": 0, "counted": 0}
+                        )
+                        for k, v in counts.items():
+                            shared_counts[k] += v
+
+                now = time.time()
+                budgets = {}
+                for budget in data["budgets"] + list(self._budgets.values()):
+                    # budgets from long gone reset windows tell us nothing
+                    if budget["reset"] < now - 3600:
+                        continue
+                    key = (budget["credential"], budget["resource"])
+                    if (
+                        key not in budgets
+                        or budgets[key]["observed_at"] < budget["observed_at"]
+                    ):
+                        budgets[key] = budget
+                data["budgets"] = list(budgets.values())
+
+                self._write_shared_stats(data)
+
+                self._pending = {}
+                self._budgets = budgets
+                self._last_flush = now
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+        return data
+
+    def maybe_flush(self):
+        """Flush if it has been a while since the last flush."""
+        if time.time() - self._last_flush > RATE_LIMIT_FLUSH_INTERVAL:
+            self.flush()
+
+    def stats(self):
+        """Return a JSON-serializable snapshot of the budgets and the usage
+        of every subsystem across all processes."""
+        data = self.flush()
+        now = time.time()
+        for budget in data["budgets"]:
+            budget["seconds_until_reset"] = max(budget["reset"] - now, 0)
+        return data
+
+    def remaining_fraction(self, resource="core", credential=None):
+        """Return the smallest fraction of the budget left for `resource`.
+
+        Parameters
+        ----------
+        resource : str, optional
+            The rate limit resource. Default is "core".
+        credential : str, optional
+            Only look at the budget of this credential (see `credential_id`).
+            Default is to look at all of the credentials we have seen.
+
+        Budgets whose reset time has passed count as full.
+        """
+        self.maybe_flush()
+        now = time.time()
+        fraction = 1.0
+        with self._lock:
+            for budget in self._budgets.values():
+                if (
+                    budget["resource"] != resource
+                    or (credential is not None and budget["credential"] != credential)
+                    or budget["reset"] <= now
+                    or budget["limit"] <= 0
+                ):
+                    continue
+                fraction = min(fraction, budget["remaining"] / budget["limit"])
+        return fraction
+
+
+RATE_LIMIT_TRACKER = RateLimitTracker(RATE_LIMIT_STATS_PATH)
+
+
+@contextlib.contextmanager
+def attribute_rate_limit_usage(subsystem):
+    """Attribute the GitHub API requests made in this context to `subsystem`.
+
+    This can be used as a decorator. The counts are merged into the shared
+    stats when the outermost context exits.
+    """
+    token = _SUBSYSTEM.set(subsystem)
+    try:
+        yield
+    finally:
+        _SUBSYSTEM.reset(token)
+        if _SUBSYSTEM.get() == DEFAULT_SUBSYSTEM:
+            try:
+                RATE_LIMIT_TRACKER.maybe_flush()
+            except Exception as e:
+                LOGGER.warning(f"could not flush rate limit stats: {e!r}")
+
+
+def record_response(resp, *args, **kwargs):
+    """A `requests` response hook that records the rate limit headers."""
+    try:
+        RATE_LIMIT_TRACKER.record(
+            resp.headers,
+            auth_header=resp.request.headers.get("Authorization"),
+            # responses served from the conditional request cache were 304s
+            status=304 if HTTP_CACHE_HIT_HEADER in resp.headers else resp.status_code,
+        )
+    except Exception as e:
+        LOGGER.warning(f"could not record rate limit headers: {e!r}")
+    return resp
+
+
+def track_session(sess):
+    """Record the rate limit headers of every response to `sess`."""
+    if record_response not in sess.hooks["response"]:
+        sess.hooks["response"].append(record_response)
+    return sess
+
+
+# PyGithub makes a new connection for every request once the connection
+# classes are injected, so connections with the same settings share a session
+_TRACKED_SESSIONS: dict = {}
+_TRACKED_SESSIONS_LOCK = threading.Lock()
+
+
+class _RateLimitTrackingConnectionClass(HTTPSRequestsConnectionClass):
+    def __init__(self, host, port=None, *args, retry=None, **kwargs):
+        super().__init__(host, port, *args, retry=retry, **kwargs)
+        # the retry object is kept in the value so its id is not reused
+        key = (host, port, id(retry))
+        with _TRACKED_SESSIONS_LOCK:
+            if key not in _TRACKED_SESSIONS:
+                cache_session(self.session)
+                track_session(self.session)
+                _TRACKED_SESSIONS[key] = (
+                    retry,
+                    self.session,
+                    self.session.get_adapter("https://"),
+                )
+            else:
+                self.session.close()
+            _, self.session, self.adapter = _TRACKED_SESSIONS[key]
+
+    def close(self):
+        # the session is shared with the other connections
+        pass
+
+
+def _reset_tracked_sessions_after_fork():
+    # the child must not share pooled connections with its parent
+    global _TRACKED_SESSIONS_LOCK
+    _TRACKED_SESSIONS_LOCK = threading.Lock()
+    _TRACKED_SESSIONS.clear()
+
+
+os.register_at_fork(after_in_child=_reset_tracked_sessions_after_fork)
+
+
+_GITHUB_TRACKING_LOCK = threading.Lock()
+_GITHUB_TRACKING_INSTALLED = False
+
+
+def _install_github_tracking():
+    global _GITHUB_TRACKING_INSTALLED
+    with _GITHUB_TRACKING_LOCK:
+        if not _GITHUB_TRACKING_INSTALLED:
+            Requester.injectConnectionClasses(
+                HTTPRequestsConnectionClass, _RateLimitTrackingConnectionClass
+            )
+            _GITHUB_TRACKING_INSTALLED = True
+
+
+def make_tracked_github_client(**kwargs):
+    """Make a PyGithub client that records the rate limit headers of every
+    response.
+
+    The client's reads also go through the conditional request cache. The
+    keyword arguments are passed to `github.Github`.
+    """
+    # connection classes are picked when the client is made
+    _install_github_tracking()
+    return Github(**kwargs)
+
+
+def get_rate_limit_stats():
+    """Get the rate limit budgets and the usage of every subsystem."""
+    return RATE_LIMIT_TRACKER.stats()
+
+
+def rate_limit_budget_is_low(resource="core", credential=None):
+    """Return True if non-urgent work should wait for the budget to reset.
+
+    Parameters
+    ----------
+    resource : str, optional
+        The rate limit resource. Default is "core".
+    credential : str, optional
+        The credential that will do the work (e.g., "webservices" for the
+        webservices app). Default is to check all of the credentials.
+    """
+    return (
+        RATE_LIMIT_TRACKER.remaining_fraction(resource=resource, credential=credential)
+        < RATE_LIMIT_LOW_BUDGET_FRACTION
+    )
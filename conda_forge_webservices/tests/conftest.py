@@ -37,6 +37,14 @@ def prep_test_recipes():
         shutil.move(recipe.replace(".skipme", ""), recipe)
 
 
+@pytest.fixture(autouse=True)
+def isolated_lint_cache(tmp_path, monkeypatch):
+    from conda_forge_webservices.lint_cache import LINT_CACHE
+
+    # results cached by other tests or runs would skip the linter
+    monkeypatch.setattr(LINT_CACHE, "cache_dir", str(tmp_path / "lint-cache"))
+
+
 def pytest_report_teststatus(report, config):
     if report.when == "call" and report.outcome == "no tokens":
         return report.outcome, "-", "no tokens"
@@ -1,9 +1,23 @@
+import concurrent.futures
+import multiprocessing
+import os
 import shutil
+import subprocess
 import textwrap
+import time
 from pathlib import Path
 
+import pytest
 
-from conda_forge_webservices.linting import compute_lint_message, lint_all_recipes
+from conda_forge_webservices import git_mirrors, linting
+from conda_forge_webservices.git_mirrors import GitMirrorCache
+from conda_forge_webservices.linting import (
+    checkout_pr_for_linting,
+    clone_pr_for_linting,
+    compute_lint_message,
+    find_recipes,
+    lint_all_recipes,
+)
 
 
 def data_folder():
@@ -248,3 +262,183 @@ def test_new_recipe(tmp_path, skip_if_linting_via_gha):
         "I wanted to let you know that I linted all conda-recipes in your PR "
         "(```recipe/recipe.yaml```) and found some lint." in message
     )
+
+
+def _git(cwd, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=a", "-c", "user.email=a@b.c", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+    )
+
+
+@pytest.fixture
+def staged_recipes_pr(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    _git(src, "init", "-b", "main")
+    _git(src, "config", "uploadpack.allowFilter", "true")
+    for name in ["example", "old"]:
+        (src / "recipes" / name).mkdir(parents=True)
+        (src / "recipes" / name / "meta.yaml").write_text(name)
+    (src / "README.md").write_text("readme")
+    _git(src, "add", "-A")
+    _git(src, "commit", "-m", "base")
+
+    _git(src, "checkout", "-b", "pr")
+    (src / "recipes" / "new").mkdir()
+    (src / "recipes" / "new" / "recipe.yaml").write_text("new")
+    _git(src, "add", "-A")
+    _git(src, "commit", "-m", "add new")
+    _git(src, "update-ref", "refs/pull/1/head", "pr")
+
+    _git(src, "checkout", "main")
+    (src / "README.md").write_text("readme v2")
+    _git(src, "commit", "-am", "main")
+    _git(src, "merge", "--no-ff", "pr", "-m", "merge")
+    _git(src, "update-ref", "refs/pull/1/merge", "HEAD")
+    _git(src, "reset", "--hard", "HEAD~1")
+
+    return src.as_uri()
+
+
+@pytest.mark.parametrize("partial_clone", [True, False])
+def test_clone_and_checkout_pr_for_linting(staged_recipes_pr, tmp_path, partial_clone):
+    repo, ref_head, ref_merge = clone_pr_for_linting(
+        staged_recipes_pr, str(tmp_path / "clone"), 1, partial_clone=partial_clone
+    )
+    assert repo.commit(ref_head.commit.hexsha).message.strip() == "add new"
+
+    base_recipes = checkout_pr_for_linting(
+        repo, ref_head, ref_merge, 1, ignore_base=True
+    )
+    repo_dir = Path(repo.working_dir)
+    recipes = set(find_recipes(repo_dir)) - set(base_recipes)
+    assert recipes == {repo_dir / "recipes" / "new" / "recipe.yaml"}
+    assert (repo_dir / "README.md").read_text() == "readme v2"
+    # the partial clone only checks out the recipes to lint
+    assert (repo_dir / "recipes" / "old").exists() is not partial_clone
+
+
+def test_clone_and_checkout_pr_for_linting_with_mirror(staged_recipes_pr, tmp_path):
+    cache = GitMirrorCache(
+        str(tmp_path / "mirrors"),
+        1024**3,
+        [git_mirrors._repo_slug(staged_recipes_pr)],
+    )
+    with cache.mirror(staged_recipes_pr) as mirror_dir:
+        assert mirror_dir is not None
+        repo, ref_head, ref_merge = clone_pr_for_linting(
+            staged_recipes_pr, str(tmp_path / "clone"), 1, reference=mirror_dir
+        )
+        base_recipes = checkout_pr_for_linting(
+            repo, ref_head, ref_merge, 1, ignore_base=True
+        )
+
+    repo_dir = Path(repo.working_dir)
+    recipes = set(find_recipes(repo_dir)) - set(base_recipes)
+    assert recipes == {repo_dir / "recipes" / "new" / "recipe.yaml"}
+    assert not (repo_dir / "recipes" / "old").exists()
+
+
+def _fake_lint(recipe_dir, conda_forge=True, return_hints=True):
+    name = Path(recipe_dir).name
+    if name == "slow":
+        time.sleep(30)
+    if name == "broken":
+        raise RuntimeError("broken")
+    return [f"lint for {name}"], [f"hint for {name}"]
+
+
+@pytest.fixture
+def fork_lint_workers(monkeypatch):
+    # the fake linters are only patched into this process
+    monkeypatch.setattr(
+        linting, "_LINT_MP_CONTEXT", multiprocessing.get_context("fork")
+    )
+
+
+def test_lint_all_recipes_parallel(tmp_path, monkeypatch, fork_lint_workers):
+    import conda_smithy.lint_recipe
+
+    monkeypatch.setattr(conda_smithy.lint_recipe, "main", _fake_lint)
+    monkeypatch.setattr(linting, "LINT_RECIPE_TIMEOUT", 1)
+    names = ["d", "slow", "a", "broken", "c", "b"]
+    for name in names:
+        (tmp_path / "recipes" / name).mkdir(parents=True)
+        (tmp_path / "recipes" / name / "meta.yaml").write_text(name)
+
+    t0 = time.time()
+    message, status = lint_all_recipes(tmp_path, [])
+    assert time.time() - t0 < 20
+    assert status == "bad"
+
+    # the messages keep the sorted recipe order
+    positions = [
+        message.index(f"For **recipes/{name}/meta.yaml**") for name in sorted(names)
+    ]
+    assert positions == sorted(positions)
+    for name in ["a", "b", "c", "d"]:
+        assert f"lint for {name}" in message
+        assert f"hint for {name}" in message
+    assert "did not finish within 1 seconds" in message
+    assert "Failed to even lint the recipe" in message
+
+
+def test_lint_all_recipes_cache(tmp_path, monkeypatch, fork_lint_workers):
+    import conda_smithy.lint_recipe
+
+    calls_dir = tmp_path / "calls"
+    calls_dir.mkdir()
+
+    def _counting_lint(recipe_dir, **kwargs):
+        # the linter runs in the workers so we count the calls on disk
+        name = Path(recipe_dir).name
+        (calls_dir / f"{name}-{time.time_ns()}").touch()
+        return _fake_lint(recipe_dir, **kwargs)
+
+    def _calls():
+        calls = sorted(p.name.split("-")[0] for p in calls_dir.iterdir())
+        for p in calls_dir.iterdir():
+            p.unlink()
+        return calls
+
+    monkeypatch.setattr(conda_smithy.lint_recipe, "main", _counting_lint)
+    root = tmp_path / "root"
+    for name in ["a", "b", "broken"]:
+        (root / "recipes" / name).mkdir(parents=True)
+        (root / "recipes" / name / "meta.yaml").write_text(name)
+
+    first = lint_all_recipes(root, [])
+    assert _calls() == ["a", "b", "broken"]
+
+    # unchanged recipes are not linted again but failures are
+    (root / "recipes" / "b" / "meta.yaml").write_text("b2")
+    assert lint_all_recipes(root, []) == first
+    assert _calls() == ["b", "broken"]
+
+
+def test_lint_mp_context(monkeypatch):
+    # the fork server is only set up when the first lint pool is made
+    monkeypatch.setattr(linting, "_LINT_MP_CONTEXT", None)
+    with concurrent.futures.ThreadPoolExecutor(4) as exe:
+        contexts = list(exe.map(lambda _: linting._lint_mp_context(), range(4)))
+    assert all(ctx is contexts[0] for ctx in contexts)
+    assert contexts[0].get_start_method() == "forkserver"
+    assert linting._LINT_MP_CONTEXT is contexts[0]
+
+
+def test_lint_worker_env(monkeypatch):
+    def _worker_env():
+        pool, pids = linting._make_lint_pool(1)
+        with pool:
+            value = pool.submit(os.getenv, "STAGED_RECIPES_PR_NUMBER").result()
+        assert not pids.empty()
+        return value
+
+    # the fork server may have been started with another PR's environment
+    monkeypatch.setenv("STAGED_RECIPES_PR_NUMBER", "123")
+    assert _worker_env() == "123"
+    monkeypatch.delenv("STAGED_RECIPES_PR_NUMBER")
+    assert _worker_env() is None
@@ -364,13 +364,11 @@ def test_pr_command_triggers(
 @mock.patch("conda_forge_webservices.commands.make_noarch")
 @mock.patch("conda_forge_webservices.commands.relint")
 @mock.patch("conda_forge_webservices.commands.update_team")
-@mock.patch("conda_forge_webservices.commands.github.Github")
 @mock.patch("conda_forge_webservices.commands.get_gh_client")
 @mock.patch("conda_forge_webservices.commands.Repo")
 def test_issue_command_triggers(
     git_repo,
     gh_app,
-    gh,
     update_team,
     relint,
     make_noarch,
@@ -405,9 +403,14 @@ def test_issue_command_triggers(
     else:
         raise ValueError(f"Unknown command: {command}")
 
-    issue = gh_app.return_value.get_repo.return_value.get_issue.return_value
-    repo = gh.return_value.get_repo.return_value
-    gh.return_value.get_repo.return_value.default_branch = "main"
+    # the fork is made with the bot's client
+    gh = mock.MagicMock()
+    app_gh = gh_app.return_value
+    gh_app.side_effect = lambda role="webservices": gh if role == "bot" else app_gh
+
+    issue = app_gh.get_repo.return_value.get_issue.return_value
+    repo = gh.get_repo.return_value
+    gh.get_repo.return_value.default_branch = "main"
     for msg in should:
         print(msg, end=" " * 30 + "\r")
 
@@ -508,11 +511,9 @@ def test_rerender_failure(
 @mock.patch("conda_forge_webservices.commands.relint")
 @mock.patch("conda_forge_webservices.commands.update_team")
 @mock.patch("conda_forge_webservices.commands.get_gh_client")
-@mock.patch("github.Github")
 @mock.patch("conda_forge_webservices.commands.Repo")
 def test_update_version_failure(
     repo,
-    gh,
     gh_app,
     update_team,
     relint,
@@ -525,10 +526,15 @@ def test_update_version_failure(
 ):
     update_version.side_effect = RequestException
 
+    # the fork and the PR are made with the bot's client
+    gh = mock.MagicMock()
+    app_gh = gh_app.return_value
+    gh_app.side_effect = lambda role="webservices": gh if role == "bot" else app_gh
+
     repos = [mock.MagicMock(), mock.MagicMock(), mock.MagicMock()]
     for repo in repos:
         repo.default_branch = "main"
-    gh.return_value.get_repo.side_effect = repos
+    gh.get_repo.side_effect = repos
     pull_create_issue = repos[0].create_pull.return_value.create_issue_comment
 
     msg = "@conda-forge-admin, please update version"
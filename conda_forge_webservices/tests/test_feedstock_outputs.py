@@ -1,24 +1,42 @@
 import json
 import hmac
 import os
+import threading
 import uuid
 from unittest import mock
 from collections import OrderedDict
 import urllib.parse
 import base64
 
+import github
 import pytest
+import requests
 
 from binstar_client import BinstarError
+import conda_forge_metadata.feedstock_outputs
 
+from conda_forge_webservices import feedstock_outputs
 from conda_forge_webservices.feedstock_outputs import (
+    COPY_AUDIT_QUEUE,
+    COPY_AUDIT_UNREPORTED,
     _copy_feedstock_outputs_from_staging_to_prod,
     _get_ac_api_prod,
     _get_dist,
     _is_valid_feedstock_output,
+    audit_copied_dists,
+    check_feedstock_outputs,
+    package_to_feedstock,
+    queue_copied_dist_for_audit,
     validate_feedstock_outputs,
 )
 
+FEEDSTOCK_OUTPUTS_TEST_CONFIG = {
+    "outputs_path": "outputs",
+    "shard_level": 3,
+    "shard_fill": "z",
+    "auto_register_all": False,
+}
+
 
 @pytest.mark.parametrize("remove", [True, False])
 @mock.patch("conda_forge_webservices.feedstock_outputs._dist_exists")
@@ -246,6 +264,7 @@ def test_get_dist(dist, hash_value, res):
         assert hmac.compare_digest(data["md5"], hash_value) is res
 
 
+@pytest.mark.parametrize("dry_run", [True, False])
 @pytest.mark.parametrize("register", [True, False])
 @pytest.mark.parametrize(
     "project", ["foo-feedstock", "blah", "foo", "blarg-feedstock", "boo-feedstock"]
@@ -264,13 +283,29 @@ def test_is_valid_feedstock_output(
     monkeypatch,
     project,
     register,
+    dry_run,
 ):
     monkeypatch.setenv("GH_TOKEN", "abc123")
+    monkeypatch.setattr(
+        feedstock_outputs,
+        "FEEDSTOCK_OUTPUTS_CONFIG",
+        feedstock_outputs._FeedstockOutputsConfigCache(60),
+    )
+    monkeypatch.setattr(
+        conda_forge_metadata.feedstock_outputs,
+        "feedstock_outputs_config",
+        lambda: FEEDSTOCK_OUTPUTS_TEST_CONFIG,
+    )
 
     def _get_function(name, *args, **kwargs):
         data = None
         text = None
-        if "bar.json" in name:
+        if name.endswith("/config.json"):
+            resp = mock.MagicMock()
+            resp.status_code = 200
+            resp.json.return_value = FEEDSTOCK_OUTPUTS_TEST_CONFIG
+            return resp
+        elif "bar.json" in name:
             assert "b/a/r/bar.json" in name
             data = {"feedstocks": ["foo", "blah"]}
             status = 200
@@ -321,6 +356,7 @@ def test_is_valid_feedstock_output(
         project,
         outputs,
         register=register,
+        dry_run=dry_run,
     )
 
     if project in ["foo", "foo-feedstock"]:
@@ -348,7 +384,333 @@ def test_is_valid_feedstock_output(
             "noarch/glob-0.2-py_12.conda": register,
         }
 
-    if register:
+    if register and not dry_run:
         afs_mock.assert_called_once_with(project.replace("-feedstock", ""), "glob")
     else:
         afs_mock.assert_not_called()
+
+
+@pytest.mark.parametrize("auto_register", [True, False])
+@mock.patch("conda_forge_webservices.feedstock_outputs.feedstock_outputs_config")
+@mock.patch("conda_forge_webservices.feedstock_outputs._is_valid_feedstock_output")
+def test_check_feedstock_outputs(valid_out, config_mock, auto_register):
+    config_mock.return_value = {"auto_register_all": auto_register}
+    valid_out.return_value = {
+        "noarch/a-0.1-py_0.conda": True,
+        "noarch/b-0.1-py_0.conda": False,
+    }
+
+    valid, errs = check_feedstock_outputs(
+        "bar-feedstock",
+        [
+            "noarch/a-0.1-py_0.conda",
+            "noarch/b-0.1-py_0.conda",
+            "noarch/c-0.1-py_0",
+        ],
+    )
+
+    valid_out.assert_called_once_with(
+        "bar-feedstock",
+        ["noarch/a-0.1-py_0.conda", "noarch/b-0.1-py_0.conda"],
+        register=auto_register,
+        dry_run=True,
+    )
+    assert valid == {
+        "noarch/a-0.1-py_0.conda": True,
+        "noarch/b-0.1-py_0.conda": False,
+        "noarch/c-0.1-py_0": False,
+    }
+    assert (
+        "output noarch/b-0.1-py_0.conda not allowed for conda-forge/bar-feedstock"
+    ) in errs
+    assert any("noarch/c-0.1-py_0' is not correctly formatted" in err for err in errs)
+    assert len(errs) == 2
+
+
+def test_queue_copied_dist_for_audit_sample_rate():
+    COPY_AUDIT_QUEUE.clear()
+    try:
+        assert queue_copied_dist_for_audit(
+            "bar-feedstock", "noarch/a-0.1-py_0.conda", "main", "md5", "abc"
+        )
+        assert not queue_copied_dist_for_audit(
+            "bar-feedstock",
+            "noarch/b-0.1-py_0.conda",
+            "main",
+            "md5",
+            "abc",
+            sample_rate=0,
+        )
+        assert list(COPY_AUDIT_QUEUE) == [
+            ("bar-feedstock", "noarch/a-0.1-py_0.conda", "main", "md5", "abc", 0)
+        ]
+    finally:
+        COPY_AUDIT_QUEUE.clear()
+
+
+@pytest.mark.parametrize("has_issue", [True, False])
+@mock.patch("conda_forge_webservices.feedstock_outputs.get_gh_client")
+@mock.patch("conda_forge_webservices.feedstock_outputs._get_ac_api_prod")
+def test_audit_copied_dists(ac_prod, gh_mock, has_issue):
+    def _dist(channel, name, version, basename=None):
+        return {
+            "a": {"md5": "good"},
+            "b": {"md5": "other"},
+            "c": {"md5": "other"},
+        }[name]
+
+    ac_prod.return_value.distribution.side_effect = _dist
+
+    repo = gh_mock.return_value.get_repo.return_value
+    issue = mock.MagicMock()
+    issue.title = (
+        "important/security: bad copy operation(s) found by copy audit (1 package(s))"
+    )
+    repo.get_issues.return_value = [issue] if has_issue else []
+
+    COPY_AUDIT_QUEUE.clear()
+    try:
+        for name in ["a", "b", "c"]:
+            queue_copied_dist_for_audit(
+                "bar-feedstock", f"noarch/{name}-0.1-py_0.conda", "main", "md5", "good"
+            )
+
+        bad_copies = audit_copied_dists(max_dists=2)
+        assert [bc[1] for bc in bad_copies] == ["noarch/b-0.1-py_0.conda"]
+        assert len(COPY_AUDIT_QUEUE) == 1
+
+        # a single issue or comment is made for the batch
+        if has_issue:
+            issue.create_comment.assert_called_once()
+            repo.create_issue.assert_not_called()
+        else:
+            repo.create_issue.assert_called_once()
+
+        bad_copies = audit_copied_dists()
+        assert [bc[1] for bc in bad_copies] == ["noarch/c-0.1-py_0.conda"]
+        assert len(COPY_AUDIT_QUEUE) == 0
+        assert audit_copied_dists() == []
+    finally:
+        COPY_AUDIT_QUEUE.clear()
+
+
+@mock.patch(
+    "conda_forge_webservices.feedstock_outputs._comment_on_core_notes_for_bad_copies"
+)
+@mock.patch("conda_forge_webservices.feedstock_outputs._get_ac_api_prod")
+def test_audit_copied_dists_retries(ac_prod, comment_mock, monkeypatch):
+    down = {"a"}
+
+    def _dist(channel, name, version, basename=None):
+        if name in down:
+            raise requests.exceptions.ConnectionError("down")
+        # the hash can be there but null
+        return {"md5": None}
+
+    ac_prod.return_value.distribution.side_effect = _dist
+    comment_mock.side_effect = RuntimeError("github is down")
+    monkeypatch.setattr(feedstock_outputs, "COPY_AUDIT_MAX_ATTEMPTS", 2)
+
+    COPY_AUDIT_QUEUE.clear()
+    COPY_AUDIT_UNREPORTED.clear()
+    try:
+        for name in ["a", "b"]:
+            queue_copied_dist_for_audit(
+                "bar-feedstock", f"noarch/{name}-0.1-py_0.conda", "main", "md5", "good"
+            )
+
+        # a is requeued and the bad copy of b is kept until it is reported
+        bad_copies = audit_copied_dists()
+        assert [bc[1] for bc in bad_copies] == ["noarch/b-0.1-py_0.conda"]
+        assert [entry[1:] for entry in COPY_AUDIT_QUEUE] == [
+            ("noarch/a-0.1-py_0.conda", "main", "md5", "good", 1)
+        ]
+        assert [bc[1] for bc in COPY_AUDIT_UNREPORTED] == ["noarch/b-0.1-py_0.conda"]
+
+        # a is given up on after the last attempt
+        comment_mock.side_effect = None
+        assert audit_copied_dists() == []
+        assert len(COPY_AUDIT_QUEUE) == 0
+        assert len(COPY_AUDIT_UNREPORTED) == 0
+        assert [bc[1] for bc in comment_mock.call_args[0][0]] == [
+            "noarch/b-0.1-py_0.conda"
+        ]
+    finally:
+        COPY_AUDIT_QUEUE.clear()
+        COPY_AUDIT_UNREPORTED.clear()
+
+
+@mock.patch(
+    "conda_forge_webservices.feedstock_outputs._comment_on_core_notes_for_bad_copies"
+)
+@mock.patch("conda_forge_webservices.feedstock_outputs._get_ac_api_prod")
+def test_audit_copied_dists_deferred_report(ac_prod, comment_mock):
+    ac_prod.return_value.distribution.return_value = {"md5": "other"}
+
+    COPY_AUDIT_QUEUE.clear()
+    COPY_AUDIT_UNREPORTED.clear()
+    try:
+        queue_copied_dist_for_audit(
+            "bar-feedstock", "noarch/a-0.1-py_0.conda", "main", "md5", "good"
+        )
+
+        # the hashes are checked even when the report has to wait
+        bad_copies = audit_copied_dists(report=False)
+        assert [bc[1] for bc in bad_copies] == ["noarch/a-0.1-py_0.conda"]
+        comment_mock.assert_not_called()
+        assert len(COPY_AUDIT_UNREPORTED) == 1
+
+        assert audit_copied_dists() == []
+        comment_mock.assert_called_once()
+        assert len(COPY_AUDIT_UNREPORTED) == 0
+    finally:
+        COPY_AUDIT_QUEUE.clear()
+        COPY_AUDIT_UNREPORTED.clear()
+
+
+@mock.patch("conda_forge_webservices.feedstock_outputs.requests.get")
+def test_feedstock_outputs_config(get_mock):
+    cache = feedstock_outputs._FeedstockOutputsConfigCache(60)
+    get_mock.return_value.json.return_value = FEEDSTOCK_OUTPUTS_TEST_CONFIG
+
+    # the config is cached
+    assert cache.config() == FEEDSTOCK_OUTPUTS_TEST_CONFIG
+    assert cache.config() == FEEDSTOCK_OUTPUTS_TEST_CONFIG
+    get_mock.assert_called_once()
+    assert get_mock.call_args.kwargs["timeout"] > 0
+
+    # stale data is used if a refresh fails
+    cache.ttl = -1
+    get_mock.return_value.raise_for_status.side_effect = requests.exceptions.HTTPError(
+        "503"
+    )
+    assert cache.config() == FEEDSTOCK_OUTPUTS_TEST_CONFIG
+
+    # the config is read at the pushed ref
+    get_mock.return_value.raise_for_status.side_effect = None
+    cache.refresh(ref="abc123")
+    assert get_mock.call_args.args[0].endswith("/abc123/config.json")
+
+
+@mock.patch("conda_forge_webservices.feedstock_outputs.requests.get")
+def test_feedstock_outputs_config_refresh_unlocked(get_mock):
+    cache = feedstock_outputs._FeedstockOutputsConfigCache(60)
+    get_mock.return_value.json.return_value = FEEDSTOCK_OUTPUTS_TEST_CONFIG
+    cache.config()
+    cache.ttl = -1
+
+    # readers get the stale config while a refresh waits on the network
+    fetching = threading.Event()
+    done = threading.Event()
+
+    def _get(*args, **kwargs):
+        fetching.set()
+        assert done.wait(timeout=10)
+        return mock.DEFAULT
+
+    get_mock.side_effect = _get
+    thread = threading.Thread(target=cache.config)
+    thread.start()
+    try:
+        assert fetching.wait(timeout=10)
+        assert cache.config() == FEEDSTOCK_OUTPUTS_TEST_CONFIG
+    finally:
+        done.set()
+        thread.join()
+    assert get_mock.call_count == 2
+
+
+@mock.patch("conda_forge_webservices.feedstock_outputs._package_to_feedstock")
+def test_package_to_feedstock(p2f_mock):
+    feedstock_outputs._UNREGISTERED_OUTPUTS_CACHE.clear()
+
+    def _p2f(name, **kwargs):
+        if name == "bar":
+            return ["foo", "blah"]
+        resp = requests.Response()
+        resp.status_code = 404
+        raise requests.exceptions.HTTPError("404", response=resp)
+
+    p2f_mock.side_effect = _p2f
+
+    try:
+        assert package_to_feedstock("bar") == ["blah", "foo"]
+        assert p2f_mock.call_args.kwargs["timeout"] > 0
+        with pytest.raises(requests.exceptions.HTTPError):
+            package_to_feedstock("goo")
+
+        # unregistered outputs are cached
+        num_calls = p2f_mock.call_count
+        with pytest.raises(requests.exceptions.HTTPError):
+            package_to_feedstock("goo")
+        assert p2f_mock.call_count == num_calls
+
+        # registering an output drops it from the cache
+        feedstock_outputs._forget_registered_feedstocks("goo")
+        with pytest.raises(requests.exceptions.HTTPError):
+            package_to_feedstock("goo")
+        assert p2f_mock.call_count == num_calls + 1
+    finally:
+        feedstock_outputs._UNREGISTERED_OUTPUTS_CACHE.clear()
+
+
+@mock.patch("conda_forge_webservices.feedstock_outputs._package_to_feedstock")
+@mock.patch("conda_forge_webservices.feedstock_outputs._get_sharded_path")
+@mock.patch("conda_forge_webservices.feedstock_outputs.get_gh_client")
+def test_add_feedstock_output_lookup_during_write(gh_mock, path_mock, p2f_mock):
+    feedstock_outputs._UNREGISTERED_OUTPUTS_CACHE.clear()
+    path_mock.return_value = "outputs/b/a/r/bar.json"
+    resp = requests.Response()
+    resp.status_code = 404
+    p2f_mock.side_effect = requests.exceptions.HTTPError("404", response=resp)
+
+    repo = gh_mock.return_value.get_repo.return_value
+    repo.get_contents.side_effect = github.UnknownObjectException(404)
+
+    # a lookup while the output is being registered caches the old data
+    def _create_file(*args):
+        with pytest.raises(requests.exceptions.HTTPError):
+            package_to_feedstock("bar")
+
+    repo.create_file.side_effect = _create_file
+
+    try:
+        feedstock_outputs._add_feedstock_output("foo", "bar")
+        repo.create_file.assert_called_once()
+        assert "bar" not in feedstock_outputs._UNREGISTERED_OUTPUTS_CACHE
+
+        # the cache is also cleared if the write fails
+        repo.create_file.side_effect = github.GithubException(409)
+        with pytest.raises(requests.exceptions.HTTPError):
+            package_to_feedstock("bar")
+        with pytest.raises(github.GithubException):
+            feedstock_outputs._add_feedstock_output("foo", "bar")
+        assert "bar" not in feedstock_outputs._UNREGISTERED_OUTPUTS_CACHE
+    finally:
+        feedstock_outputs._UNREGISTERED_OUTPUTS_CACHE.clear()
+
+
+@mock.patch("conda_forge_webservices.feedstock_outputs.package_to_feedstock")
+@mock.patch(
+    "conda_forge_webservices.feedstock_outputs.get_app_token_for_webservices_only"
+)
+def test_is_valid_feedstock_output_concurrent(gat_mock, p2f_mock):
+    outputs = [f"noarch/out{i}-0.1-py_0.conda" for i in range(4)]
+
+    # each lookup waits for all of the others so this only passes if the
+    # lookups run at the same time
+    barrier = threading.Barrier(len(outputs), timeout=10)
+
+    def _p2f(name):
+        barrier.wait()
+        return ["foo"] if name != "out3" else ["bar"]
+
+    p2f_mock.side_effect = _p2f
+
+    valid = _is_valid_feedstock_output("foo-feedstock", outputs, dry_run=True)
+    assert valid == {
+        "noarch/out0-0.1-py_0.conda": True,
+        "noarch/out1-0.1-py_0.conda": True,
+        "noarch/out2-0.1-py_0.conda": True,
+        "noarch/out3-0.1-py_0.conda": False,
+    }
@@ -0,0 +1,136 @@
+import fcntl
+import os
+import subprocess
+import threading
+
+import pytest
+
+from conda_forge_webservices import git_mirrors
+from conda_forge_webservices.git_mirrors import GitMirrorCache
+
+
+def _git(cwd, *args):
+    return subprocess.run(
+        ["git", "-c", "user.name=a", "-c", "user.email=a@b.c", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+def _make_repo(path, content=b"a"):
+    path.mkdir()
+    _git(path, "init", "-b", "main")
+    (path / "data.bin").write_bytes(content)
+    _git(path, "add", "-A")
+    _git(path, "commit", "-m", "init")
+    return path.as_uri()
+
+
+@pytest.fixture
+def srcs(tmp_path):
+    src_dir = tmp_path / "org"
+    src_dir.mkdir()
+    return {
+        name: _make_repo(src_dir / name, content=os.urandom(64 * 1024))
+        for name in ["a", "b", "c"]
+    }
+
+
+def test_git_mirror_reference_clone(srcs, tmp_path, monkeypatch):
+    cache = GitMirrorCache(str(tmp_path / "mirrors"), 10 * 1024**2, ["org/a"])
+
+    with cache.mirror("https://github.com/org/other.git") as mirror_dir:
+        assert mirror_dir is None
+
+    with cache.mirror(srcs["a"]) as mirror_dir:
+        assert mirror_dir == str(tmp_path / "mirrors" / "org__a.git")
+        clone = tmp_path / "clone"
+        _git(tmp_path, "clone", "--reference", mirror_dir, srcs["a"], str(clone))
+        assert (clone / "data.bin").exists()
+        # no credentials or remotes are kept in the mirror
+        assert "remote" not in _git(mirror_dir, "config", "--list")
+
+    # the mirror is not fetched again right away
+    with cache.mirror(srcs["a"]):
+        pass
+    monkeypatch.setattr(git_mirrors, "GIT_MIRROR_FETCH_INTERVAL", -1)
+    src = tmp_path / "org" / "a"
+    (src / "new.txt").write_text("new")
+    _git(src, "add", "-A")
+    _git(src, "commit", "-m", "new")
+    with cache.mirror(srcs["a"]) as mirror_dir:
+        assert _git(mirror_dir, "rev-parse", "main") == _git(src, "rev-parse", "main")
+
+    assert cache.stats() == {"created": 1, "fetched": 1, "reused": 1, "evicted": 0}
+
+
+def test_git_mirror_eviction(srcs, tmp_path, monkeypatch):
+    mirrors = tmp_path / "mirrors"
+    cache = GitMirrorCache(str(mirrors), 10 * 1024**2, ["org/a", "org/b", "org/c"])
+    with cache.mirror(srcs["a"]), cache.mirror(srcs["b"]), cache.mirror(srcs["c"]):
+        pass
+    size = git_mirrors._dir_size(str(mirrors / "org__a.git"))
+
+    # only room for two mirrors and b is in use by another process
+    cache.max_bytes = int(size * 2.5)
+    # mirrors are only evicted when one is created or fetched
+    monkeypatch.setattr(git_mirrors, "GIT_MIRROR_FETCH_INTERVAL", -1)
+    fd = os.open(str(mirrors / "org__b.git.lock"), os.O_RDWR)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH)
+        os.utime(str(mirrors / "org__b.git.lock"), (0, 0))
+        with cache.mirror(srcs["c"]):
+            pass
+    finally:
+        os.close(fd)
+
+    assert sorted(p for p in os.listdir(mirrors) if p.endswith(".git")) == [
+        "org__b.git",
+        "org__c.git",
+    ]
+    assert cache.stats()["evicted"] == 1
+
+
+def test_git_mirror_concurrent(srcs, tmp_path, monkeypatch):
+    mirrors = tmp_path / "mirrors"
+    cache = GitMirrorCache(str(mirrors), 10 * 1024**2, ["org/a"])
+    with cache.mirror(srcs["a"]):
+        pass
+
+    # up-to-date mirrors are shared by jobs at the same time
+    barrier = threading.Barrier(2, timeout=10)
+    mirror_dirs = []
+
+    def _use_mirror():
+        with cache.mirror(srcs["a"]) as mirror_dir:
+            mirror_dirs.append(mirror_dir)
+            barrier.wait()
+
+    threads = [threading.Thread(target=_use_mirror) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not barrier.broken
+    assert mirror_dirs == [str(mirrors / "org__a.git")] * 2
+
+    # a stale mirror in use by another job is used as it is
+    monkeypatch.setattr(git_mirrors, "GIT_MIRROR_FETCH_INTERVAL", -1)
+    fd = os.open(str(mirrors / "org__a.git.lock"), os.O_RDWR)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH)
+        with cache.mirror(srcs["a"]) as mirror_dir:
+            assert mirror_dir == str(mirrors / "org__a.git")
+    finally:
+        os.close(fd)
+
+    assert cache.stats() == {"created": 1, "fetched": 0, "reused": 3, "evicted": 0}
+
+
+def test_git_mirror_failed_update(tmp_path):
+    cache = GitMirrorCache(str(tmp_path / "mirrors"), 10 * 1024**2, ["org/missing"])
+    with cache.mirror((tmp_path / "org" / "missing").as_uri()) as mirror_dir:
+        assert mirror_dir is None
+    assert os.listdir(tmp_path / "mirrors") == ["org__missing.git.lock"]
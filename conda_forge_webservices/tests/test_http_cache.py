@@ -0,0 +1,188 @@
+import base64
+import http.server
+import json
+import os
+import pickle
+import threading
+
+import pytest
+import requests
+
+from conda_forge_webservices import rate_limits
+from conda_forge_webservices.http_cache import (
+    HTTP_CACHE_HIT_HEADER,
+    ConditionalRequestAdapter,
+    ConditionalRequestCache,
+    cache_session,
+)
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        etag, body = self.server.resources[self.path]
+        self.server.seen.append(
+            (self.command, self.path, self.headers.get("If-None-Match"))
+        )
+        self.server.remaining -= 1
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+        else:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("X-RateLimit-Limit", "5000")
+        self.send_header("X-RateLimit-Remaining", str(self.server.remaining))
+        self.send_header("X-RateLimit-Reset", "9999999999")
+        self.end_headers()
+        if self.headers.get("If-None-Match") != etag:
+            self.wfile.write(body)
+
+    do_POST = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.resources = {
+        "/a": ('"a1"', b'{"a": 1}'),
+        "/b": ('"b1"', b'{"b": 1}'),
+        "/c": ('"c1"', b'{"c": 1}'),
+    }
+    srv.seen = []
+    srv.remaining = 5000
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def _session(cache):
+    sess = requests.Session()
+    sess.mount("http://", ConditionalRequestAdapter(cache))
+    return sess
+
+
+def _url(server, path):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+def test_http_cache_conditional_requests(server):
+    cache = ConditionalRequestCache(1024)
+    sess = _session(cache)
+    headers = {"Authorization": "token abc"}
+
+    r = sess.get(_url(server, "/a"), headers=headers)
+    assert r.json() == {"a": 1}
+    assert HTTP_CACHE_HIT_HEADER not in r.headers
+
+    r = sess.get(_url(server, "/a"), headers=headers)
+    assert r.status_code == 200
+    assert r.json() == {"a": 1}
+    assert r.headers[HTTP_CACHE_HIT_HEADER] == "hit"
+    # the rate limits come from the 304
+    assert r.headers["X-RateLimit-Remaining"] == "4998"
+    assert server.seen[-1] == ("GET", "/a", '"a1"')
+
+    # other credentials do not share entries
+    sess.get(_url(server, "/a"), headers={"Authorization": "token def"})
+    assert server.seen[-1] == ("GET", "/a", None)
+
+    # changed resources are fetched again
+    server.resources["/a"] = ('"a2"', b'{"a": 2}')
+    r = sess.get(_url(server, "/a"), headers=headers)
+    assert r.json() == {"a": 2}
+    assert HTTP_CACHE_HIT_HEADER not in r.headers
+    r = sess.get(_url(server, "/a"), headers=headers)
+    assert r.json() == {"a": 2}
+    assert r.headers[HTTP_CACHE_HIT_HEADER] == "hit"
+
+    # other methods are never cached
+    sess.post(_url(server, "/b"), headers=headers)
+    sess.post(_url(server, "/b"), headers=headers)
+    assert server.seen[-1] == ("POST", "/b", None)
+
+    stats = cache.stats()
+    assert {k: stats[k] for k in ["hits", "misses", "revalidated", "size"]} == {
+        "hits": 2,
+        "misses": 2,
+        "revalidated": 1,
+        "size": 2,
+    }
+    assert stats["hit_rate"] == pytest.approx(0.4)
+
+
+def test_http_cache_eviction_and_disk(server, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    # room for the bodies of two responses
+    cache = ConditionalRequestCache(16, cache_dir=cache_dir)
+    sess = _session(cache)
+
+    for path in ["/a", "/b", "/c"]:
+        sess.get(_url(server, path))
+    stats = cache.stats()
+    assert (stats["size"], stats["bytes"], stats["max_bytes"]) == (2, 16, 16)
+    assert stats["evictions"] == 1
+    assert len(os.listdir(cache_dir)) == 2
+
+    # bodies larger than the whole budget are not kept
+    server.resources["/big"] = ('"big1"', b"x" * 17)
+    sess.get(_url(server, "/big"))
+    assert cache.stats()["size"] == 2
+    assert len(os.listdir(cache_dir)) == 2
+
+    # a new process picks up the entries from disk
+    new_sess = _session(ConditionalRequestCache(1024, cache_dir=cache_dir))
+    r = new_sess.get(_url(server, "/c"))
+    assert r.headers[HTTP_CACHE_HIT_HEADER] == "hit"
+    assert r.json() == {"c": 1}
+    r = new_sess.get(_url(server, "/a"))
+    assert HTTP_CACHE_HIT_HEADER not in r.headers
+
+
+def test_http_cache_disk_entries_are_data(server, tmp_path):
+    cache_dir = tmp_path / "cache"
+    sess = _session(ConditionalRequestCache(1024, cache_dir=str(cache_dir)))
+    sess.get(_url(server, "/a"))
+    (path,) = cache_dir.iterdir()
+    entry = json.loads(path.read_text())
+    assert entry["etag"] == '"a1"'
+    assert base64.b64decode(entry["content"]) == b'{"a": 1}'
+    assert oct(path.stat().st_mode & 0o777) == "0o600"
+
+    # anything that is not a valid entry is a miss
+    path.write_bytes(pickle.dumps({"etag": '"a1"'}))
+    new_sess = _session(ConditionalRequestCache(1024, cache_dir=str(cache_dir)))
+    r = new_sess.get(_url(server, "/a"))
+    assert HTTP_CACHE_HIT_HEADER not in r.headers
+    assert server.seen[-1] == ("GET", "/a", None)
+
+
+def test_http_cache_hits_do_not_count_against_rate_limits(
+    server, tmp_path, monkeypatch
+):
+    tracker = rate_limits.RateLimitTracker(str(tmp_path / "stats.json"))
+    monkeypatch.setattr(rate_limits, "RATE_LIMIT_TRACKER", tracker)
+
+    sess = rate_limits.track_session(_session(ConditionalRequestCache(1024)))
+    sess.get(_url(server, "/a"))
+    sess.get(_url(server, "/a"))
+
+    assert tracker.stats()["subsystems"] == {
+        "other": {"core": {"requests": 2, "counted": 1}}
+    }
+
+
+def test_cache_session():
+    sess = requests.Session()
+    sess.mount("https://", requests.adapters.HTTPAdapter(max_retries=3))
+    cache_session(sess)
+    adapter = sess.get_adapter("https://")
+    assert isinstance(adapter, ConditionalRequestAdapter)
+    assert adapter.max_retries.total == 3
+    cache_session(sess)
+    assert sess.get_adapter("https://") is adapter
@@ -0,0 +1,111 @@
+import os
+import time
+
+import pytest
+
+from conda_forge_webservices import lint_cache
+from conda_forge_webservices.lint_cache import (
+    LintResultCache,
+    cache_feedstock_lint,
+    get_cached_feedstock_lint,
+    hash_recipe_dir,
+)
+
+
+def _make_feedstock(path):
+    (path / "recipe").mkdir(parents=True)
+    (path / "recipe" / "meta.yaml").write_text("package: {name: foo}")
+    (path / "recipe" / "build.sh").write_text("make")
+    (path / "conda-forge.yml").write_text("{}")
+    (path / ".git").mkdir()
+    (path / ".git" / "meta.yaml").write_text("not a recipe")
+    return path
+
+
+def test_hash_recipe_dir(tmp_path):
+    recipe_dir = _make_feedstock(tmp_path / "a") / "recipe"
+    other_dir = _make_feedstock(tmp_path / "b") / "recipe"
+    assert hash_recipe_dir(recipe_dir) == hash_recipe_dir(other_dir)
+
+    (other_dir / "build.sh").chmod(0o755)
+    assert hash_recipe_dir(recipe_dir) != hash_recipe_dir(other_dir)
+
+    (recipe_dir / "patches").mkdir()
+    (recipe_dir / "patches" / "fix.patch").write_text("fix")
+    old_hash = hash_recipe_dir(recipe_dir)
+    (recipe_dir / "patches" / "fix.patch").write_text("fix2")
+    assert hash_recipe_dir(recipe_dir) != old_hash
+
+
+def test_lint_result_cache_keys(tmp_path, monkeypatch):
+    feedstock = _make_feedstock(tmp_path / "foo-feedstock")
+    key = LintResultCache.make_key(feedstock, "recipe/meta.yaml", "3.0")
+    assert key == LintResultCache.make_key(feedstock, "recipe/meta.yaml", "3.0")
+    assert key != LintResultCache.make_key(feedstock, "recipe/meta.yaml", "3.1")
+
+    (feedstock / "conda-forge.yml").write_text("bot: {automerge: true}")
+    assert key != LintResultCache.make_key(feedstock, "recipe/meta.yaml", "3.0")
+    (feedstock / "conda-forge.yml").write_text("{}")
+
+    monkeypatch.setenv("STAGED_RECIPES_PR_NUMBER", "123")
+    assert key != LintResultCache.make_key(feedstock, "recipe/meta.yaml", "3.0")
+
+
+def test_lint_result_cache_ttl_and_prune(tmp_path):
+    cache = LintResultCache(str(tmp_path / "cache"), 2, 60)
+    assert cache.get("a") is None
+    cache.put("a", {"lints": ["a"], "hints": []})
+    assert cache.get("a") == {"lints": ["a"], "hints": []}
+    assert oct(os.stat(cache._path("a")).st_mode & 0o777) == "0o600"
+
+    # a new process sees the entry
+    assert LintResultCache(str(tmp_path / "cache"), 2, 60).get("a") is not None
+
+    cache.ttl = -1
+    assert cache.get("a") is None
+    cache.ttl = 60
+
+    for i, key in enumerate(["b", "c", "d"]):
+        cache.put(key, {"lints": [], "hints": []})
+        os.utime(cache._path(key), (time.time() + i, time.time() + i))
+    cache.prune()
+    assert sorted(os.listdir(tmp_path / "cache")) == ["c.json", "d.json"]
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["stores"]) == (1, 2, 4)
+    assert stats["hit_rate"] == pytest.approx(1 / 3)
+
+
+def test_feedstock_lint_cache(tmp_path, monkeypatch):
+    cache = LintResultCache(str(tmp_path / "cache"), 16, 60)
+    monkeypatch.setattr(lint_cache, "LINT_CACHE", cache)
+    feedstock = _make_feedstock(tmp_path / "foo-feedstock")
+    (feedstock / "recipe" / "sub").mkdir()
+    (feedstock / "recipe" / "sub" / "recipe.yaml").write_text("package: bar")
+    recipes = ["recipe/meta.yaml", "recipe/sub/recipe.yaml"]
+
+    assert get_cached_feedstock_lint(feedstock, "v1") is None
+
+    lints = {recipes[0]: ["lint"], recipes[1]: []}
+    hints = {recipes[0]: [], recipes[1]: ["hint"]}
+    errors = {recipes[0]: False, recipes[1]: True}
+    cache_feedstock_lint(feedstock, "v1", lints, hints, errors)
+    # one recipe failed to lint so it has to be linted again
+    assert get_cached_feedstock_lint(feedstock, "v1") is None
+
+    errors[recipes[1]] = False
+    cache_feedstock_lint(feedstock, "v1", lints, hints, errors)
+    assert get_cached_feedstock_lint(feedstock, "v1") == (
+        lints,
+        hints,
+        {recipes[0]: False, recipes[1]: False},
+    )
+    assert get_cached_feedstock_lint(feedstock, "v2") is None
+
+    # same content in another checkout is answered from the cache
+    other = _make_feedstock(tmp_path / "other")
+    (other / "recipe" / "sub").mkdir()
+    (other / "recipe" / "sub" / "recipe.yaml").write_text("package: bar")
+    assert get_cached_feedstock_lint(other, "v1") is not None
+    (other / "recipe" / "sub" / "recipe.yaml").write_text("package: baz")
+    assert get_cached_feedstock_lint(other, "v1") is None
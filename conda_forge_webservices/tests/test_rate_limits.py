@@ -0,0 +1,170 @@
+import time
+
+import github
+import pytest
+import requests
+
+from conda_forge_webservices import rate_limits
+from conda_forge_webservices.http_cache import ConditionalRequestAdapter
+from conda_forge_webservices.rate_limits import (
+    RateLimitTracker,
+    attribute_rate_limit_usage,
+    make_tracked_github_client,
+    record_response,
+)
+from conda_forge_webservices.utils import credential_id
+
+
+def _headers(remaining, limit=5000, resource="core", reset=None):
+    return {
+        "x-ratelimit-limit": str(limit),
+        "x-ratelimit-remaining": str(remaining),
+        "x-ratelimit-used": str(limit - remaining),
+        "x-ratelimit-reset": str(reset or int(time.time()) + 600),
+        "x-ratelimit-resource": resource,
+    }
+
+
+def _response(headers, status=200, auth="Bearer abc"):
+    resp = requests.Response()
+    resp.status_code = status
+    resp.headers.update(headers)
+    resp.request = requests.Request(
+        "GET", "https://api.github.com", headers={"Authorization": auth}
+    ).prepare()
+    return resp
+
+
+def test_rate_limit_tracker_record(tmp_path):
+    tracker = RateLimitTracker(str(tmp_path / "stats.json"))
+    tracker.record(_headers(4000), auth_header="secret", subsystem="linting")
+    tracker.record(
+        _headers(3999), auth_header="secret", subsystem="linting", status=304
+    )
+    tracker.record(_headers(10, limit=30, resource="search"), subsystem="commands")
+    tracker.record({"content-type": "text/plain"}, subsystem="commands")
+
+    stats = tracker.stats()
+    assert stats["subsystems"] == {
+        "linting": {"core": {"requests": 2, "counted": 1}},
+        "commands": {"search": {"requests": 1, "counted": 1}},
+    }
+    budgets = {(b["resource"], b["credential"]): b for b in stats["budgets"]}
+    assert len(budgets) == 2
+    core = budgets["core", credential_id("secret")]
+    assert core["remaining"] == 3999
+    assert core["used"] == 1001
+    assert "secret" not in core["credential"]
+    assert budgets["search", "anonymous"]["remaining"] == 10
+
+
+def test_rate_limit_tracker_out_of_order(tmp_path):
+    tracker = RateLimitTracker(str(tmp_path / "stats.json"))
+    reset = int(time.time()) + 600
+    tracker.record(_headers(100, reset=reset))
+    tracker.record(_headers(101, reset=reset))
+    assert tracker.stats()["budgets"][0]["remaining"] == 100
+
+    # a new window always wins
+    tracker.record(_headers(5000, reset=reset + 3600))
+    assert tracker.stats()["budgets"][0]["remaining"] == 5000
+
+
+def test_rate_limit_tracker_shared_between_processes(tmp_path):
+    stats_path = str(tmp_path / "stats.json")
+    tracker1 = RateLimitTracker(stats_path)
+    tracker2 = RateLimitTracker(stats_path)
+
+    tracker1.record(_headers(4000), auth_header="a", subsystem="commands")
+    tracker1.flush()
+    tracker2.record(_headers(4500), auth_header="b", subsystem="commands")
+    tracker2.record(_headers(4499), auth_header="b", subsystem="teams")
+
+    stats = tracker2.stats()
+    assert stats["subsystems"] == {
+        "commands": {"core": {"requests": 2, "counted": 2}},
+        "teams": {"core": {"requests": 1, "counted": 1}},
+    }
+    assert len(stats["budgets"]) == 2
+    # counts are merged only once
+    assert tracker1.stats()["subsystems"]["commands"]["core"]["requests"] == 2
+    assert tracker1.remaining_fraction() == pytest.approx(0.8)
+
+
+def test_rate_limit_tracker_remaining_fraction(tmp_path):
+    tracker = RateLimitTracker(str(tmp_path / "stats.json"))
+    assert tracker.remaining_fraction() == pytest.approx(1.0)
+
+    tracker.record(_headers(100, limit=1000))
+    tracker.record(_headers(50, limit=100), auth_header="b")
+    tracker.record(_headers(0, limit=30, resource="search"))
+    assert tracker.remaining_fraction() == pytest.approx(0.1)
+    # only the budget of the credential doing the work counts
+    assert tracker.remaining_fraction(credential=credential_id("b")) == pytest.approx(
+        0.5
+    )
+    assert tracker.remaining_fraction(credential="other") == pytest.approx(1.0)
+    assert tracker.remaining_fraction(resource="search") == pytest.approx(0.0)
+
+    # budgets past their reset time are full again
+    tracker.record(_headers(0, limit=30, resource="search", reset=1))
+    assert tracker.remaining_fraction(resource="search") == pytest.approx(1.0)
+
+
+def test_rate_limit_attribution_and_hooks(tmp_path, monkeypatch):
+    tracker = RateLimitTracker(str(tmp_path / "stats.json"))
+    monkeypatch.setattr(rate_limits, "RATE_LIMIT_TRACKER", tracker)
+    monkeypatch.setattr(rate_limits, "RATE_LIMIT_LOW_BUDGET_FRACTION", 0.5)
+
+    @attribute_rate_limit_usage("outputs")
+    def _outputs():
+        record_response(_response(_headers(1000)))
+        with attribute_rate_limit_usage("teams"):
+            record_response(_response(_headers(999), status=304))
+        record_response(_response(_headers(998)))
+
+    _outputs()
+    record_response(_response(_headers(997)))
+    record_response(_response({}))
+
+    stats = rate_limits.get_rate_limit_stats()
+    assert stats["subsystems"] == {
+        "outputs": {"core": {"requests": 2, "counted": 2}},
+        "teams": {"core": {"requests": 1, "counted": 0}},
+        "other": {"core": {"requests": 1, "counted": 1}},
+    }
+    assert stats["budgets"][0]["credential"] == credential_id("Bearer abc")
+    assert rate_limits.rate_limit_budget_is_low()
+    assert rate_limits.rate_limit_budget_is_low(credential=credential_id("abc"))
+    assert not rate_limits.rate_limit_budget_is_low(credential="webservices")
+
+
+def test_make_tracked_github_client(monkeypatch):
+    # this fails loudly if PyGithub drops the hook we use for its connections
+    assert hasattr(github.Requester.Requester, "injectConnectionClasses")
+
+    tracked = []
+    track_session = rate_limits.track_session
+    monkeypatch.setattr(rate_limits, "_TRACKED_SESSIONS", {})
+    monkeypatch.setattr(
+        rate_limits, "track_session", lambda sess: tracked.append(track_session(sess))
+    )
+
+    # nothing listens on the port so the requests fail after the connection
+    # for them is made
+    gh = make_tracked_github_client(
+        auth=github.Auth.Token("abc"), base_url="https://127.0.0.1:1", retry=0
+    )
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            gh.get_rate_limit()
+
+    # the connections of the client share one tracked and cached session
+    assert len(tracked) == 1
+    assert record_response in tracked[0].hooks["response"]
+    assert isinstance(tracked[0].get_adapter("https://"), ConditionalRequestAdapter)
+
+    sess = requests.Session()
+    rate_limits.track_session(sess)
+    rate_limits.track_session(sess)
+    assert sess.hooks["response"] == [record_response]
@@ -0,0 +1,539 @@
+import collections
+import datetime
+import gzip
+import json
+import random
+from unittest import mock
+
+import cachetools
+import pytest
+import pytz
+
+from conda_forge_webservices import status_monitor
+from conda_forge_webservices.status_monitor import (
+    NUM_STATUS_SLOTS,
+    LogHistogram,
+    RateRingBuffer,
+    SpaceSavingCounter,
+    WindowedHeavyHitters,
+    _make_est_from_time_key,
+    _make_repo_counter,
+    _parse_report_params,
+    _make_report_data,
+    _make_time_key,
+    get_rendered_report_data,
+    get_rendered_status_index,
+    update_data_check_run,
+)
+
+
+def test_rate_ring_buffer():
+    buff = RateRingBuffer(4)
+    assert len(buff) == 0
+    assert buff.get(10) == 0
+
+    buff.add(10)
+    buff.add(10)
+    buff.add(11)
+    buff[12] = 5
+    assert buff.get(10) == 2
+    assert buff[12] == 5
+    assert len(buff) == 3
+
+    # slot 14 reuses the index of slot 10
+    buff.add(14)
+    assert 10 not in buff
+    assert buff.get(14) == 1
+
+    # old slots are dropped
+    buff.add(10)
+    assert buff.get(14) == 1
+    assert 10 not in buff
+
+    assert list(buff.window(14)) == [1, 0, 5, 1]
+    assert list(buff.window(15)) == [0, 1, 0, 5]
+    assert list(buff.window(20)) == [0, 0, 0, 0]
+
+
+def test_space_saving_counter():
+    counter = SpaceSavingCounter(3)
+    for item in ["a"] * 10 + ["b"] * 5 + ["c", "d", "e", "f"] + ["b"] * 2:
+        counter.add(item)
+
+    assert len(counter) == 3
+    assert counter.get("a") == 10
+    assert counter.get("b") == 7
+    # the tail items share the last counter and overestimate
+    assert sum(c for _, c in counter.items()) == 21
+
+
+def test_space_saving_counter_heavy_hitters():
+    counter = SpaceSavingCounter(16)
+    stream = []
+    for i in range(1000):
+        stream.append(f"repo{i}")
+        if i % 4 == 0:
+            stream.extend(["hot1"] * 2 + ["hot2"])
+    for item in stream:
+        counter.add(item)
+
+    assert counter.get("hot1") >= 500
+    assert counter.get("hot2") >= 250
+    top = sorted(counter.items(), key=lambda x: x[1], reverse=True)
+    assert [item for item, _ in top[:2]] == ["hot1", "hot2"]
+
+
+def test_windowed_heavy_hitters():
+    hh = WindowedHeavyHitters(4, 2, 8)
+    assert hh.num_buckets == 3
+
+    hh.add("a", 0, count=5)
+    hh.add("b", 1)
+    hh.add("b", 2, count=3)
+    hh.add("c", 4)
+    assert hh.top(2, 4) == [("a", 5), ("b", 4)]
+
+    # the bucket with slots 0 and 1 drops out of the window
+    assert hh.top(3, 6) == [("b", 3), ("c", 1)]
+    hh.add("c", 6, count=10)
+    assert hh.top(3, 6) == [("c", 11), ("b", 3)]
+    assert hh.top(3, 20) == []
+
+
+def test_make_report_data(monkeypatch):
+    buff = RateRingBuffer(NUM_STATUS_SLOTS)
+    now = datetime.datetime.utcnow().replace(tzinfo=pytz.UTC)
+    know = _make_time_key(now)
+    buff.add(know, 3)
+    buff.add(know - 5)
+    buff.add(know - NUM_STATUS_SLOTS)
+    repos = _make_repo_counter()
+    repos.add("a", know)
+    repos.add("b", know, count=3)
+    monkeypatch.setattr(
+        status_monitor,
+        "APP_DATA",
+        {
+            "azure-pipelines": {
+                **status_monitor._make_app_data(),
+                "repos": repos,
+                "rates": buff,
+            }
+        },
+    )
+
+    report = _make_report_data(iso=True)["azure-pipelines"]
+    assert report["total"] == 4
+    assert len(report["rates"]) == NUM_STATUS_SLOTS
+    assert next(iter(report["rates"])) == _make_est_from_time_key(know, iso=True)
+    assert report["rates"][_make_est_from_time_key(know, iso=True)] == 3
+    assert report["rates"][_make_est_from_time_key(know - 5, iso=True)] == 1
+    assert list(report["repos"]) == ["b", "a"]
+
+
+def _check_run_event(repo, duration=None, latency=None):
+    now = datetime.datetime.now(tz=pytz.UTC)
+    event = {
+        "repository": {"full_name": repo},
+        "action": "completed",
+        "check_run": {
+            "app": {"slug": "github-actions"},
+            "status": "completed",
+            "conclusion": "success",
+            "completed_at": now.isoformat(),
+        },
+    }
+    if duration is not None:
+        started_at = now - datetime.timedelta(seconds=duration)
+        event["check_run"]["started_at"] = started_at.isoformat()
+        if latency is not None:
+            event["check_run"]["check_suite"] = {
+                "created_at": (
+                    started_at - datetime.timedelta(seconds=latency)
+                ).isoformat()
+            }
+    return event
+
+
+def test_rendered_report_cache(monkeypatch):
+    monkeypatch.setattr(
+        status_monitor,
+        "APP_DATA",
+        {"github-actions": status_monitor._make_app_data()},
+    )
+    monkeypatch.setattr(
+        status_monitor, "_REPORT_CACHE", cachetools.LRUCache(maxsize=16)
+    )
+    monkeypatch.setattr(status_monitor, "REPORT_MIN_REBUILD_INTERVAL", 3600)
+
+    report = get_rendered_report_data()
+    assert json.loads(report.body)["github-actions"]["total"] == 0
+    assert gzip.decompress(report.gzip_body) == report.body
+    app_report = get_rendered_report_data(name="github-actions")
+    assert json.loads(app_report.body)["total"] == 0
+    assert get_rendered_status_index().body.startswith(b"<!DOCTYPE html>")
+
+    # the reports are cached until the data changes
+    assert get_rendered_report_data() is report
+
+    # new data only shows up once the reports are old enough
+    update_data_check_run(_check_run_event("conda-forge/foo-feedstock"))
+    assert get_rendered_report_data() is report
+
+    monkeypatch.setattr(status_monitor, "REPORT_MIN_REBUILD_INTERVAL", 0)
+    new_report = get_rendered_report_data()
+    assert new_report.etag != report.etag
+    assert json.loads(new_report.body)["github-actions"]["total"] == 1
+    assert json.loads(new_report.body)["github-actions"]["repos"] == {
+        "conda-forge/foo-feedstock": 1
+    }
+    assert get_rendered_report_data() is new_report
+
+    # the rollups are updated too
+    report = get_rendered_report_data(resolution="hourly", window="7d")
+    assert len(json.loads(report.body)["github-actions"]["rates"]) == 7 * 24
+    assert json.loads(report.body)["github-actions"]["total"] == 1
+    assert get_rendered_report_data(resolution="hourly", window="7d") is report
+    report = get_rendered_report_data(name="github-actions", resolution="daily")
+    assert len(json.loads(report.body)["rates"]) == 365
+    assert json.loads(report.body)["total"] == 1
+
+
+@pytest.mark.parametrize(
+    "resolution,window,res",
+    [
+        (None, None, ("5min", NUM_STATUS_SLOTS)),
+        ("5min", "1h", ("5min", 12)),
+        ("5min", "12h", ("5min", NUM_STATUS_SLOTS)),
+        ("5min", "7m", ("5min", 2)),
+        ("hourly", None, ("hourly", 720)),
+        ("hourly", "7d", ("hourly", 168)),
+        ("daily", "30d", ("daily", 30)),
+        ("daily", "36h", ("daily", 2)),
+        ("5min", "13h", None),
+        ("hourly", "31d", None),
+        ("daily", "0d", None),
+        ("weekly", None, None),
+        ("daily", "1y", None),
+    ],
+)
+def test_parse_report_params(resolution, window, res):
+    if res is None:
+        with pytest.raises(ValueError):
+            _parse_report_params(resolution=resolution, window=window)
+    else:
+        assert _parse_report_params(resolution=resolution, window=window) == res
+
+
+def _make_app_data():
+    return {"github-actions": status_monitor._make_app_data()}
+
+
+def test_status_snapshot_roundtrip(monkeypatch, tmp_path):
+    monkeypatch.setattr(status_monitor, "APP_DATA", _make_app_data())
+    monkeypatch.setattr(
+        status_monitor, "_REPORT_CACHE", cachetools.LRUCache(maxsize=16)
+    )
+    for repo, duration in [("a", 60), ("b", 600), ("b", None)]:
+        update_data_check_run(
+            _check_run_event(f"conda-forge/{repo}-feedstock", duration, 30)
+        )
+    report = json.loads(get_rendered_report_data().body)
+    hourly_report = json.loads(get_rendered_report_data(resolution="hourly").body)
+
+    pth = str(tmp_path / "snapshot.json.gz")
+    status_monitor._write_status_snapshot(status_monitor.make_status_snapshot(), pth)
+
+    monkeypatch.setattr(status_monitor, "APP_DATA", _make_app_data())
+    status_monitor._load_status_snapshot(status_monitor._read_status_snapshot(pth))
+    assert json.loads(get_rendered_report_data().body) == report
+    assert (
+        json.loads(get_rendered_report_data(resolution="hourly").body) == hourly_report
+    )
+    assert report["github-actions"]["total"] == 3
+    assert report["github-actions"]["repos"] == {
+        "conda-forge/b-feedstock": 2,
+        "conda-forge/a-feedstock": 1,
+    }
+    assert report["github-actions"]["durations"]["count"] == 2
+    assert report["github-actions"]["queue_latencies"]["count"] == 2
+
+
+@pytest.mark.parametrize("kind", ["snapshot", "report", None])
+def test_warm_status_cache(monkeypatch, tmp_path, kind):
+    monkeypatch.setattr(status_monitor, "APP_DATA", _make_app_data())
+    monkeypatch.setattr(
+        status_monitor, "_REPORT_CACHE", cachetools.LRUCache(maxsize=16)
+    )
+    monkeypatch.setattr(status_monitor, "STATUS_CACHE_STATE", "warming")
+    monkeypatch.setattr(status_monitor, "REPORT_MIN_REBUILD_INTERVAL", 0)
+    pth = str(tmp_path / "snapshot.json.gz")
+    monkeypatch.setattr(status_monitor, "STATUS_SNAPSHOT_PATH", pth)
+
+    update_data_check_run(_check_run_event("conda-forge/a-feedstock"))
+    if kind == "snapshot":
+        status_monitor._write_status_snapshot(status_monitor.make_status_snapshot())
+    elif kind == "report":
+        data = json.loads(get_rendered_report_data().body)
+        monkeypatch.setattr(
+            status_monitor.requests,
+            "get",
+            lambda *args, **kwargs: mock.MagicMock(json=lambda: data),
+        )
+    else:
+        monkeypatch.setattr(
+            status_monitor.requests, "get", mock.MagicMock(side_effect=OSError)
+        )
+
+    fetched = status_monitor.fetch_status_cache_data()
+    assert fetched[0] == kind
+
+    # events that arrive while warming are kept
+    update_data_check_run(_check_run_event("conda-forge/b-feedstock"))
+    assert json.loads(get_rendered_report_data().body)["github-actions"]["total"] == 2
+
+    status_monitor.warm_status_cache(*fetched)
+    report = json.loads(get_rendered_report_data().body)["github-actions"]
+    if kind is None:
+        assert status_monitor.STATUS_CACHE_STATE == "failed"
+        assert report["total"] == 2
+    else:
+        assert status_monitor.STATUS_CACHE_STATE == "ready"
+        assert report["total"] == 3
+        assert report["repos"] == {
+            "conda-forge/a-feedstock": 2,
+            "conda-forge/b-feedstock": 1,
+        }
+
+
+def test_publish_status_data(monkeypatch, tmp_path):
+    for key, val in [("NAME", "test"), ("EMAIL", "test@example.com")]:
+        monkeypatch.setenv(f"GIT_AUTHOR_{key}", val)
+        monkeypatch.setenv(f"GIT_COMMITTER_{key}", val)
+
+    # make a local upstream repo with a main branch
+    upstream = str(tmp_path / "upstream.git")
+    seed = str(tmp_path / "seed")
+    status_monitor._run_git("init", "--bare", "-b", "main", upstream, cwd=tmp_path)
+    status_monitor._run_git("init", "-b", "main", seed, cwd=tmp_path)
+    (tmp_path / "seed" / "README.md").write_text("status data\n")
+    status_monitor._run_git("add", "README.md", cwd=seed)
+    status_monitor._run_git("commit", "-m", "init", cwd=seed)
+    status_monitor._run_git("push", upstream, "main", cwd=seed)
+
+    monkeypatch.setattr(status_monitor, "STATUS_REPO_URL", "file://" + upstream)
+    monkeypatch.setattr(
+        status_monitor, "STATUS_REPO_DIR", str(tmp_path / "data" / "wc")
+    )
+    monkeypatch.setattr(
+        status_monitor, "get_app_token_for_webservices_only", lambda: "abc"
+    )
+
+    def _upstream_log():
+        return status_monitor._run_git("log", "--oneline", cwd=upstream).stdout
+
+    status_monitor._publish_status_data(b'{"a": 1}')
+    assert len(_upstream_log().splitlines()) == 2
+    # the token is not stored in the working copy
+    assert "abc" not in (tmp_path / "data" / "wc" / ".git" / "config").read_text()
+
+    # no change means no commit and the working copy is reused
+    status_monitor._publish_status_data(b'{"a": 1}')
+    assert len(_upstream_log().splitlines()) == 2
+
+    status_monitor._publish_status_data(b'{"a": 2}')
+    assert len(_upstream_log().splitlines()) == 3
+    assert (tmp_path / "data").stat().st_mode & 0o777 == 0o700
+    latest = status_monitor._run_git(
+        "show", "main:data/latest.json", cwd=upstream
+    ).stdout
+    assert json.loads(latest) == {"a": 2}
+
+
+def test_refresh_service_statuses(monkeypatch):
+    statuses = iter(
+        [
+            {"status": "All good"},
+            {"status": "Partial System Outage"},
+            {"status": status_monitor.NOSTATUS},
+        ]
+    )
+
+    def _fetch_docker_status():
+        raise RuntimeError("no network")
+
+    monkeypatch.setattr(
+        status_monitor,
+        "SERVICE_STATUS_FETCHERS",
+        {"azure": lambda: next(statuses), "docker": _fetch_docker_status},
+    )
+    monkeypatch.setattr(
+        status_monitor,
+        "SERVICE_STATUS_DATA",
+        {
+            "azure": status_monitor.WEBS_STATUS_DATA,
+            "docker": status_monitor.WEBS_STATUS_DATA,
+        },
+    )
+
+    # nothing is fetched until the refresh runs
+    assert json.loads(status_monitor.get_azure_status()) == {
+        "status": status_monitor.NOSTATUS,
+        "updated_at": None,
+    }
+
+    status_monitor.refresh_service_statuses()
+    azure_status = json.loads(status_monitor.get_azure_status())
+    assert azure_status["status"] == "All good"
+    assert azure_status["updated_at"] is not None
+    docker_status = json.loads(status_monitor.get_docker_status())
+    assert docker_status["status"] == status_monitor.NOSTATUS
+    assert docker_status["updated_at"] is not None
+
+    status_monitor.refresh_service_statuses()
+    assert (
+        json.loads(status_monitor.get_azure_status())["status"]
+        == "Partial System Outage"
+    )
+
+    # failed fetches keep the last known status
+    status_monitor.SERVICE_STATUS_DATA["azure"]["updated_at"] = "old"
+    status_monitor.refresh_service_statuses()
+    assert json.loads(status_monitor.get_azure_status()) == {
+        "status": "Partial System Outage",
+        "updated_at": "old",
+    }
+
+
+@pytest.mark.parametrize("dist", ["uniform", "lognormal"])
+def test_log_histogram_quantiles(dist):
+    rng = random.Random(42)
+    if dist == "uniform":
+        values = [rng.uniform(1, 3600) for _ in range(10000)]
+    else:
+        values = [rng.lognormvariate(6, 1.5) for _ in range(10000)]
+
+    hist = LogHistogram()
+    other = LogHistogram()
+    for i, value in enumerate(values):
+        (hist if i % 2 else other).add(value)
+    hist.merge(other)
+    assert hist.count == len(values)
+
+    values = sorted(values)
+    for q in [0.5, 0.9, 0.99]:
+        true_value = values[int(q * (len(values) - 1))]
+        if true_value > 1:
+            assert abs(hist.quantile(q) - true_value) / true_value < 0.05
+
+    assert LogHistogram().quantile(0.5) is None
+
+
+def test_update_data_check_run_timings(monkeypatch):
+    monkeypatch.setattr(
+        status_monitor, "APP_DATA", {"github-actions": status_monitor._make_app_data()}
+    )
+    for duration, latency in [(60, 10), (120, 20), (600, 200), (None, None)]:
+        update_data_check_run(
+            _check_run_event("conda-forge/a-feedstock", duration, latency)
+        )
+
+    know = _make_time_key(datetime.datetime.now(tz=pytz.UTC))
+    durations = status_monitor.APP_DATA["github-actions"]["durations"].summary(know)
+    assert durations["count"] == 3
+    assert abs(durations["p50"] - 120) < 5
+    assert abs(durations["p99"] - 600) < 25
+    latencies = status_monitor.APP_DATA["github-actions"]["queue_latencies"]
+    assert latencies.summary(know)["count"] == 3
+    assert abs(latencies.summary(know)["p50"] - 20) < 1
+
+    # the window only covers the last twelve hours
+    assert latencies.summary(know + 13 * status_monitor.NUM_SLOTS_PER_HOUR) == {
+        "count": 0,
+        "p50": None,
+        "p90": None,
+        "p99": None,
+    }
+
+
+def test_status_listeners(monkeypatch):
+    monkeypatch.setattr(
+        status_monitor, "APP_DATA", {"github-actions": status_monitor._make_app_data()}
+    )
+    monkeypatch.setattr(status_monitor, "STATUS_LISTENERS", set())
+    deltas = []
+
+    def _bad_listener(delta):
+        raise RuntimeError("bad listener")
+
+    status_monitor.add_status_listener(deltas.append)
+    status_monitor.add_status_listener(_bad_listener)
+    update_data_check_run(_check_run_event("conda-forge/a-feedstock"))
+    update_data_check_run(_check_run_event("conda-forge/b-feedstock"))
+
+    assert [(d["app"], d["repo"]) for d in deltas] == [
+        ("github-actions", "conda-forge/a-feedstock"),
+        ("github-actions", "conda-forge/b-feedstock"),
+    ]
+    report = json.loads(status_monitor.dump_report_data(name="github-actions"))
+    assert report["rates"][deltas[-1]["slot"]] == deltas[-1]["count"]
+
+    status_monitor.remove_status_listener(deltas.append)
+    update_data_check_run(_check_run_event("conda-forge/a-feedstock"))
+    assert len(deltas) == 2
+
+
+def test_queue_and_process_status_events(monkeypatch):
+    monkeypatch.setattr(
+        status_monitor,
+        "APP_DATA",
+        {
+            "github-actions": status_monitor._make_app_data(),
+            "circleci": status_monitor._make_app_data(),
+        },
+    )
+    monkeypatch.setattr(status_monitor, "STATUS_EVENT_QUEUE", collections.deque())
+    invalidate = mock.MagicMock()
+    monkeypatch.setattr(status_monitor, "_invalidate_report_cache", invalidate)
+
+    status_event = {
+        "repository": {"full_name": "conda-forge/c-feedstock"},
+        "context": "ci/circleci: build",
+        "state": "success",
+        "updated_at": datetime.datetime.now(tz=pytz.UTC).isoformat(),
+    }
+    pending_status_event = {**status_event, "state": "pending"}
+
+    status_monitor.queue_status_event(_check_run_event("conda-forge/a", 60, 5), True)
+    status_monitor.queue_status_event(status_event, False)
+    status_monitor.queue_status_event(pending_status_event, False)
+    assert len(status_monitor.STATUS_EVENT_QUEUE) == 2
+    # queued events are only applied when processed
+    assert len(status_monitor.APP_DATA["github-actions"]["repos"]) == 0
+    invalidate.assert_not_called()
+
+    assert status_monitor.process_status_events(max_events=1) == 1
+    assert status_monitor.process_status_events() == 1
+    assert status_monitor.process_status_events() == 0
+    assert invalidate.call_count == 2
+
+    know = _make_time_key(datetime.datetime.now(tz=pytz.UTC))
+    for slug, repo in [
+        ("github-actions", "conda-forge/a"),
+        ("circleci", "conda-forge/c-feedstock"),
+    ]:
+        assert status_monitor.APP_DATA[slug]["repos"].top(1, know) == [(repo, 1)]
+        assert sum(status_monitor.APP_DATA[slug]["rates"].window(know)) == 1
+    durations = status_monitor.APP_DATA["github-actions"]["durations"]
+    assert durations.summary(know)["count"] == 1
+
+
+def test_cache_status_data_cli(monkeypatch):
+    monkeypatch.delenv("CF_WEBSERVICES_TEST", raising=False)
+    published = []
+    monkeypatch.setattr(status_monitor, "_publish_status_data", published.append)
+    with mock.patch("requests.get") as get:
+        get.return_value.content = b'{"a": 1}'
+        status_monitor.cache_status_data_cli()
+    get.assert_called_once_with("https://services.conda-forge.org/status-monitor/db")
+    assert published == [b'{"a": 1}']
@@ -1,12 +1,23 @@
+import base64
 import hmac
+import multiprocessing
 import os
 import tempfile
 import subprocess
+import threading
+import time
+from unittest import mock
 
 import pytest
 from flaky import flaky
 
+from .. import tokens
+from ..utils import credential_id
 from ..tokens import (
+    AppIntegration,
+    AppTokenManager,
+    CachedAppAuth,
+    GithubClientRegistry,
     generate_app_token_for_feedstock,
     inject_app_token_into_feedstock,
     inject_app_token_into_feedstock_readonly,
@@ -120,3 +131,277 @@ def test_inject_app_token_into_feedstock(token_repo):
 def test_inject_app_token_into_feedstock_readonly(token_repo):
     res = inject_app_token_into_feedstock_readonly("conda-forge/" + token_repo)
     assert not res
+
+
+def _mock_token_generation(monkeypatch, lifetime):
+    calls = []
+
+    def _gen(app_id, raw_pem):
+        calls.append(app_id)
+        return f"token-{len(calls)}", time.time() + lifetime
+
+    monkeypatch.setenv("CF_WEBSERVICES_APP_ID", "1")
+    monkeypatch.setenv("CF_WEBSERVICES_PRIVATE_KEY", "pem")
+    monkeypatch.setattr(tokens, "_generate_app_token_for_webservices_only", _gen)
+    return calls
+
+
+def test_app_token_manager_caches(monkeypatch, tmp_path):
+    calls = _mock_token_generation(monkeypatch, 3600)
+    mgr = AppTokenManager(str(tmp_path / "token.json"))
+
+    assert mgr.get_token() == "token-1"
+    assert mgr.get_token() == "token-1"
+    assert len(calls) == 1
+
+
+def test_app_token_manager_refreshes_in_background(monkeypatch, tmp_path):
+    calls = _mock_token_generation(monkeypatch, tokens.APP_TOKEN_REFRESH_MARGIN - 10)
+    mgr = AppTokenManager(str(tmp_path / "token.json"))
+
+    assert mgr.get_token() == "token-1"
+
+    # the token is close to expiring so the caller gets it right away and
+    # a new one is made in the background
+    with mock.patch.object(tokens.threading, "Thread") as thread:
+        assert mgr.get_token() == "token-1"
+        thread.assert_called_once()
+        thread.return_value.start.assert_called_once()
+    assert len(calls) == 1
+
+    mgr._refresh_in_background()
+    assert len(calls) == 2
+    assert mgr._token == "token-2"
+    assert not mgr._refreshing
+
+
+def test_app_token_manager_blocks_on_expired_token(monkeypatch, tmp_path):
+    calls = _mock_token_generation(monkeypatch, 3600)
+    mgr = AppTokenManager(str(tmp_path / "token.json"))
+
+    assert mgr.get_token() == "token-1"
+    mgr._expires_at = time.time() + tokens.APP_TOKEN_MIN_LIFETIME - 1
+    # the shared file still has the old expiry so force it to be stale too
+    mgr._write_shared_token("token-1", mgr._expires_at)
+    assert mgr.get_token() == "token-2"
+    assert len(calls) == 2
+
+
+def test_app_token_manager_shares_tokens(monkeypatch, tmp_path):
+    calls = _mock_token_generation(monkeypatch, 3600)
+    cache_path = str(tmp_path / "token.json")
+    mgr1 = AppTokenManager(cache_path)
+    mgr2 = AppTokenManager(cache_path)
+
+    assert mgr1.get_token() == "token-1"
+    assert mgr2.get_token() == "token-1"
+    assert len(calls) == 1
+    assert oct(os.stat(cache_path).st_mode & 0o777) == oct(0o600)
+
+
+def test_app_token_manager_fork_during_refresh(monkeypatch, tmp_path):
+    calls = []
+    minting = threading.Event()
+    release = threading.Event()
+
+    def _gen(app_id, raw_pem):
+        calls.append(app_id)
+        minting.set()
+        release.wait(10)
+        return f"token-{len(calls)}", time.time() + 3600
+
+    monkeypatch.setenv("CF_WEBSERVICES_APP_ID", "1")
+    monkeypatch.setenv("CF_WEBSERVICES_PRIVATE_KEY", "pem")
+    monkeypatch.setattr(tokens, "_generate_app_token_for_webservices_only", _gen)
+    mgr = AppTokenManager(str(tmp_path / "token.json"))
+
+    refresher = threading.Thread(target=mgr.refresh)
+    refresher.start()
+    assert minting.wait(10)
+
+    # a child forked while the token is being minted waits for the file lock
+    # and then picks up the token instead of hanging
+    ctx = multiprocessing.get_context("fork")
+    queue = ctx.Queue()
+    child = ctx.Process(target=lambda: queue.put(mgr.get_token()), daemon=True)
+    child.start()
+    release.set()
+    refresher.join(10)
+    child.join(10)
+    assert child.exitcode == 0
+    assert queue.get(timeout=1) == "token-1"
+    assert len(calls) == 1
+
+
+def test_app_token_manager_failure(monkeypatch, tmp_path):
+    monkeypatch.setenv("CF_WEBSERVICES_APP_ID", "1")
+    monkeypatch.setenv("CF_WEBSERVICES_PRIVATE_KEY", "pem")
+    monkeypatch.setattr(
+        tokens,
+        "_generate_app_token_for_webservices_only",
+        lambda app_id, raw_pem: (None, 0.0),
+    )
+    mgr = AppTokenManager(str(tmp_path / "token.json"))
+    assert mgr.get_token() is None
+    assert not os.path.exists(tmp_path / "token.json")
+
+
+def test_github_client_registry():
+    app_tokens = ["app-1"]
+    registry = GithubClientRegistry(
+        {
+            "webservices": lambda: app_tokens[-1],
+            "bot": lambda: "bot-token",
+        }
+    )
+
+    gh = registry.get_client("webservices")
+    assert registry.get_client("webservices") is gh
+    bot_gh = registry.get_client("bot")
+    assert bot_gh is not gh
+    assert registry.get_client("bot") is bot_gh
+
+    # a refreshed app token gets a new client
+    app_tokens.append("app-2")
+    new_gh = registry.get_client("webservices")
+    assert new_gh is not gh
+    assert registry.get_client("webservices") is new_gh
+
+    stats = registry.stats()
+    assert {k: stats["webservices"][k] for k in ["created", "reused", "rotated"]} == {
+        "created": 2,
+        "reused": 2,
+        "rotated": 1,
+    }
+    assert {k: stats["bot"][k] for k in ["created", "reused", "rotated"]} == {
+        "created": 1,
+        "reused": 1,
+        "rotated": 0,
+    }
+    # the rate limits are reported per role
+    assert credential_id("token app-2") == "webservices"
+    assert credential_id("Bearer bot-token") == "bot"
+
+    with pytest.raises(KeyError):
+        registry.get_client("admin")
+
+
+def test_feedstock_token_cache(monkeypatch):
+    calls = []
+    lifetime = [3600]
+
+    def _gen(app_id, raw_pem, repo, readonly=False):
+        calls.append((app_id, repo, readonly))
+        return f"token-{len(calls)}", time.time() + lifetime[0]
+
+    monkeypatch.setattr(tokens, "_generate_app_token_for_feedstock", _gen)
+    monkeypatch.setattr(tokens, "FEEDSTOCK_TOKEN_CACHE", tokens.cachetools.LRUCache(2))
+
+    assert generate_app_token_for_feedstock("1", b"pem", "a-feedstock") == "token-1"
+    assert generate_app_token_for_feedstock("1", b"pem", "a-feedstock") == "token-1"
+    assert (
+        generate_app_token_for_feedstock("1", b"pem", "a-feedstock", readonly=True)
+        == "token-2"
+    )
+    assert calls == [("1", "a-feedstock", False), ("1", "a-feedstock", True)]
+
+    # other apps get their own tokens
+    assert generate_app_token_for_feedstock("2", b"pem", "a-feedstock") == "token-3"
+    assert calls[-1] == ("2", "a-feedstock", False)
+
+    # tokens that expire too soon are replaced
+    lifetime[0] = tokens.FEEDSTOCK_TOKEN_MIN_LIFETIME - 60
+    assert generate_app_token_for_feedstock("1", b"pem", "b-feedstock") == "token-4"
+    assert generate_app_token_for_feedstock("1", b"pem", "b-feedstock") == "token-5"
+
+    # the cache is bounded
+    assert ("1", "a-feedstock", False) not in tokens.FEEDSTOCK_TOKEN_CACHE
+
+
+def _make_pem():
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+
+def test_app_integration_caches_installation_ids():
+    pem = _make_pem()
+    app = AppIntegration("1", pem)
+    with mock.patch.object(app.integration, "get_repo_installation") as get_inst:
+        get_inst.return_value.id = 5
+        assert app.get_repo_installation_id("a-feedstock") == 5
+        assert app.get_repo_installation_id("a-feedstock") == 5
+        get_inst.assert_called_once_with("conda-forge", "a-feedstock")
+
+        app.forget_repo_installation_id("a-feedstock")
+        assert app.get_repo_installation_id("a-feedstock") == 5
+        assert get_inst.call_count == 2
+
+    # base64 encoded keys work too
+    AppIntegration("1", base64.b64encode(pem))
+
+
+def test_cached_app_auth_reuses_jwt():
+    import jwt
+
+    pem = _make_pem()
+    auth = CachedAppAuth("1", pem.decode())
+
+    token = auth.token
+    assert auth.token == token
+    assert auth.jwts_signed == 1
+    payload = jwt.decode(token, options={"verify_signature": False})
+    assert payload["iss"] == "1"
+    assert payload["exp"] - payload["iat"] == tokens.APP_JWT_EXPIRY + 60
+
+    # the JWT is signed again once it is close to expiring
+    now = time.time()
+    with mock.patch("time.time") as mock_time:
+        mock_time.return_value = (
+            now + tokens.APP_JWT_EXPIRY - tokens.APP_JWT_REFRESH_MARGIN + 1
+        )
+        auth.token
+    assert auth.jwts_signed == 2
+
+
+def test_app_integration_caches_org_installation_id():
+    pem = _make_pem()
+    app = AppIntegration("1", pem)
+    with (
+        mock.patch.object(app.integration, "get_org_installation") as get_inst,
+        mock.patch.object(
+            tokens.GithubIntegration, "get_access_token"
+        ) as get_access_token,
+        mock.patch.object(tokens, "_get_app_integration", return_value=app),
+    ):
+        get_inst.return_value.id = 7
+        get_access_token.return_value.token = "abc"
+        get_access_token.return_value.expires_at = None
+
+        for _ in range(3):
+            token, expires_at = tokens._generate_app_token_for_webservices_only(
+                "1", pem
+            )
+            assert token == "abc"
+            assert expires_at > time.time()
+
+        # each refresh is a single API call
+        get_inst.assert_called_once_with("conda-forge")
+        assert get_access_token.call_count == 3
+        get_access_token.assert_called_with(7, permissions=None)
+
+        # errors drop the installation id in case the app was reinstalled
+        get_access_token.side_effect = RuntimeError("boom")
+        assert tokens._generate_app_token_for_webservices_only("1", pem) == (
+            None,
+            0.0,
+        )
+        get_access_token.side_effect = None
+        tokens._generate_app_token_for_webservices_only("1", pem)
+        assert get_inst.call_count == 2
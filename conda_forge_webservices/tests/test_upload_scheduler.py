@@ -0,0 +1,96 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conda_forge_webservices.upload_scheduler import FairUploadScheduler
+
+
+def _run_jobs(jobs, max_workers, max_per_feedstock, quantum):
+    order = []
+    gate = threading.Event()
+
+    def _job(feedstock, i):
+        gate.wait()
+        order.append((feedstock, i))
+        return feedstock, i
+
+    async def _main():
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            sched = FairUploadScheduler(
+                pool,
+                max_workers,
+                max_per_feedstock=max_per_feedstock,
+                quantum=quantum,
+            )
+            tasks = [
+                asyncio.ensure_future(sched.submit(fs, cost, _job, fs, i))
+                for i, (fs, cost) in enumerate(jobs)
+            ]
+            await asyncio.sleep(0)
+            running = sched.stats()["running_per_feedstock"]
+            gate.set()
+            results = await asyncio.gather(*tasks)
+            return results, running, sched.stats()
+
+    return asyncio.run(_main()), order
+
+
+def test_upload_scheduler_results():
+    jobs = [("a", 1), ("b", 1), ("a", 3)]
+    (results, _, stats), _ = _run_jobs(
+        jobs, max_workers=2, max_per_feedstock=2, quantum=1
+    )
+    assert results == [("a", 0), ("b", 1), ("a", 2)]
+    assert stats["running"] == 0
+    assert stats["queued"] == {}
+    assert stats["wait_time"]["count"] == 3
+    assert stats["wait_time_per_feedstock"]["a"]["count"] == 2
+
+
+def test_upload_scheduler_per_feedstock_cap():
+    jobs = [("big", 1)] * 10 + [("small", 1)]
+    (_, running, _), order = _run_jobs(
+        jobs, max_workers=4, max_per_feedstock=2, quantum=1
+    )
+    # the big feedstock cannot take more than two workers so the
+    # small one gets started right away
+    assert running == {"big": 2, "small": 1}
+    assert ("small", 10) in order
+
+
+@pytest.mark.parametrize("quantum", [1, 4])
+def test_upload_scheduler_round_robin(quantum):
+    jobs = [("big", 1)] * 8 + [("small", 1)] * 2
+    (_, _, _), order = _run_jobs(
+        jobs, max_workers=1, max_per_feedstock=1, quantum=quantum
+    )
+    fs_order = [fs for fs, _ in order]
+    # the first job starts right away and after that the small feedstock
+    # only waits for at most one quantum of the big feedstock's jobs
+    assert fs_order[0] == "big"
+    assert fs_order.index("small") <= 1 + quantum
+    assert fs_order[1:].count("small") == 2
+    assert max(i for i, fs in enumerate(fs_order) if fs == "small") <= 2 + 2 * quantum
+
+
+def test_upload_scheduler_cost():
+    jobs = [("big", 4), ("big", 4), ("small", 1)]
+    (_, _, _), order = _run_jobs(jobs, max_workers=1, max_per_feedstock=1, quantum=1)
+    # the small job is cheap so it gets through before the second big one
+    assert [fs for fs, _ in order] == ["big", "small", "big"]
+
+
+def test_upload_scheduler_exception():
+    def _fail():
+        raise RuntimeError("bad copy")
+
+    async def _main():
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            sched = FairUploadScheduler(pool, 1)
+            with pytest.raises(RuntimeError):
+                await sched.submit("a", 1, _fail)
+            assert sched.stats()["running"] == 0
+
+    asyncio.run(_main())
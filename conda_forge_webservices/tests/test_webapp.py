@@ -1,6 +1,7 @@
 import json
 import hmac
 import os
+import gzip
 import hashlib
 
 from urllib.parse import urlencode
@@ -609,3 +610,35 @@ class TestBucketHandler(TestHandlerBase):
             )
             if full_name is not None and token is not None:
                 linting_mock.assert_any_call(full_name, 10, sha="xyz3123")
+
+
+class TestStatusMonitorHandler(TestHandlerBase):
+    def test_report_etags(self):
+        url = "/status-monitor/db"
+        # the client asks for gzip unless it is told not to decompress
+        plain = self.fetch(
+            url, headers={"Accept-Encoding": "identity"}, decompress_response=False
+        )
+        gzipped = self.fetch(
+            url, headers={"Accept-Encoding": "gzip"}, decompress_response=False
+        )
+        self.assertEqual(plain.code, 200)
+        self.assertEqual(gzipped.code, 200)
+        self.assertEqual(gzipped.headers["Content-Encoding"], "gzip")
+        self.assertEqual(gzipped.headers["Vary"], "Accept-Encoding")
+        self.assertEqual(gzip.decompress(gzipped.body), plain.body)
+
+        # each encoding only revalidates against its own ETag
+        self.assertNotEqual(plain.headers["Etag"], gzipped.headers["Etag"])
+        for encoding, etag, code in [
+            ("identity", plain.headers["Etag"], 304),
+            ("identity", gzipped.headers["Etag"], 200),
+            ("gzip", gzipped.headers["Etag"], 304),
+            ("gzip", plain.headers["Etag"], 200),
+        ]:
+            response = self.fetch(
+                url,
+                headers={"Accept-Encoding": encoding, "If-None-Match": etag},
+                decompress_response=False,
+            )
+            self.assertEqual(response.code, code, msg=f"{encoding}: {etag}")
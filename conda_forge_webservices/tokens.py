@@ -1,91 +1,319 @@
 import time
 import base64
+import datetime
+import fcntl
+import json
 import os
 import io
 import sys
 import logging
+import tempfile
+import threading
 from contextlib import redirect_stdout, redirect_stderr
 from functools import lru_cache
 
-from typing import Any
-
+import cachetools
+import jwt
+from cryptography.hazmat.primitives.serialization import load_pem_private_key
 from github import (
     Auth,
-    Github,
     GithubIntegration,
     GithubException,
 )
 from github.InstallationAuthorization import InstallationAuthorization
 
-from conda_forge_webservices.utils import log_title_and_message_at_level
+from conda_forge_webservices.rate_limits import make_tracked_github_client
+from conda_forge_webservices.utils import (
+    label_credential,
+    log_title_and_message_at_level,
+)
 
 LOGGER = logging.getLogger("conda_forge_webservices.tokens")
 
-FEEDSTOCK_TOKEN_RESET_TIMES: dict[str, Any] = {}
-READONLY_FEEDSTOCK_TOKEN_RESET_TIMES: dict[str, Any] = {}
-APP_TOKEN_RESET_TIME = None
+# feedstock tokens are reused while they have at least this much time left
+# so that a rerender or version update can finish with them
+FEEDSTOCK_TOKEN_MIN_LIFETIME = 30 * 60
+# (app_id, repo, readonly) -> (token, expires_at)
+FEEDSTOCK_TOKEN_CACHE: cachetools.LRUCache[tuple[str, str, bool], tuple[str, float]] = (
+    cachetools.LRUCache(maxsize=256)
+)
+FEEDSTOCK_TOKEN_CACHE_LOCK = threading.Lock()
+# (repo, readonly) -> the token last pushed to the repo secrets
+INJECTED_FEEDSTOCK_TOKENS: cachetools.LRUCache[tuple[str, bool], str] = (
+    cachetools.LRUCache(maxsize=256)
+)
+
+# app tokens are refreshed in the background once they have less than
+# APP_TOKEN_REFRESH_MARGIN seconds left and are never handed out with less
+# than APP_TOKEN_MIN_LIFETIME seconds left
+APP_TOKEN_REFRESH_MARGIN = 15 * 60
+APP_TOKEN_MIN_LIFETIME = 60
+# app JWTs can live for at most 10 minutes and are re-signed once they have
+# less than a minute left
+APP_JWT_EXPIRY = 9 * 60
+APP_JWT_REFRESH_MARGIN = 60
+# the token is shared with worker processes through this file, one per user
+# and app so that apps on the same host never see each other's tokens
+APP_TOKEN_CACHE_PATH = os.environ.get(
+    "CF_WEBSERVICES_APP_TOKEN_CACHE_PATH",
+    os.path.join(
+        tempfile.gettempdir(),
+        "cf-webservices-app-token-{}-{}.json".format(
+            os.getuid(), os.environ.get("CF_WEBSERVICES_APP_ID", "none")
+        ),
+    ),
+)
+
+
+class GithubClientRegistry:
+    """Shared PyGithub clients keyed on the role of their credentials.
+
+    Clients are reused for as long as the token of their role stays the same,
+    so their connection pools are too. When the token changes (e.g., the app
+    token is refreshed), a new client is made for the role. Clients that were
+    replaced are not closed since other threads may still be using them.
+
+    Parameters
+    ----------
+    roles : dict
+        A dict mapping each role to a function that returns its current token.
+    """
+
+    def __init__(self, roles):
+        self.roles = roles
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._stats = {}
+
+    def get_client(self, role):
+        """Get the client for `role`."""
+        token = self.roles[role]()
+
+        with self._lock:
+            stats = self._stats.setdefault(
+                role, {"created": 0, "reused": 0, "rotated": 0, "created_at": None}
+            )
+            current = self._clients.get(role)
+            if current is not None and current[0] == token:
+                stats["reused"] += 1
+                return current[1]
+
+            if current is not None:
+                stats["rotated"] += 1
+            gh = make_tracked_github_client(auth=Auth.Token(token))
+            label_credential(token, role)
+            self._clients[role] = (token, gh)
+            stats["created"] += 1
+            stats["created_at"] = time.time()
+            return gh
+
+    def stats(self):
+        """Return a JSON-serializable snapshot of the client metrics per role."""
+        with self._lock:
+            return {role: dict(stats) for role, stats in self._stats.items()}
+
+
+GH_CLIENT_REGISTRY = GithubClientRegistry(
+    {
+        # the webservices app - use this one unless you need a real user
+        "webservices": lambda: get_app_token_for_webservices_only(),
+        # the conda-forge-curator bot
+        "bot": lambda: os.environ["GH_TOKEN"],
+        # the autotick bot
+        "autotick-bot": lambda: os.environ["AUTOTICK_BOT_GH_TOKEN"],
+    }
+)
+
+
+def get_gh_client(role="webservices"):
+    """Get a shared PyGithub client.
+
+    Parameters
+    ----------
+    role : str, optional
+        The credentials to use. One of "webservices" (the webservices app),
+        "bot" (`GH_TOKEN`) or "autotick-bot" (`AUTOTICK_BOT_GH_TOKEN`). Default
+        is "webservices".
+
+    Returns
+    -------
+    gh : github.Github
+        The client.
+    """
+    return GH_CLIENT_REGISTRY.get_client(role)
+
+
+def get_gh_client_stats():
+    """Get the metrics of the shared PyGithub clients per role."""
+    return GH_CLIENT_REGISTRY.stats()
+
+
+class AppTokenManager:
+    """Cache for the webservices app token that refreshes it before it expires.
+
+    The token and its expiry are shared between processes through a file at
+    `cache_path` (guarded by a file lock) so that only one process mints a new
+    token and the others pick it up. Callers only block when there is no
+    usable token at all. Otherwise tokens close to expiring are refreshed in a
+    background thread.
+
+    The file lock also serializes the threads of a process, so no threading
+    lock is held while a token is minted. The worker pools fork, and a child
+    forked during a refresh would otherwise start with a lock that is never
+    released.
+
+    Parameters
+    ----------
+    cache_path : str
+        The path to the file used to share the token between processes.
+    """
 
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._token = None
+        self._expires_at = 0.0
+        self._refreshing = False
+        self._refresher = None
+
+    def _read_shared_token(self):
+        try:
+            with open(self.cache_path) as fp:
+                data = json.load(fp)
+            return data["token"], data["expires_at"]
+        except Exception:
+            return None, 0.0
+
+    def _write_shared_token(self, token, expires_at):
+        tmp_path = self.cache_path + f".{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as fp:
+            json.dump({"token": token, "expires_at": expires_at}, fp)
+        os.replace(tmp_path, self.cache_path)
+
+    def refresh(self, force=False):
+        """Refresh the token unless another thread or process already has.
+
+        Parameters
+        ----------
+        force : bool, optional
+            If True, always make a new token. Default is False.
+        """
+        # each call opens the lock file itself so that flock also serializes
+        # the threads of this process
+        fd = os.open(self.cache_path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+
+            token, expires_at = self._read_shared_token()
+            if force or expires_at - time.time() <= APP_TOKEN_REFRESH_MARGIN:
+                token, expires_at = _generate_app_token_for_webservices_only(
+                    os.environ["CF_WEBSERVICES_APP_ID"],
+                    os.environ["CF_WEBSERVICES_PRIVATE_KEY"].encode(),
+                )
+                if token is None:
+                    log_title_and_message_at_level(
+                        level="info",
+                        title="app token could not be made",
+                    )
+                    return
+                self._write_shared_token(token, expires_at)
+
+            self._token = token
+            self._expires_at = expires_at
+        finally:
+            # an explicit unlock also releases copies of fd in forked children
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            LOGGER.warning(f"app token refresh failed: {e!r}")
+        finally:
+            self._refreshing = False
+
+    def get_token(self):
+        """Get the token, refreshing it if needed.
+
+        Returns
+        -------
+        token : str or None
+            The token or None if one could not be made.
+        """
+        time_left = self._expires_at - time.time()
+        if self._token is not None and time_left > APP_TOKEN_MIN_LIFETIME:
+            if time_left <= APP_TOKEN_REFRESH_MARGIN and not self._refreshing:
+                self._refreshing = True
+                threading.Thread(
+                    target=self._refresh_in_background, daemon=True
+                ).start()
+            return self._token
+
+        self.refresh()
+        if self._expires_at - time.time() <= APP_TOKEN_MIN_LIFETIME:
+            return None
+        return self._token
+
+    def _run_refresher(self, interval):
+        while True:
+            try:
+                if self._expires_at - time.time() <= APP_TOKEN_REFRESH_MARGIN:
+                    self.refresh()
+            except Exception as e:
+                LOGGER.warning(f"app token refresh failed: {e!r}")
+            time.sleep(interval)
+
+    def start_refresher(self, interval=60):
+        """Start a daemon thread that keeps the token fresh even when it is not
+        being used."""
+        with self._lock:
+            if self._refresher is None:
+                self._refresher = threading.Thread(
+                    target=self._run_refresher,
+                    args=(interval,),
+                    daemon=True,
+                )
+                self._refresher.start()
 
-@lru_cache(maxsize=1)
-def _get_gh_client(token):
-    return Github(auth=Auth.Token(token))
+    def _reset_after_fork(self):
+        # threads do not survive a fork, so the child starts with fresh locks
+        # and without a refresher
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._refresher = None
 
 
-def get_gh_client():
-    return _get_gh_client(get_app_token_for_webservices_only())
+APP_TOKEN_MANAGER = AppTokenManager(APP_TOKEN_CACHE_PATH)
+os.register_at_fork(after_in_child=APP_TOKEN_MANAGER._reset_after_fork)
 
 
 def get_app_token_for_webservices_only():
     """Get's an app token that should only be used in the webservices bot.
 
-    This function caches the token and only returns a new one when the current
-    one is expired or about to expire in the next minute.
+    This function caches the token and refreshes it in the background before
+    it expires. It only blocks when there is no token with at least a minute
+    left on it.
 
     Returns
     -------
     token: str
         The app token.
     """
-    global APP_TOKEN_RESET_TIME
-    global APP_TOKEN
-
-    # add a minute to make sure token doesn't expire
-    # while we are using it
-    now = time.time()
-    now_plus_1min = now + 60
-    if APP_TOKEN_RESET_TIME is None or APP_TOKEN_RESET_TIME <= now_plus_1min:
-        token = generate_app_token_for_webservices_only(
-            os.environ["CF_WEBSERVICES_APP_ID"],
-            os.environ["CF_WEBSERVICES_PRIVATE_KEY"].encode(),
-        )
-        if token is not None:
-            try:
-                APP_TOKEN_RESET_TIME = Github(
-                    auth=Auth.Token(token)
-                ).rate_limiting_resettime
-            except Exception:
-                log_title_and_message_at_level(
-                    level="info",
-                    title="app token did not generate proper reset time",
-                )
-                token = None
-        else:
-            log_title_and_message_at_level(
-                level="info",
-                title="app token could not be made",
-            )
+    token = APP_TOKEN_MANAGER.get_token()
 
-        APP_TOKEN = token
-    else:
-        pass
-        # log_title_and_message_at_level(
-        #     level="info",
-        #     title=f"app token exists - timeout {(APP_TOKEN_RESET_TIME - now) / 60}m",
-        # )
+    assert token is not None, "app token is None!"
+    # the token is also used outside of PyGithub so label it for the rate
+    # limit budgets here
+    label_credential(token, "webservices")
+
+    return token
 
-    assert APP_TOKEN is not None, "app token is None!"
 
-    return APP_TOKEN
+def start_app_token_refresher():
+    """Start refreshing the webservices app token in the background."""
+    APP_TOKEN_MANAGER.start_refresher()
 
 
 def generate_app_token_for_webservices_only(app_id, raw_pem):
@@ -103,67 +331,42 @@ def generate_app_token_for_webservices_only(app_id, raw_pem):
     gh_token : str
         The github token. May return None if there is an error.
     """
-    if "GITHUB_ACTIONS" in os.environ and os.environ["GITHUB_ACTIONS"] == "true":
-        sys.stdout.flush()
-        print(
-            "running in GitHub Actions",
-            flush=True,
-        )
-        print(f"::add-mask::{raw_pem}", flush=True)
+    return _generate_app_token_for_webservices_only(app_id, raw_pem)[0]
 
-    try:
-        f = io.StringIO()
-        if raw_pem[0:1] != b"-":
-            with redirect_stdout(f), redirect_stderr(f):
-                raw_pem = base64.b64decode(raw_pem)
-            if (
-                "GITHUB_ACTIONS" in os.environ
-                and os.environ["GITHUB_ACTIONS"] == "true"
-            ):
-                sys.stdout.flush()
-                print("base64 decoded PEM", flush=True)
-                print(f"::add-mask::{raw_pem}", flush=True)
-
-        if isinstance(raw_pem, bytes):
-            with redirect_stdout(f), redirect_stderr(f):
-                raw_pem = raw_pem.decode()
-            if (
-                "GITHUB_ACTIONS" in os.environ
-                and os.environ["GITHUB_ACTIONS"] == "true"
-            ):
-                sys.stdout.flush()
-                print("utf-8 decoded PEM", flush=True)
-                print(f"::add-mask::{raw_pem}", flush=True)
-
-        with redirect_stdout(f), redirect_stderr(f):
-            gh_auth = Auth.AppAuth(app_id=app_id, private_key=raw_pem)
-        if "GITHUB_ACTIONS" in os.environ and os.environ["GITHUB_ACTIONS"] == "true":
-            sys.stdout.flush()
-            print("loaded Github Auth", flush=True)
-
-        with redirect_stdout(f), redirect_stderr(f):
-            integration = GithubIntegration(auth=gh_auth)
-        if "GITHUB_ACTIONS" in os.environ and os.environ["GITHUB_ACTIONS"] == "true":
-            sys.stdout.flush()
-            print("loaded Github Integration", flush=True)
 
-        with redirect_stdout(f), redirect_stderr(f):
-            installation = integration.get_org_installation("conda-forge")
-        if "GITHUB_ACTIONS" in os.environ and os.environ["GITHUB_ACTIONS"] == "true":
-            sys.stdout.flush()
-            print("found Github installation", flush=True)
+def _generate_app_token_for_webservices_only(app_id, raw_pem):
+    app = None
+    try:
+        app = _get_app_integration(app_id, raw_pem)
+        installation_id = app.get_org_installation_id("conda-forge")
 
+        f = io.StringIO()
         with redirect_stdout(f), redirect_stderr(f):
-            gh_token = integration.get_access_token(installation.id).token
+            gh_token_data = app.integration.get_access_token(installation_id)
+            gh_token = gh_token_data.token
+            expires_at = _expires_at_to_timestamp(gh_token_data.expires_at)
         if "GITHUB_ACTIONS" in os.environ and os.environ["GITHUB_ACTIONS"] == "true":
             sys.stdout.flush()
             print("made GITHUB token and masking it for GitHub Actions", flush=True)
             print(f"::add-mask::{gh_token}", flush=True)
 
     except Exception:
+        # the app may have been reinstalled on the org
+        if app is not None:
+            app.forget_org_installation_id("conda-forge")
         gh_token = None
+        expires_at = 0.0
+
+    return gh_token, expires_at
 
-    return gh_token
+
+def _expires_at_to_timestamp(expires_at):
+    # installation tokens last an hour if github does not tell us
+    if expires_at is None:
+        return time.time() + 60 * 60
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=datetime.timezone.utc)
+    return expires_at.timestamp()
 
 
 def inject_app_token_into_feedstock(full_name, repo=None):
@@ -213,66 +416,52 @@ def _inject_app_token_into_feedstock(full_name, repo=None, readonly=False):
     if not repo_name.endswith("-feedstock"):
         return False
 
-    global FEEDSTOCK_TOKEN_RESET_TIMES
-    global READONLY_FEEDSTOCK_TOKEN_RESET_TIMES
-
     if readonly:
-        reset_times_dict = READONLY_FEEDSTOCK_TOKEN_RESET_TIMES
         token_name = "READONLY_GITHUB_TOKEN"
     else:
-        reset_times_dict = FEEDSTOCK_TOKEN_RESET_TIMES
         token_name = "RERENDERING_GITHUB_TOKEN"
 
-    now = time.time()
-    now_plus_30min = now + 30 * 60
-    if reset_times_dict.get(repo_name, now_plus_30min) <= now_plus_30min:
-        token = generate_app_token_for_feedstock(
-            os.environ["CF_WEBSERVICES_FEEDSTOCK_APP_ID"],
-            os.environ["CF_WEBSERVICES_FEEDSTOCK_PRIVATE_KEY"].encode(),
-            repo_name,
-            readonly=readonly,
+    token, expires_at = _get_app_token_for_feedstock(
+        os.environ["CF_WEBSERVICES_FEEDSTOCK_APP_ID"],
+        os.environ["CF_WEBSERVICES_FEEDSTOCK_PRIVATE_KEY"].encode(),
+        repo_name,
+        readonly=readonly,
+    )
+    if token is None:
+        log_title_and_message_at_level(
+            level="info",
+            title=f"app token could not be made for {repo_name}",
         )
-        if token is not None:
-            if repo is None:
-                gh = get_gh_client()
-                repo = gh.get_repo(full_name)
-            try:
-                repo.create_secret(token_name, token)
-                reset_times_dict[repo_name] = Github(
-                    auth=Auth.Token(token)
-                ).rate_limiting_resettime
-                log_title_and_message_at_level(
-                    level="info",
-                    title=(
-                        f"injected app token for repo {repo_name} - "
-                        f"timeout {(reset_times_dict[repo_name] - now) / 60}m"
-                    ),
-                )
-                worked = True
-            except Exception:
-                log_title_and_message_at_level(
-                    level="info",
-                    title=f"app token could not be pushed to secrets for {repo_name}",
-                )
-                worked = False
-
-            return worked
-        else:
-            LOGGER.info("")
-            LOGGER.info("===================================================")
-            LOGGER.info("app token could not be made for %s", repo_name)
-            LOGGER.info("===================================================")
-            return False
-    else:
+        return False
+
+    timeout = (expires_at - time.time()) / 60
+    if INJECTED_FEEDSTOCK_TOKENS.get((repo_name, readonly)) == token:
         log_title_and_message_at_level(
             level="info",
-            title=(
-                f"app token exists for repo {repo_name} "
-                f"- timeout {(reset_times_dict[repo_name] - now) / 60}m"
-            ),
+            title=f"app token exists for repo {repo_name} - timeout {timeout}m",
         )
         return True
 
+    if repo is None:
+        gh = get_gh_client()
+        repo = gh.get_repo(full_name)
+    try:
+        repo.create_secret(token_name, token)
+        INJECTED_FEEDSTOCK_TOKENS[repo_name, readonly] = token
+        log_title_and_message_at_level(
+            level="info",
+            title=f"injected app token for repo {repo_name} - timeout {timeout}m",
+        )
+        worked = True
+    except Exception:
+        log_title_and_message_at_level(
+            level="info",
+            title=f"app token could not be pushed to secrets for {repo_name}",
+        )
+        worked = False
+
+    return worked
+
 
 # see https://github.com/PyGithub/PyGithub/issues/3037 for why we do this
 class MyGithubIntegration(GithubIntegration):
@@ -286,6 +475,11 @@ class MyGithubIntegration(GithubIntegration):
         :calls: `POST /app/installations/{installation_id}/access_tokens
         <https://docs.github.com/en/rest/apps/apps#create-an-installation-access-token-for-an-app>`
         """
+        if repositories is None:
+            # keep the request of the upstream implementation for tokens
+            # that are not scoped to repos
+            return super().get_access_token(installation_id, permissions=permissions)
+
         if permissions is None:
             permissions = {}
 
@@ -310,9 +504,179 @@ class MyGithubIntegration(GithubIntegration):
         )
 
 
+def _decode_pem(raw_pem):
+    if "GITHUB_ACTIONS" in os.environ and os.environ["GITHUB_ACTIONS"] == "true":
+        sys.stdout.flush()
+        print(
+            "running in GitHub Actions",
+            flush=True,
+        )
+        print(f"::add-mask::{raw_pem}", flush=True)
+
+    f = io.StringIO()
+    if raw_pem[0:1] != b"-":
+        with redirect_stdout(f), redirect_stderr(f):
+            raw_pem = base64.b64decode(raw_pem)
+        if "GITHUB_ACTIONS" in os.environ and os.environ["GITHUB_ACTIONS"] == "true":
+            sys.stdout.flush()
+            print("base64 decoded PEM", flush=True)
+            print(f"::add-mask::{raw_pem}", flush=True)
+
+    if isinstance(raw_pem, bytes):
+        with redirect_stdout(f), redirect_stderr(f):
+            raw_pem = raw_pem.decode()
+        if "GITHUB_ACTIONS" in os.environ and os.environ["GITHUB_ACTIONS"] == "true":
+            sys.stdout.flush()
+            print("utf-8 decoded PEM", flush=True)
+            print(f"::add-mask::{raw_pem}", flush=True)
+
+    return raw_pem
+
+
+class CachedAppAuth(Auth.AppAuth):
+    """App authentication that parses the private key once and reuses the
+    signed JWT until it is close to expiring.
+
+    PyGithub signs a new JWT, parsing the PEM each time, for every request
+    made as the app.
+
+    Parameters
+    ----------
+    app_id : str
+        The github app ID.
+    private_key : str
+        The app private key in PEM format.
+    """
+
+    def __init__(self, app_id, private_key):
+        super().__init__(
+            app_id=app_id, private_key=private_key, jwt_expiry=APP_JWT_EXPIRY
+        )
+        self._parsed_key = load_pem_private_key(private_key.encode(), password=None)
+        self._jwt_lock = threading.Lock()
+        self._jwt = None
+        self._jwt_expires_at = 0.0
+        self.jwts_signed = 0
+
+    def create_jwt(self, expiration=None):
+        now = int(time.time())
+        payload = {
+            "iat": now + self._jwt_issued_at,
+            "exp": now + (expiration if expiration is not None else self._jwt_expiry),
+            "iss": self._app_id,
+        }
+        encrypted = jwt.encode(
+            payload, key=self._parsed_key, algorithm=self._jwt_algorithm
+        )
+        if isinstance(encrypted, bytes):
+            encrypted = encrypted.decode("utf-8")
+        return encrypted
+
+    @property
+    def token(self):
+        with self._jwt_lock:
+            if self._jwt is None or (
+                self._jwt_expires_at - time.time() <= APP_JWT_REFRESH_MARGIN
+            ):
+                self._jwt_expires_at = time.time() + self._jwt_expiry
+                self._jwt = self.create_jwt()
+                self.jwts_signed += 1
+            return self._jwt
+
+
+class AppIntegration:
+    """A GitHub app's integration that is reused to mint installation tokens.
+
+    The private key is parsed once, the JWT is reused until it is about to
+    expire and the installation ids are cached, so minting a token costs a
+    single API call.
+
+    Parameters
+    ----------
+    app_id : str
+        The github app ID.
+    raw_pem : bytes
+        An app private key as bytes.
+    """
+
+    def __init__(self, app_id, raw_pem):
+        f = io.StringIO()
+        with redirect_stdout(f), redirect_stderr(f):
+            gh_auth = CachedAppAuth(app_id, _decode_pem(raw_pem))
+        if "GITHUB_ACTIONS" in os.environ and os.environ["GITHUB_ACTIONS"] == "true":
+            sys.stdout.flush()
+            print("loaded Github Auth", flush=True)
+
+        with redirect_stdout(f), redirect_stderr(f):
+            self.integration = MyGithubIntegration(auth=gh_auth)
+        if "GITHUB_ACTIONS" in os.environ and os.environ["GITHUB_ACTIONS"] == "true":
+            sys.stdout.flush()
+            print("loaded Github Integration", flush=True)
+
+        self._lock = threading.Lock()
+        self._repo_installation_ids = cachetools.LRUCache(maxsize=1024)
+        self._org_installation_ids = {}
+
+    def get_org_installation_id(self, org):
+        """Get the id of the app's installation for the org `org`."""
+        with self._lock:
+            installation_id = self._org_installation_ids.get(org)
+        if installation_id is None:
+            f = io.StringIO()
+            with redirect_stdout(f), redirect_stderr(f):
+                installation_id = self.integration.get_org_installation(org).id
+            if (
+                "GITHUB_ACTIONS" in os.environ
+                and os.environ["GITHUB_ACTIONS"] == "true"
+            ):
+                sys.stdout.flush()
+                print("found Github installation", flush=True)
+            with self._lock:
+                self._org_installation_ids[org] = installation_id
+        return installation_id
+
+    def forget_org_installation_id(self, org):
+        """Forget the cached installation id for `org` (e.g., after an error)."""
+        with self._lock:
+            self._org_installation_ids.pop(org, None)
+
+    def get_repo_installation_id(self, repo):
+        """Get the id of the app's installation for `conda-forge/<repo>`."""
+        with self._lock:
+            installation_id = self._repo_installation_ids.get(repo)
+        if installation_id is None:
+            f = io.StringIO()
+            with redirect_stdout(f), redirect_stderr(f):
+                installation_id = self.integration.get_repo_installation(
+                    "conda-forge", repo
+                ).id
+            if (
+                "GITHUB_ACTIONS" in os.environ
+                and os.environ["GITHUB_ACTIONS"] == "true"
+            ):
+                sys.stdout.flush()
+                print("found Github installation", flush=True)
+            with self._lock:
+                self._repo_installation_ids[repo] = installation_id
+        return installation_id
+
+    def forget_repo_installation_id(self, repo):
+        """Forget the cached installation id for `repo` (e.g., after an error)."""
+        with self._lock:
+            self._repo_installation_ids.pop(repo, None)
+
+
+@lru_cache(maxsize=4)
+def _get_app_integration(app_id, raw_pem):
+    return AppIntegration(app_id, raw_pem)
+
+
 def generate_app_token_for_feedstock(app_id, raw_pem, repo, readonly=False):
     """Get an app token.
 
+    Tokens are cached per app and repo and reused while they have at least
+    `FEEDSTOCK_TOKEN_MIN_LIFETIME` seconds left.
+
     Parameters
     ----------
     app_id : str
@@ -331,6 +695,25 @@ def generate_app_token_for_feedstock(app_id, raw_pem, repo, readonly=False):
     gh_token : str
         The github token. May return None if there is an error.
     """
+    return _get_app_token_for_feedstock(app_id, raw_pem, repo, readonly=readonly)[0]
+
+
+def _get_app_token_for_feedstock(app_id, raw_pem, repo, readonly=False):
+    with FEEDSTOCK_TOKEN_CACHE_LOCK:
+        cached = FEEDSTOCK_TOKEN_CACHE.get((str(app_id), repo, readonly))
+    if cached is not None and cached[1] - time.time() > FEEDSTOCK_TOKEN_MIN_LIFETIME:
+        return cached
+
+    gh_token, expires_at = _generate_app_token_for_feedstock(
+        app_id, raw_pem, repo, readonly=readonly
+    )
+    if gh_token is not None:
+        with FEEDSTOCK_TOKEN_CACHE_LOCK:
+            FEEDSTOCK_TOKEN_CACHE[str(app_id), repo, readonly] = (gh_token, expires_at)
+    return gh_token, expires_at
+
+
+def _generate_app_token_for_feedstock(app_id, raw_pem, repo, readonly=False):
     read_or_write = "read" if readonly else "write"
     permissions = {
         "actions": read_or_write,
@@ -343,59 +726,15 @@ def generate_app_token_for_feedstock(app_id, raw_pem, repo, readonly=False):
         "workflows": read_or_write,
     }
 
-    if "GITHUB_ACTIONS" in os.environ and os.environ["GITHUB_ACTIONS"] == "true":
-        sys.stdout.flush()
-        print(
-            "running in GitHub Actions",
-            flush=True,
-        )
-        print(f"::add-mask::{raw_pem}", flush=True)
-
+    app = None
     try:
-        f = io.StringIO()
-        if raw_pem[0:1] != b"-":
-            with redirect_stdout(f), redirect_stderr(f):
-                raw_pem = base64.b64decode(raw_pem)
-            if (
-                "GITHUB_ACTIONS" in os.environ
-                and os.environ["GITHUB_ACTIONS"] == "true"
-            ):
-                sys.stdout.flush()
-                print("base64 decoded PEM", flush=True)
-                print(f"::add-mask::{raw_pem}", flush=True)
-
-        if isinstance(raw_pem, bytes):
-            with redirect_stdout(f), redirect_stderr(f):
-                raw_pem = raw_pem.decode()
-            if (
-                "GITHUB_ACTIONS" in os.environ
-                and os.environ["GITHUB_ACTIONS"] == "true"
-            ):
-                sys.stdout.flush()
-                print("utf-8 decoded PEM", flush=True)
-                print(f"::add-mask::{raw_pem}", flush=True)
-
-        with redirect_stdout(f), redirect_stderr(f):
-            gh_auth = Auth.AppAuth(app_id=app_id, private_key=raw_pem)
-        if "GITHUB_ACTIONS" in os.environ and os.environ["GITHUB_ACTIONS"] == "true":
-            sys.stdout.flush()
-            print("loaded Github Auth", flush=True)
-
-        with redirect_stdout(f), redirect_stderr(f):
-            integration = MyGithubIntegration(auth=gh_auth)
-        if "GITHUB_ACTIONS" in os.environ and os.environ["GITHUB_ACTIONS"] == "true":
-            sys.stdout.flush()
-            print("loaded Github Integration", flush=True)
-
-        with redirect_stdout(f), redirect_stderr(f):
-            installation = integration.get_repo_installation("conda-forge", repo)
-        if "GITHUB_ACTIONS" in os.environ and os.environ["GITHUB_ACTIONS"] == "true":
-            sys.stdout.flush()
-            print("found Github installation", flush=True)
+        app = _get_app_integration(app_id, raw_pem)
+        installation_id = app.get_repo_installation_id(repo)
 
+        f = io.StringIO()
         with redirect_stdout(f), redirect_stderr(f):
-            gh_token_data = integration.get_access_token(
-                installation.id,
+            gh_token_data = app.integration.get_access_token(
+                installation_id,
                 permissions=permissions,
                 repositories=[repo],
             )
@@ -410,6 +749,7 @@ def generate_app_token_for_feedstock(app_id, raw_pem, repo, readonly=False):
             assert returned_repos == set([repo]), returned_repos
 
             gh_token = gh_token_data.token
+            expires_at = _expires_at_to_timestamp(gh_token_data.expires_at)
 
         if "GITHUB_ACTIONS" in os.environ and os.environ["GITHUB_ACTIONS"] == "true":
             sys.stdout.flush()
@@ -417,6 +757,10 @@ def generate_app_token_for_feedstock(app_id, raw_pem, repo, readonly=False):
             print(f"::add-mask::{gh_token}", flush=True)
 
     except Exception:
+        # the app may have been removed from or reinstalled on the repo
+        if app is not None:
+            app.forget_repo_installation_id(repo)
         gh_token = None
+        expires_at = 0.0
 
-    return gh_token
+    return gh_token, expires_at
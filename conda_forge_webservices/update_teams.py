@@ -1,5 +1,4 @@
 import github
-import os
 import re
 import logging
 import math
@@ -11,6 +10,10 @@ import textwrap
 from functools import cache
 
 from ruamel.yaml import YAML
+from conda_forge_webservices.rate_limits import (
+    attribute_rate_limit_usage,
+    record_response,
+)
 from conda_forge_webservices.tokens import (
     get_gh_client,
     get_app_token_for_webservices_only,
@@ -49,6 +52,7 @@ class _TeamUpdateLocks:
 TeamUpdateLocks = _TeamUpdateLocks()
 
 
+@attribute_rate_limit_usage("teams")
 def cancel_invites_cron_job():
     token = get_app_token_for_webservices_only()
     headers = {
@@ -59,6 +63,7 @@ def cancel_invites_cron_job():
     r = requests.get(
         "https://api.github.com/orgs/conda-forge/failed_invitations",
         headers=headers,
+        hooks={"response": record_response},
     )
 
     num_processed = 0
@@ -73,6 +78,7 @@ def cancel_invites_cron_job():
             ri = requests.delete(
                 f"https://api.github.com/orgs/conda-forge/invitations/{invite['id']}",
                 headers=headers,
+                hooks={"response": record_response},
             )
             try:
                 ri.raise_for_status()
@@ -98,7 +104,7 @@ def _filter_jinja2(line):
 
 @cache
 def get_filter_out_members():
-    gh = github.Github(auth=github.Auth.Token(os.environ["GH_TOKEN"]))
+    gh = get_gh_client("bot")
     org = gh.get_organization("conda-forge")
     teams = ["staged-recipes", "help-r", "r"]
     gh_teams = list(org.get_team_by_slug(team) for team in teams)
@@ -154,6 +160,7 @@ def get_recipe_dummy_meta(recipe_content):
         raise RuntimeError(f"team update failed due to {skip} 'extra:' sections")
 
 
+@attribute_rate_limit_usage("teams")
 def update_team(org_name, repo_name, commit=None):
     if not repo_name.endswith("-feedstock"):
         return
@@ -0,0 +1,180 @@
+"""
+This module implements a per-feedstock fair scheduler for the upload pool.
+
+Jobs are queued per feedstock and handed to the underlying executor with
+deficit round robin (DRR) so that a single feedstock pushing many outputs
+cannot occupy every worker while other feedstocks wait behind it.
+"""
+
+import asyncio
+import collections
+import logging
+import time
+
+import cachetools
+
+LOGGER = logging.getLogger("conda_forge_webservices.upload_scheduler")
+
+
+class _Job:
+    __slots__ = ("args", "cost", "enqueued_at", "func", "future")
+
+    def __init__(self, func, args, cost, future):
+        self.func = func
+        self.args = args
+        self.cost = cost
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class _WaitTimeStats:
+    __slots__ = ("count", "max", "total")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, wait_time):
+        self.count += 1
+        self.total += wait_time
+        self.max = max(self.max, wait_time)
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+        }
+
+
+class FairUploadScheduler:
+    """Deficit round robin scheduler keyed on the feedstock name.
+
+    All bookkeeping happens on the event loop so no locks are needed. At most
+    `max_workers` jobs are handed to the executor at a time which keeps the
+    executor's own FIFO queue empty.
+
+    Parameters
+    ----------
+    executor : concurrent.futures.Executor
+        The executor that runs the jobs.
+    max_workers : int
+        The maximum number of jobs to run at once. This should match the number
+        of workers in `executor`.
+    max_per_feedstock : int
+        The maximum number of jobs to run at once for a single feedstock.
+    quantum : int
+        The amount of credit a feedstock gets per round. Jobs cost the number of
+        outputs they copy.
+    """
+
+    def __init__(self, executor, max_workers, max_per_feedstock=2, quantum=4):
+        self._executor = executor
+        self.max_workers = max_workers
+        self.max_per_feedstock = max(1, max_per_feedstock)
+        self.quantum = max(1, quantum)
+
+        self._queues = {}
+        self._deficits = {}
+        self._active = collections.deque()
+        self._running = collections.Counter()
+        self._num_running = 0
+
+        self._wait_stats = _WaitTimeStats()
+        self._feedstock_wait_stats = cachetools.LRUCache(maxsize=128)
+
+    async def submit(self, feedstock, cost, func, *args):
+        """Queue `func(*args)` for `feedstock` and wait for its result."""
+        loop = asyncio.get_running_loop()
+        job = _Job(func, args, max(1, cost), loop.create_future())
+
+        if feedstock not in self._queues:
+            self._queues[feedstock] = collections.deque()
+            self._deficits[feedstock] = 0
+            self._active.append(feedstock)
+        self._queues[feedstock].append(job)
+
+        self._dispatch()
+        return await job.future
+
+    def _next_eligible_feedstock(self):
+        for _ in range(len(self._active)):
+            feedstock = self._active[0]
+            if self._running[feedstock] < self.max_per_feedstock:
+                return feedstock
+            self._active.rotate(-1)
+        return None
+
+    def _dispatch(self):
+        while self._num_running < self.max_workers and self._active:
+            feedstock = self._next_eligible_feedstock()
+            if feedstock is None:
+                # every feedstock with queued work is at its concurrency cap
+                return
+
+            queue = self._queues[feedstock]
+            if self._deficits[feedstock] < queue[0].cost:
+                self._deficits[feedstock] += self.quantum
+                self._active.rotate(-1)
+                continue
+
+            job = queue.popleft()
+            self._deficits[feedstock] -= job.cost
+            if not queue:
+                # idle feedstocks do not bank credit in DRR
+                del self._queues[feedstock]
+                del self._deficits[feedstock]
+                self._active.popleft()
+
+            self._start(feedstock, job)
+
+    def _start(self, feedstock, job):
+        wait_time = time.monotonic() - job.enqueued_at
+        self._wait_stats.add(wait_time)
+        if feedstock not in self._feedstock_wait_stats:
+            self._feedstock_wait_stats[feedstock] = _WaitTimeStats()
+        self._feedstock_wait_stats[feedstock].add(wait_time)
+        LOGGER.debug(
+            "    upload job for %s started after waiting %.3fs", feedstock, wait_time
+        )
+
+        self._running[feedstock] += 1
+        self._num_running += 1
+
+        loop = asyncio.get_running_loop()
+        exec_fut = loop.run_in_executor(self._executor, job.func, *job.args)
+        exec_fut.add_done_callback(
+            lambda fut: self._finish(feedstock, job, fut),
+        )
+
+    def _finish(self, feedstock, job, exec_fut):
+        self._running[feedstock] -= 1
+        if self._running[feedstock] <= 0:
+            del self._running[feedstock]
+        self._num_running -= 1
+
+        if not job.future.done():
+            if exec_fut.cancelled():
+                job.future.cancel()
+            elif exec_fut.exception() is not None:
+                job.future.set_exception(exec_fut.exception())
+            else:
+                job.future.set_result(exec_fut.result())
+
+        self._dispatch()
+
+    def stats(self):
+        """Return a JSON-serializable snapshot of the scheduler state and the
+        wait-time metrics."""
+        return {
+            "running": self._num_running,
+            "max_workers": self.max_workers,
+            "max_per_feedstock": self.max_per_feedstock,
+            "queued": {fs: len(q) for fs, q in self._queues.items()},
+            "running_per_feedstock": dict(self._running),
+            "wait_time": self._wait_stats.to_dict(),
+            "wait_time_per_feedstock": {
+                fs: st.to_dict() for fs, st in self._feedstock_wait_stats.items()
+            },
+        }
@@ -1,3 +1,4 @@
+import hashlib
 import os
 import random
 import logging
@@ -11,6 +12,9 @@ import github
 ALLOWED_CMD_NON_FEEDSTOCKS = ["staged-recipes", "admin-requests"]
 LOGGER = logging.getLogger("conda_forge_webservices")
 
+# credential fingerprint -> human readable name (e.g., the credential role)
+_CREDENTIAL_LABELS: dict[str, str] = {}
+
 
 @contextmanager
 def tmp_directory():
@@ -113,3 +117,26 @@ def get_pr_is_mergeable(repo, pr_id):
 
     # assume true
     return True
+
+
+def _credential_fingerprint(token):
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:12]
+
+
+def credential_id(auth_header):
+    """Get a name for the credentials in an `Authorization` header that is safe
+    to log or to use as a key.
+
+    This is the label given to the credentials with `label_credential` or a
+    short fingerprint of them.
+    """
+    if not auth_header:
+        return "anonymous"
+    # the same token is sent as both "token <token>" and "Bearer <token>"
+    fingerprint = _credential_fingerprint(auth_header.split(" ", 1)[-1])
+    return _CREDENTIAL_LABELS.get(fingerprint, fingerprint)
+
+
+def label_credential(token, label):
+    """Refer to `token` as `label` in `credential_id`."""
+    _CREDENTIAL_LABELS[_credential_fingerprint(token)] = label
@@ -18,6 +18,7 @@ import asyncio
 import tornado.escape
 import tornado.httpserver
 import tornado.ioloop
+import tornado.iostream
 import tornado.web
 import hmac
 import hashlib
@@ -30,9 +31,7 @@ import atexit
 import logging
 
 import requests
-import github
 import yaml
-from datetime import datetime, timezone
 
 import conda_forge_webservices
 import conda_forge_webservices.linting as linting
@@ -44,9 +43,14 @@ from conda_forge_webservices._version import __version__
 from conda_forge_webservices.update_me import WEBSERVICE_PKGS
 from conda_forge_webservices.feedstock_outputs import (
     validate_feedstock_outputs,
+    check_feedstock_outputs,
     is_valid_feedstock_token,
     comment_on_outputs_copy,
     stage_dist_to_post_staging_and_possibly_copy_to_prod,
+    queue_copied_dist_for_audit,
+    audit_copied_dists,
+    refresh_feedstock_outputs_config,
+    FEEDSTOCK_OUTPUTS_CONFIG_TTL,
     STAGING_LABEL,
 )
 from conda_forge_webservices.utils import (
@@ -54,9 +58,16 @@ from conda_forge_webservices.utils import (
     log_title_and_message_at_level,
 )
 from conda_forge_webservices import status_monitor
+from conda_forge_webservices.http_cache import get_http_cache_stats
+from conda_forge_webservices.rate_limits import (
+    get_rate_limit_stats,
+    rate_limit_budget_is_low,
+)
+from conda_forge_webservices.upload_scheduler import FairUploadScheduler
 from conda_forge_webservices.tokens import (
-    get_app_token_for_webservices_only,
     get_gh_client,
+    get_gh_client_stats,
+    start_app_token_refresher,
 )
 
 LOGGER = logging.getLogger("conda_forge_webservices")
@@ -64,6 +75,8 @@ LOGGER = logging.getLogger("conda_forge_webservices")
 COMMAND_POOL = None
 COPYLOCK = None
 UPLOAD_POOL = None
+UPLOAD_POOL_MAX_WORKERS = 4
+UPLOAD_SCHEDULER = None
 
 
 def _init_upload_pool_processes(lock):
@@ -91,7 +104,7 @@ def _worker_pool(kind):
         if UPLOAD_POOL is None:
             COPYLOCK = threading.RLock()
             UPLOAD_POOL = ThreadPoolExecutor(
-                max_workers=4,
+                max_workers=UPLOAD_POOL_MAX_WORKERS,
                 initializer=_init_upload_pool_processes,
                 initargs=(COPYLOCK,),
             )
@@ -100,6 +113,23 @@ def _worker_pool(kind):
         raise ValueError(f"Unknown pool kind: {kind}")
 
 
+def _upload_scheduler():
+    global UPLOAD_SCHEDULER
+
+    if UPLOAD_SCHEDULER is None:
+        # jobs are queued per feedstock so one feedstock uploading many
+        # outputs cannot starve the others
+        UPLOAD_SCHEDULER = FairUploadScheduler(
+            _worker_pool("upload"),
+            UPLOAD_POOL_MAX_WORKERS,
+            max_per_feedstock=int(
+                os.environ.get("CF_WEBSERVICES_UPLOAD_MAX_PER_FEEDSTOCK", "2")
+            ),
+            quantum=int(os.environ.get("CF_WEBSERVICES_UPLOAD_QUANTUM", "4")),
+        )
+    return UPLOAD_SCHEDULER
+
+
 def _shutdown_worker_pools():
     global COMMAND_POOL
     global UPLOAD_POOL
@@ -112,8 +142,8 @@ atexit.register(_shutdown_worker_pools)
 
 
 THREAD_POOL = None
-STATUS_DATA_LOCK = threading.RLock()
 CACHE_SATAUS_DATA_LOCK = threading.RLock()
+COPY_AUDIT_LOCK = threading.RLock()
 
 
 def _thread_pool():
@@ -133,51 +163,40 @@ atexit.register(_shutdown_thread_pool)
 
 
 def get_commit_message(full_name, commit):
-    return (
-        github.Github(auth=github.Auth.Token(os.environ["GH_TOKEN"]))
-        .get_repo(full_name)
-        .get_commit(commit)
-        .commit.message
-    )
-
-
-def _get_rate_limiting_info_for_token(token):
-    # Compute some info about our GitHub API Rate Limit.
-    # Note that it doesn't count against our limit to
-    # get this info. So, we should be doing this regularly
-    # to better know when it is going to run out. Also,
-    # this will help us better understand where we are
-    # spending it and how to better optimize it.
-
-    # Get GitHub API Rate Limit usage and total
-    gh = github.Github(auth=github.Auth.Token(token))
-    gh_api_remaining = gh.get_rate_limit().core.remaining
-    gh_api_total = gh.get_rate_limit().core.limit
-
-    try:
-        user = gh.get_user().login
-    except Exception:
-        user = "conda-forge-webservices[bot]"
-
-    # Compute time until GitHub API Rate Limit reset
-    gh_api_reset_time = gh.get_rate_limit().core.reset
-    gh_api_reset_time -= datetime.now(timezone.utc)
-    msg = f"{user} - remaining {gh_api_remaining} out of {gh_api_total}."
-    msg = f"github api requests: {msg} - Will reset in {gh_api_reset_time}."
-    return msg
+    return get_gh_client("bot").get_repo(full_name).get_commit(commit).commit.message
 
 
 def _print_rate_limiting_info():
-    d = [
-        os.environ["GH_TOKEN"],
-        get_app_token_for_webservices_only(),
-    ]
-    if "AUTOTICK_BOT_GH_TOKEN" in os.environ:
-        d.append(os.environ["AUTOTICK_BOT_GH_TOKEN"])
+    # the budgets are recorded from the headers of the responses to our own
+    # requests so this does not cost any requests
+    stats = get_rate_limit_stats()
 
     msg = []
-    for k in d:
-        msg.append(_get_rate_limiting_info_for_token(k))
+    for budget in sorted(
+        stats["budgets"], key=lambda b: (b["resource"], b["credential"])
+    ):
+        msg.append(
+            f"github api requests: {budget['credential']} ({budget['resource']}) - "
+            f"remaining {budget['remaining']} out of {budget['limit']}. - "
+            f"Will reset in {budget['seconds_until_reset'] / 60:.1f}m."
+        )
+    for subsystem, resources in sorted(stats["subsystems"].items()):
+        for resource, counts in sorted(resources.items()):
+            msg.append(
+                f"github api usage: {subsystem} ({resource}) - "
+                f"{counts['counted']} counted out of {counts['requests']} requests."
+            )
+    cache_stats = get_http_cache_stats()
+    msg.append(
+        f"github api conditional request cache: {cache_stats['hits']} hits, "
+        f"{cache_stats['misses']} misses, {cache_stats['revalidated']} revalidated "
+        f"- {cache_stats['size']} entries, {cache_stats['bytes'] / 1024**2:.1f} MiB."
+    )
+    for role, client_stats in sorted(get_gh_client_stats().items()):
+        msg.append(
+            f"github api clients: {role} - {client_stats['created']} created, "
+            f"{client_stats['reused']} reused, {client_stats['rotated']} rotated."
+        )
     msg = "\n".join(msg)
     log_title_and_message_at_level(
         level="info",
@@ -186,6 +205,15 @@ def _print_rate_limiting_info():
     )
 
 
+def _rate_limit_budget_is_low(job_name, credential="webservices"):
+    if rate_limit_budget_is_low(credential=credential):
+        LOGGER.info(
+            "deferring %s since the GitHub API rate limit budget is low", job_name
+        )
+        return True
+    return False
+
+
 def valid_request(body, signature):
     our_hash = hmac.new(
         os.environ["CF_WEBSERVICES_TOKEN"].encode("utf-8"),
@@ -536,6 +564,21 @@ class UpdateFeedstockHookHandler(WriteErrorAsJSONRequestHandler):
                 )
                 tornado.ioloop.IOLoop.current().add_future(handled, _complete_future)
                 self.set_status(202)
+            elif (
+                body["after"] != "0000000000000000000000000000000000000000"
+                and owner == "conda-forge"
+                and repo_name == "feedstock-outputs"
+                and ref == "refs/heads/main"
+            ):
+                # read the config at the pushed commit since the raw GitHub
+                # CDN can serve stale data for main
+                fut = tornado.ioloop.IOLoop.current().run_in_executor(
+                    _thread_pool(),
+                    refresh_feedstock_outputs_config,
+                    body["after"],
+                )
+                tornado.ioloop.IOLoop.current().add_future(fut, _complete_future)
+                self.set_status(202)
             else:
                 self.set_status(204)
         else:
@@ -805,44 +848,6 @@ class OutputsValidationHandler(WriteErrorAsJSONRequestHandler):
         self.write(json.dumps({"deprecated": True}))
 
 
-def _comment_on_core_notes_if_bad_copy(copied, errors, outputs, label, hash_type):
-    from conda_forge_webservices.feedstock_outputs import _is_valid_output_hash, PROD
-
-    gh = get_gh_client()
-    repo = gh.get_repo("conda-forge/core-notes")
-
-    channel_str = "conda-forge" if label == "main" else f"conda-forge/label/{label}"
-
-    for o in outputs:
-        if (
-            copied[o]
-            and not _is_valid_output_hash({o: outputs[o]}, hash_type, PROD, label)[o]
-        ):
-            copied[o] = False
-
-            errors.append(f"package {o} has an incorrect hash on {channel_str}")
-
-            comment = (
-                f"The package `{o}` was found on {PROD}, but with the incorrect hash ("
-                f"`{hash_type}:{outputs[o]}`). Please investigate!"
-            )
-
-            for issue in repo.get_issues(state="open"):
-                if f"`{o}`" in issue.title:
-                    issue.create_comment(comment)
-                    return
-
-            repo.create_issue(
-                title=(
-                    f"important/security: package `{o}` bad copy operation "
-                    f"to {channel_str}"
-                ),
-                body=comment,
-            )
-
-    return copied, errors
-
-
 def _do_copy(
     feedstock_repo_name,
     outputs,
@@ -874,6 +879,11 @@ def _do_copy(
                 )
                 errors.extend(dist_errors)
                 copied[dist] = dist_copied
+                if dist_copied:
+                    # the hash on prod is checked later off of the request path
+                    queue_copied_dist_for_audit(
+                        feedstock_repo_name, dist, dest_label, hash_type, hash_value
+                    )
                 if not dist_copied:
                     valid[dist] = False
                     errors.append(
@@ -887,10 +897,6 @@ def _do_copy(
         if o not in valid:
             valid[o] = False
 
-    # copied, errors = _comment_on_core_notes_if_bad_copy(
-    #     copied, errors, outputs, dest_label, hash_type
-    # )
-
     if not all(copied[o] for o in outputs) and comment_on_error:
         comment_on_outputs_copy(feedstock_repo_name, git_sha, errors, valid, copied)
 
@@ -1018,6 +1024,100 @@ def _run_single_copy_job(
         return status, json.dumps(data)
 
 
+def _run_single_check_job(feedstock_repo_name, feedstock_token, provider, outputs):
+    if feedstock_repo_name is not None and len(feedstock_repo_name) > 0:
+        feedstock_exists = _repo_exists(feedstock_repo_name)
+    else:
+        feedstock_exists = False
+
+    valid_token = False
+    if (
+        feedstock_exists
+        and feedstock_token is not None
+        and len(feedstock_token) > 0
+        and is_valid_feedstock_token(
+            "conda-forge",
+            feedstock_repo_name,
+            feedstock_token,
+            provider=provider,
+        )
+    ):
+        valid_token = True
+
+    if (not feedstock_exists) or (not isinstance(outputs, list)) or (not valid_token):
+        log_title_and_message_at_level(
+            level="warning",
+            title=(
+                f"invalid outputs check request for feedstock '{feedstock_repo_name}'"
+            ),
+            msg=yaml.dump(
+                {
+                    "feedstock_exists": feedstock_exists,
+                    "valid_token": valid_token,
+                    "outputs": outputs,
+                    "provider": provider,
+                },
+                default_flow_style=False,
+                indent=2,
+            ),
+        )
+        return 400, None
+    else:
+        valid, errors = check_feedstock_outputs(feedstock_repo_name, outputs)
+
+        if not all(v for v in valid.values()):
+            status = 400
+        else:
+            status = 200
+
+        data = {
+            "feedstock_exists": feedstock_exists,
+            "errors": errors,
+            "valid": valid,
+            "provider": provider,
+        }
+
+        log_title_and_message_at_level(
+            level="info",
+            title=f"check finished for outputs for feedstock '{feedstock_repo_name}'",
+            msg=yaml.dump(data, default_flow_style=False, indent=2),
+        )
+
+        return status, json.dumps(data)
+
+
+class OutputsCheckHandler(WriteErrorAsJSONRequestHandler):
+    """Check if outputs are allowed for a feedstock before they are uploaded to
+    the staging channel.
+
+    The request body is like the one for `/feedstock-outputs/copy` except that
+    `outputs` is a list of output names with no hashes.
+    """
+
+    async def post(self):
+        headers = self.request.headers
+        feedstock_token = headers.get("FEEDSTOCK_TOKEN", None)
+        data = tornado.escape.json_decode(self.request.body)
+        feedstock_repo_name = data.get("feedstock", None)
+        outputs = data.get("outputs", None)
+        provider = data.get("provider", None)
+
+        status, data = await tornado.ioloop.IOLoop.current().run_in_executor(
+            _thread_pool(),
+            _run_single_check_job,
+            feedstock_repo_name,
+            feedstock_token,
+            provider,
+            outputs,
+        )
+
+        self.set_status(status)
+        if data is None:
+            self.write_error(status)
+        else:
+            self.write(data)
+
+
 class OutputsCopyHandler(WriteErrorAsJSONRequestHandler):
     async def post(self):
         headers = self.request.headers
@@ -1051,8 +1151,9 @@ class OutputsCopyHandler(WriteErrorAsJSONRequestHandler):
             title=f"copy started for outputs for feedstock '{feedstock_repo_name}'",
         )
 
-        status, data = await tornado.ioloop.IOLoop.current().run_in_executor(
-            _worker_pool("upload"),
+        status, data = await _upload_scheduler().submit(
+            feedstock_repo_name or "",
+            len(outputs) if isinstance(outputs, dict) else 1,
             _run_single_copy_job,
             feedstock_repo_name,
             feedstock_token,
@@ -1112,12 +1213,30 @@ class OutputsCopyHandler(WriteErrorAsJSONRequestHandler):
         # return
 
 
+class OutputsCopyStatsHandler(WriteErrorAsJSONRequestHandler):
+    async def get(self):
+        self.add_header("Access-Control-Allow-Origin", "*")
+        self.write(json.dumps(_upload_scheduler().stats()))
+
+
+class RateLimitStatsHandler(WriteErrorAsJSONRequestHandler):
+    async def get(self):
+        self.add_header("Access-Control-Allow-Origin", "*")
+        stats = await tornado.ioloop.IOLoop.current().run_in_executor(
+            _thread_pool(),
+            get_rate_limit_stats,
+        )
+        stats["clients"] = get_gh_client_stats()
+        stats["http_cache"] = get_http_cache_stats()
+        self.write(json.dumps(stats))
+
+
 @functools.lru_cache(maxsize=1)
 def _cached_bot_workflow():
     if "AUTOTICK_BOT_GH_TOKEN" not in os.environ:
         return None
 
-    gh = github.Github(auth=github.Auth.Token(os.environ["AUTOTICK_BOT_GH_TOKEN"]))
+    gh = get_gh_client("autotick-bot")
     repo = gh.get_repo("conda-forge/conda-forge-bot")
     return repo.get_workflow("bot-events.yml")
 
@@ -1260,14 +1379,6 @@ def _dispatch_automerge_job(repo, sha):
     )
 
 
-def _update_status_data(body, lock, is_check_run):
-    with lock:
-        if is_check_run:
-            status_monitor.update_data_check_run(body)
-        else:
-            status_monitor.update_data_status(body)
-
-
 class StatusMonitorPayloadHookHandler(WriteErrorAsJSONRequestHandler):
     async def post(self):
         headers = self.request.headers
@@ -1287,12 +1398,8 @@ class StatusMonitorPayloadHookHandler(WriteErrorAsJSONRequestHandler):
 
         body = tornado.escape.json_decode(self.request.body)
         if event == "check_run" or event == "status":
-            tornado.ioloop.IOLoop.current().spawn_callback(
-                _update_status_data,
-                body,
-                STATUS_DATA_LOCK,
-                event == "check_run",
-            )
+            # the events are applied in batches by _process_status_events
+            status_monitor.queue_status_event(body, event == "check_run")
 
             if event == "status" and body["repository"]["full_name"].endswith(
                 "-feedstock"
@@ -1356,21 +1463,141 @@ class StatusMonitorDockerHandler(WriteErrorAsJSONRequestHandler):
         self.write(status_monitor.get_docker_status())
 
 
+def _write_rendered_report(handler, report):
+    # the reports are rendered ahead of time so we serve the bytes directly
+    # and answer conditional requests with a 304
+    handler.set_header("X-Status-Monitor-State", status_monitor.STATUS_CACHE_STATE)
+    if status_monitor.STATUS_CACHE_STATE == "warming":
+        # the data is partial until the cache is loaded
+        handler.set_header("Cache-Control", "no-store")
+    # the two encodings are different bodies so they get different ETags
+    use_gzip = "gzip" in handler.request.headers.get("Accept-Encoding", "")
+    if use_gzip:
+        handler.set_header("Etag", report.etag[:-1] + '-gzip"')
+    else:
+        handler.set_header("Etag", report.etag)
+    handler.set_header("Vary", "Accept-Encoding")
+    if handler.check_etag_header():
+        handler.set_status(304)
+        return
+
+    if use_gzip:
+        handler.set_header("Content-Encoding", "gzip")
+        handler.write(report.gzip_body)
+    else:
+        handler.write(report.body)
+
+
+def _get_rendered_report_data(handler, name=None):
+    # the resolution and window of the rates are picked via query parameters
+    # (e.g., ?resolution=hourly&window=7d)
+    try:
+        return status_monitor.get_rendered_report_data(
+            name=name,
+            resolution=handler.get_argument("resolution", None),
+            window=handler.get_argument("window", None),
+        )
+    except ValueError as e:
+        raise tornado.web.HTTPError(400, str(e))
+
+
 class StatusMonitorDBHandler(WriteErrorAsJSONRequestHandler):
     async def get(self):
         self.add_header("Access-Control-Allow-Origin", "*")
-        self.write(status_monitor.dump_report_data())
+        _write_rendered_report(self, _get_rendered_report_data(self))
 
 
 class StatusMonitorReportHandler(WriteErrorAsJSONRequestHandler):
     async def get(self, name):
         self.add_header("Access-Control-Allow-Origin", "*")
-        self.write(status_monitor.dump_report_data(name=name))
+        _write_rendered_report(self, _get_rendered_report_data(self, name=name))
+
+
+STATUS_STREAM_MAX_CLIENTS = 100
+STATUS_STREAM_MAX_QUEUE = 10000
+STATUS_STREAM_BATCH_DELAY = 0.25  # in seconds
+STATUS_STREAM_KEEPALIVE = 15  # in seconds
+
+
+class StatusMonitorStreamHandler(WriteErrorAsJSONRequestHandler):
+    """Stream the status updates as server-sent events.
+
+    Each `deltas` event has a JSON list of the updates made since the last
+    event (see `status_monitor.add_status_listener`). A `reset` event means
+    updates were dropped because the client fell behind and the full data
+    should be fetched again from `/status-monitor/db`.
+    """
+
+    async def get(self):
+        if len(status_monitor.STATUS_LISTENERS) >= STATUS_STREAM_MAX_CLIENTS:
+            raise tornado.web.HTTPError(503, "too many status stream clients")
+
+        self.set_header("Content-Type", "text/event-stream")
+        self.set_header("Cache-Control", "no-cache")
+        self.add_header("Access-Control-Allow-Origin", "*")
+
+        self._queue = asyncio.Queue(maxsize=STATUS_STREAM_MAX_QUEUE)
+        self._dropped = False
+        status_monitor.add_status_listener(self._on_delta)
+        try:
+            self.write("retry: 5000\n\n")
+            await self.flush()
+
+            while True:
+                try:
+                    delta = await asyncio.wait_for(
+                        self._queue.get(), timeout=STATUS_STREAM_KEEPALIVE
+                    )
+                except asyncio.TimeoutError:
+                    self.write(": keepalive\n\n")
+                    await self.flush()
+                    continue
+
+                if delta is None:
+                    break
+
+                # we wait a bit so that bursts of updates go out together
+                await asyncio.sleep(STATUS_STREAM_BATCH_DELAY)
+                deltas = [delta]
+                while not self._queue.empty():
+                    deltas.append(self._queue.get_nowait())
+                closed = deltas[-1] is None
+                deltas = [d for d in deltas if d is not None]
+
+                if self._dropped:
+                    self._dropped = False
+                    self.write("event: reset\ndata: {}\n\n")
+                elif deltas:
+                    self.write(f"event: deltas\ndata: {json.dumps(deltas)}\n\n")
+                await self.flush()
+
+                if closed:
+                    break
+        except tornado.iostream.StreamClosedError:
+            pass
+        finally:
+            status_monitor.remove_status_listener(self._on_delta)
+
+    def _on_delta(self, delta):
+        try:
+            self._queue.put_nowait(delta)
+        except asyncio.QueueFull:
+            self._dropped = True
+
+    def on_connection_close(self):
+        status_monitor.remove_status_listener(self._on_delta)
+        if hasattr(self, "_queue"):
+            # wake up the loop so that it can exit
+            try:
+                self._queue.put_nowait(None)
+            except asyncio.QueueFull:
+                self._queue.get_nowait()
+                self._queue.put_nowait(None)
 
 
 class StatusMonitorHandler(WriteErrorAsJSONRequestHandler):
     async def get(self):
-        self.write(status_monitor.render_status_index())
+        _write_rendered_report(self, status_monitor.get_rendered_status_index())
 
 
 class AliveHandler(WriteErrorAsJSONRequestHandler):
@@ -1468,13 +1695,17 @@ def create_webapp():
             (r"/conda-forge-command/org-hook", CommandHookHandler),
             (r"/conda-webservice-update/versions", UpdateWebservicesVersionsHandler),
             (r"/feedstock-outputs/validate", OutputsValidationHandler),
+            (r"/feedstock-outputs/check", OutputsCheckHandler),
             (r"/feedstock-outputs/copy", OutputsCopyHandler),
+            (r"/feedstock-outputs/copy-stats", OutputsCopyStatsHandler),
+            (r"/conda-webservice-update/rate-limits", RateLimitStatsHandler),
             (r"/autotickbot/payload", AutotickBotPayloadHookHandler),
             (r"/status-monitor/payload", StatusMonitorPayloadHookHandler),
             (r"/status-monitor/azure", StatusMonitorAzureHandler),
             (r"/status-monitor/docker", StatusMonitorDockerHandler),
             (r"/status-monitor/db", StatusMonitorDBHandler),
             (r"/status-monitor/report/(.*)", StatusMonitorReportHandler),
+            (r"/status-monitor/stream", StatusMonitorStreamHandler),
             (r"/status-monitor", StatusMonitorHandler),
             (r"/alive", AliveHandler),
         ]
@@ -1482,9 +1713,9 @@ def create_webapp():
     return application
 
 
-def _cache_status_data(lock):
+def _cache_status_data(lock, snapshot, latest_data):
     with lock:
-        status_monitor.cache_status_data()
+        status_monitor._cache_status_data(snapshot, latest_data)
 
 
 async def _cache_data():
@@ -1493,10 +1724,82 @@ async def _cache_data():
             level="info",
             title="caching status data",
         )
+        # the status data is only updated on the event loop so we serialize
+        # it here and leave the disk and git work to the thread pool
         await tornado.ioloop.IOLoop.current().run_in_executor(
             _thread_pool(),
             _cache_status_data,
             CACHE_SATAUS_DATA_LOCK,
+            status_monitor.make_status_snapshot(),
+            status_monitor.get_rendered_report_data().body,
+        )
+
+
+def _audit_copied_dists(lock):
+    # skip this round if the last audit is still running
+    if lock.acquire(blocking=False):
+        try:
+            # the hashes are checked on anaconda.org so only filing the
+            # issue for bad copies waits for the GitHub budget to reset
+            audit_copied_dists(
+                report=not _rate_limit_budget_is_low("reporting bad copies")
+            )
+        finally:
+            lock.release()
+
+
+async def _audit_copies_cron_job():
+    if "CF_WEBSERVICES_TEST" not in os.environ:
+        await tornado.ioloop.IOLoop.current().run_in_executor(
+            _thread_pool(),
+            _audit_copied_dists,
+            COPY_AUDIT_LOCK,
+        )
+
+
+async def _refresh_feedstock_outputs_config_cron_job():
+    if "CF_WEBSERVICES_TEST" not in os.environ:
+        try:
+            await tornado.ioloop.IOLoop.current().run_in_executor(
+                _thread_pool(),
+                refresh_feedstock_outputs_config,
+            )
+        except Exception:
+            LOGGER.exception("refreshing the feedstock-outputs config failed!")
+
+
+def _process_status_events():
+    num_events = status_monitor.process_status_events()
+    if num_events:
+        LOGGER.debug("applied %d status events", num_events)
+
+
+async def _warm_status_cache():
+    log_title_and_message_at_level(
+        level="info",
+        title="warming the status data cache",
+    )
+    try:
+        kind, data = await asyncio.wait_for(
+            tornado.ioloop.IOLoop.current().run_in_executor(
+                _thread_pool(),
+                status_monitor.fetch_status_cache_data,
+            ),
+            timeout=status_monitor.STATUS_CACHE_WARMUP_TIMEOUT,
+        )
+    except Exception as e:
+        LOGGER.warning(f"warming the status data cache failed: {e!r}")
+        kind, data = None, None
+
+    # this merges the data into the status data on the event loop
+    status_monitor.warm_status_cache(kind, data)
+
+
+async def _refresh_service_statuses_cron_job():
+    if "CF_WEBSERVICES_TEST" not in os.environ:
+        await tornado.ioloop.IOLoop.current().run_in_executor(
+            _thread_pool(),
+            status_monitor.refresh_service_statuses,
         )
 
 
@@ -1509,6 +1812,13 @@ async def _print_token_info():
 
 async def _cancel_invites_cron_job():
     if "CF_WEBSERVICES_TEST" not in os.environ:
+        if await tornado.ioloop.IOLoop.current().run_in_executor(
+            _thread_pool(),
+            _rate_limit_budget_is_low,
+            "cleaning up failed user invites",
+        ):
+            return
+
         log_title_and_message_at_level(
             level="info",
             title="cleaning up failed user invites",
@@ -1554,12 +1864,33 @@ def main():
     else:
         http_server.listen(port)
 
+    # keep the app token fresh so request handlers never wait on github for it
+    if "CF_WEBSERVICES_TEST" not in os.environ:
+        start_app_token_refresher()
+
     pcb = tornado.ioloop.PeriodicCallback(
         lambda: asyncio.create_task(_cache_data()),
         status_monitor.TIME_INTERVAL * 1000,  # in ms
     )
     pcb.start()
 
+    pse = tornado.ioloop.PeriodicCallback(
+        _process_status_events,
+        status_monitor.STATUS_EVENT_BATCH_INTERVAL * 1000,  # in ms
+    )
+    pse.start()
+
+    # the server takes traffic while the status data is loaded
+    tornado.ioloop.IOLoop.current().spawn_callback(_warm_status_cache)
+
+    # the handlers serve the last known statuses so we fetch them right away
+    tornado.ioloop.IOLoop.current().spawn_callback(_refresh_service_statuses_cron_job)
+    pss = tornado.ioloop.PeriodicCallback(
+        lambda: asyncio.create_task(_refresh_service_statuses_cron_job()),
+        status_monitor.STATUS_UPDATE_DELAY * 1000,  # in ms
+    )
+    pss.start()
+
     ptk = tornado.ioloop.PeriodicCallback(
         lambda: asyncio.create_task(_print_token_info()),
         60 * 5 * 1000,  # five minutes in ms
@@ -1572,6 +1903,19 @@ def main():
     )
     pci.start()
 
+    pca = tornado.ioloop.PeriodicCallback(
+        lambda: asyncio.create_task(_audit_copies_cron_job()),
+        60 * 1000,  # one minute in ms
+    )
+    pca.start()
+
+    # refresh well before the TTL so copy requests never wait on a fetch
+    pcf = tornado.ioloop.PeriodicCallback(
+        lambda: asyncio.create_task(_refresh_feedstock_outputs_config_cron_job()),
+        FEEDSTOCK_OUTPUTS_CONFIG_TTL * 1000 // 2,  # in ms
+    )
+    pcf.start()
+
     tornado.ioloop.IOLoop.instance().start()
 
 
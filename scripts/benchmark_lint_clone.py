@@ -0,0 +1,87 @@
+"""Compare the full and partial clones used to lint a PR.
+
+usage: python scripts/benchmark_lint_clone.py <owner/repo> <pr number> [--ignore-base]
+
+For each mode this reports the wall time to clone the repo, fetch the PR refs
+and check out the recipes to lint, as well as the size of the object store
+afterwards, which is the number of bytes transferred from GitHub.
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from conda_forge_webservices.linting import (
+    checkout_pr_for_linting,
+    clone_pr_for_linting,
+    find_recipes,
+)
+
+
+def _dir_size(path):
+    return sum(
+        os.path.getsize(os.path.join(root, fname))
+        for root, _, fnames in os.walk(path)
+        for fname in fnames
+    )
+
+
+def _run(clone_url, pr_id, ignore_base, partial_clone):
+    with TemporaryDirectory(suffix="_recipe") as tmp_dir:
+        t0 = time.perf_counter()
+        repo, ref_head, ref_merge = clone_pr_for_linting(
+            clone_url, tmp_dir, pr_id, partial_clone=partial_clone
+        )
+        base_recipes = checkout_pr_for_linting(
+            repo, ref_head, ref_merge, pr_id, ignore_base=ignore_base
+        )
+        wall_time = time.perf_counter() - t0
+
+        repo_dir = Path(repo.working_dir)
+        recipes = sorted(set(find_recipes(repo_dir)) - set(base_recipes))
+        return {
+            "wall_time": wall_time,
+            "bytes": _dir_size(os.path.join(repo.git_dir, "objects")),
+            "recipes": [str(r.relative_to(repo_dir)) for r in recipes],
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("repo", help="the repo, e.g., conda-forge/staged-recipes")
+    parser.add_argument("pr_id", type=int, help="the PR number")
+    parser.add_argument(
+        "--ignore-base",
+        action="store_true",
+        help="ignore the recipes in the base branch, as done for staged-recipes",
+    )
+    args = parser.parse_args()
+
+    clone_url = f"https://github.com/{args.repo}.git"
+    results = {}
+    for name, partial_clone in [("full", False), ("partial", True)]:
+        results[name] = _run(clone_url, args.pr_id, args.ignore_base, partial_clone)
+        print(
+            f"{name:>8}: {results[name]['wall_time']:8.2f} s "
+            f"{results[name]['bytes'] / 1024**2:10.2f} MiB",
+            flush=True,
+        )
+
+    assert results["full"]["recipes"] == results["partial"]["recipes"], (
+        "the clones found different recipes to lint: "
+        f"{results['full']['recipes']} != {results['partial']['recipes']}"
+    )
+    print(f"recipes: {results['partial']['recipes']}", flush=True)
+    print(
+        "speedup: {:.1f}x, transfer reduction: {:.1f}x".format(
+            results["full"]["wall_time"] / results["partial"]["wall_time"],
+            results["full"]["bytes"] / max(results["partial"]["bytes"], 1),
+        ),
+        flush=True,
+    )
+
+
+if __name__ == "__main__":
+    main()